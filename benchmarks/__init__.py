@@ -0,0 +1,8 @@
+"""Benchmarks for the tree operations of django-mptt2.
+
+The benchmarks use the models of the ``tests`` app and run against a freshly created test database. Run them from
+the root of the project folder, for example::
+
+    $ python -m benchmarks.move --sizes 1000 10000 100000
+
+"""
@@ -0,0 +1,42 @@
+"""Compares the json results of two ``benchmarks.operations`` runs by the median duration of each operation.
+
+Exits with status 1 if any operation got slower than the threshold allows, so it can guard a CI job::
+
+    $ python -m benchmarks.compare before.json after.json --threshold 1.25
+
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str):
+    with open(path) as stream:
+        document = json.load(stream)
+    return {(result["shape"], result["size"], result["operation"]): result for result in document["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio of the medians above which an operation counts as regression")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    regressions = 0
+    print(f"{'shape':>9} {'nodes':>8} {'operation':>18} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key]["median_ms"], candidate[key]["median_ms"]
+        ratio = after / before if before else float("inf")
+        regression = ratio > args.threshold
+        regressions += regression
+        shape, size, operation = key
+        print(f"{shape:>9} {size:>8} {operation:>18} {before:>10.2f} {after:>10.2f} {ratio:>7.2f}"
+              f"{'  slower' if regression else ''}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Stress test for concurrent writers. Measures the insert throughput against the count of trees the writers share.
+
+Every thread inserts nodes below random nodes of random trees. After each run the trees are checked with
+``TreeManager.check_integrity``, so lost updates show up as inconsistent trees.
+
+SQLite runs against a file database in WAL mode. To run it against a local PostgreSQL, pass a settings module
+which configures it::
+
+    $ python -m benchmarks.concurrency --trees 1 4 16 --threads 8
+    $ python -m benchmarks.concurrency --trees 1 4 16 --threads 8 --settings my_postgres_settings --lock advisory
+
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.utils import build_balanced_tree, setup_django, test_database
+
+
+def insert_nodes(tree_nodes, operations: int, seed: int, results: list):
+    from django.db import OperationalError, connection
+    from django.db.transaction import atomic
+
+    from tests.models import SimpleNode
+
+    rng = random.Random(seed)
+    retries = 0
+    try:
+        for _ in range(operations):
+            pks = rng.choice(tree_nodes)
+            while True:
+                try:
+                    with atomic():
+                        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=rng.choice(pks)))
+                    break
+                except OperationalError:
+                    # sqlite reports concurrent writers as locked database; postgres as deadlock
+                    retries += 1
+    finally:
+        connection.close()
+    results.append(retries)
+
+
+def run(trees, threads: int, operations: int, size: int, seed: int):
+    from django.db import connection
+
+    from tests.models import SimpleNode
+
+    print(f"{'trees':>6} {'threads':>8} {'inserts/s':>10} {'retries':>8} {'broken trees':>13}")
+    for tree_count in trees:
+        SimpleNode.objects.all()._raw_delete(SimpleNode.objects.db)
+        tree_nodes = []
+        for _ in range(tree_count):
+            root = build_balanced_tree(SimpleNode, size)
+            tree_nodes.append(list(SimpleNode.objects.filter(mptt_tree=root.mptt_tree).values_list("pk", flat=True)))
+        connection.close()
+
+        results = []
+        workers = [
+            threading.Thread(target=insert_nodes, args=(tree_nodes, operations, seed + index, results))
+            for index in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        duration = time.perf_counter() - started
+
+        broken = len(SimpleNode.objects.check_integrity())
+        print(f"{tree_count:>6} {threads:>8} {threads * operations / duration:>10.1f} {sum(results):>8} {broken:>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=50, help="inserts per thread")
+    parser.add_argument("--size", type=int, default=1000, help="initial count of nodes per tree")
+    parser.add_argument("--lock", choices=["row", "advisory", "none"], default="row")
+    parser.add_argument("--settings", default="tests.settings")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django(settings_module=args.settings)
+    from django.conf import settings
+    from django.db import connection
+    settings.MPTT2_TREE_LOCK = args.lock
+
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == "sqlite":
+            # threads can not share an in memory database; wait for the database lock instead of failing fast
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+            connection.settings_dict["OPTIONS"]["timeout"] = 30
+        with test_database():
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode=WAL")
+            run(trees=args.trees, threads=args.threads, operations=args.operations, size=args.size, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compares a sequential per tree rebuild and check of a forest with the parallel ``ForestExecutor``.
+
+The nested set values of all trees are corrupted before every rebuild, so every tree has to be rewritten. The
+sequential check is a single ``check_integrity`` call for the whole forest.
+
+SQLite runs against a file database in WAL mode. It allows only one writer at a time and transactions which read
+before they write fail with a locked database if another writer is active, so parallel rebuilds are reported as
+failed trees there. The speed-up of parallel rebuilds shows on PostgreSQL::
+
+    $ python -m benchmarks.forest --trees 2000 --size 100 --workers 2 4 8
+    $ python -m benchmarks.forest --trees 2000 --size 100 --workers 2 4 8 --settings my_postgres_settings
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.generators import balanced
+from benchmarks.utils import setup_django, test_database
+
+
+def build_forest(trees: int, size: int):
+    from mptt2.serialization import TreeImporter
+    from tests.models import SimpleNode
+
+    importer = TreeImporter(manager=SimpleNode.objects, batch_size=2000)
+    for _ in range(trees):
+        for depth in balanced(size):
+            importer.add({"depth": depth})
+    importer.finish()
+
+
+def corrupt():
+    from tests.models import SimpleNode
+    SimpleNode.objects.update(mptt_depth=0)
+
+
+def timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def run(trees: int, size: int, workers, processes: bool):
+    from mptt2.executor import ForestExecutor
+    from tests.models import SimpleNode
+
+    build_forest(trees, size)
+    print(f"{'mode':>16} {'rebuild s':>10} {'speed-up':>9} {'check s':>8} {'speed-up':>9}")
+
+    corrupt()
+    rebuild = timed(lambda: SimpleNode.objects.rebuild(per_tree=True))
+    check = timed(SimpleNode.objects.check_integrity)
+    print(f"{'sequential':>16} {rebuild:>10.2f} {1:>9.2f} {check:>8.2f} {1:>9.2f}")
+
+    for count in workers:
+        executor = ForestExecutor(SimpleNode.objects, workers=count, processes=processes)
+        corrupt()
+        results = []
+        parallel_rebuild = timed(lambda: results.extend(executor.rebuild()))
+        parallel_check = timed(executor.check)
+        failed = len([result for result in results if result.error])
+        mode = f"{count} {'processes' if processes else 'threads'}"
+        print(f"{mode:>16} {parallel_rebuild:>10.2f} {rebuild / parallel_rebuild:>9.2f} "
+              f"{parallel_check:>8.2f} {check / parallel_check:>9.2f}" + (f"  {failed} failed trees" if failed else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=100, help="count of nodes per tree")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--processes", action="store_true", help="use worker processes instead of threads")
+    parser.add_argument("--settings", default="tests.settings")
+    args = parser.parse_args()
+
+    setup_django(settings_module=args.settings)
+    from django.db import connection
+
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == "sqlite":
+            # the workers can not share an in memory database
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+            connection.settings_dict["OPTIONS"]["timeout"] = 30
+        with test_database():
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode=WAL")
+            run(trees=args.trees, size=args.size, workers=args.workers, processes=args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Generators for the preorder depth sequences of trees with different shapes.
+
+Every generator yields the depth of each node in preorder. The sequences are produced without building the tree
+in memory, so trees with millions of nodes can be streamed into the database with
+:class:`mptt2.serialization.TreeImporter`.
+"""
+import random
+from typing import Iterator
+
+
+def deep(size: int, seed: int = 0) -> Iterator[int]:
+    """a single chain of nodes; every node has exactly one child"""
+    yield from range(size)
+
+
+def wide(size: int, seed: int = 0) -> Iterator[int]:
+    """a root node with all other nodes as children"""
+    if size:
+        yield 0
+    for _ in range(size - 1):
+        yield 1
+
+
+def balanced(size: int, seed: int = 0, children_per_node: int = 10) -> Iterator[int]:
+    """a complete tree where every inner node has ``children_per_node`` children, filled level by level"""
+    if not size:
+        return
+    # the children of the node with index i have the indexes i * n + 1 ... i * n + n in level order
+    stack = [(0, 0)]
+    while stack:
+        index, depth = stack.pop()
+        yield depth
+        first = index * children_per_node + 1
+        for child in reversed(range(first, min(first + children_per_node, size))):
+            stack.append((child, depth + 1))
+
+
+def random_tree(size: int, seed: int = 0) -> Iterator[int]:
+    """every node is appended below a random node of the rightmost path of the tree built so far"""
+    rng = random.Random(seed)
+    depth = 0
+    if size:
+        yield depth
+    for _ in range(size - 1):
+        depth = rng.randint(1, depth + 1)
+        yield depth
+
+
+SHAPES = {
+    "deep": deep,
+    "wide": wide,
+    "balanced": balanced,
+    "random": random_tree,
+}
+
+
+def build_tree(model, shape: str, size: int, seed: int = 0, batch_size: int = 2000):
+    """Streams a new tree of the given shape into the database and returns its root node."""
+    from mptt2.serialization import TreeImporter
+
+    importer = TreeImporter(manager=model.objects, batch_size=batch_size)
+    for depth in SHAPES[shape](size, seed=seed):
+        importer.add({"depth": depth})
+    importer.finish()
+    return model.objects.get(mptt_tree_id=importer.tree_ids[0], mptt_parent__isnull=True)
@@ -0,0 +1,59 @@
+"""Measures the rows which are touched by ``TreeManager.move_node`` and the latency of a move against the tree size.
+
+Usage::
+
+    $ python -m benchmarks.move --sizes 1000 10000 100000 --moves 50
+
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.utils import build_balanced_tree, capture_statements, setup_django, test_database
+
+
+def run(sizes, moves: int, seed: int):
+    from django.db.models import F
+
+    from mptt2.enums import Position
+    from tests.models import SimpleNode
+
+    random.seed(seed)
+    print(f"{'nodes':>10} {'rows/move':>10} {'max rows':>10} {'ms/move':>10}")
+    for size in sizes:
+        SimpleNode.objects.all()._raw_delete(SimpleNode.objects.db)
+        root = build_balanced_tree(SimpleNode, size)
+        leafs = list(SimpleNode.objects.filter(
+            mptt_tree=root.mptt_tree, mptt_rgt=F("mptt_lft") + 1).values_list("pk", flat=True))
+
+        rows = []
+        durations = []
+        for _ in range(moves):
+            node = SimpleNode.objects.get(pk=random.choice(leafs))
+            target = SimpleNode.objects.get(pk=random.choice(leafs))
+            if node == target:
+                continue
+            with capture_statements() as statements:
+                started = time.perf_counter()
+                SimpleNode.objects.move_node(node=node, target=target, position=Position.RIGHT)
+                durations.append(time.perf_counter() - started)
+            rows.append(sum(statement["rowcount"] for statement in statements if statement["sql"].startswith("UPDATE")))
+
+        print(f"{size:>10} {statistics.mean(rows):>10.1f} {max(rows):>10} {statistics.mean(durations) * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--moves", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(sizes=args.sizes, moves=args.moves, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Times the tree operations on trees of different shapes and sizes and writes the results as json.
+
+For every shape and size a new tree is generated. Then the queries, inserts at every position, moves of the
+inserted nodes, deletes of the moved nodes and the admin changelist are timed, so the tree has its initial size
+again after each round. Run it against SQLite or pass a settings module for a local PostgreSQL::
+
+    $ python -m benchmarks.operations --shapes balanced random --sizes 1000 10000 --output before.json
+    $ python -m benchmarks.operations --sizes 1000 10000 --settings my_postgres_settings --output postgres.json
+
+Two result files can be compared with ``benchmarks.compare``.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.generators import SHAPES, build_tree
+from benchmarks.utils import capture_statements, setup_django, test_database
+
+
+def measure(operation: Callable, prepare: Callable = None) -> Dict:
+    """runs the operation with the value returned by prepare and returns its duration and query count"""
+    argument = prepare() if prepare else None
+    with capture_statements() as statements:
+        started = time.perf_counter()
+        operation(argument)
+        duration = time.perf_counter() - started
+    return {"duration": duration, "queries": len(statements)}
+
+
+def summarize(shape: str, size: int, operation: str, measurements: List[Dict]) -> Dict:
+    durations = [measurement["duration"] * 1000 for measurement in measurements]
+    return {
+        "shape": shape,
+        "size": size,
+        "operation": operation,
+        "runs": len(durations),
+        "mean_ms": statistics.mean(durations),
+        "median_ms": statistics.median(durations),
+        "min_ms": min(durations),
+        "max_ms": max(durations),
+        "queries": statistics.mean(measurement["queries"] for measurement in measurements),
+    }
+
+
+def run_round(shape: str, size: int, repeat: int, rng: random.Random, client) -> List[Dict]:
+    from mptt2.enums import Position
+    from tests.models import SimpleNode
+
+    root = build_tree(SimpleNode, shape, size, seed=rng.randrange(2 ** 32))
+    pks = list(SimpleNode.objects.filter(mptt_tree=root.mptt_tree).values_list("pk", flat=True))
+    non_root_pks = [pk for pk in pks if pk != root.pk] or pks
+
+    def random_node(candidates=pks):
+        return lambda: SimpleNode.objects.get(pk=rng.choice(candidates))
+
+    results = []
+
+    def record(operation: str, measurements: List[Dict]):
+        results.append(summarize(shape, size, operation, measurements))
+
+    for name, query in [
+        ("get_descendants", lambda node: list(node.get_descendants())),
+        ("get_ancestors", lambda node: list(node.get_ancestors())),
+        ("get_siblings", lambda node: list(node.get_siblings())),
+    ]:
+        record(name, [measure(query, random_node()) for _ in range(repeat)])
+
+    inserted = []
+    for position in Position:
+        candidates = pks if position in [Position.LAST_CHILD, Position.FIRST_CHILD] else non_root_pks
+        record(f"insert:{position.value}", [
+            measure(
+                lambda target: inserted.append(
+                    SimpleNode.objects.insert_node(SimpleNode(), target=target, position=position).pk),
+                random_node(candidates)
+            )
+            for _ in range(repeat)
+        ])
+
+    # the inserted nodes are leafs, so every original node is a valid target
+    record("move", [
+        measure(
+            lambda nodes: SimpleNode.objects.move_node(node=nodes[0], target=nodes[1]),
+            lambda: (SimpleNode.objects.get(pk=inserted[index]), SimpleNode.objects.get(pk=rng.choice(pks)))
+        )
+        for index in range(repeat)
+    ])
+    record("delete", [
+        measure(lambda node: node.delete(), lambda: SimpleNode.objects.get(pk=pk))
+        for pk in inserted
+    ])
+
+    record("admin_changelist", [
+        measure(lambda _: client.get("/admin/tests/simplenode/").content) for _ in range(repeat)
+    ])
+    return results
+
+
+def run(shapes: List[str], sizes: List[int], repeat: int, seed: int) -> List[Dict]:
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from tests.models import SimpleNode
+
+    client = Client()
+    client.force_login(get_user_model().objects.create_superuser("benchmark", "benchmark@example.com", "benchmark"))
+    rng = random.Random(seed)
+    results = []
+    print(f"{'shape':>9} {'nodes':>8} {'operation':>18} {'median ms':>10} {'max ms':>10} {'queries':>8}",
+          file=sys.stderr)
+    for shape in shapes:
+        for size in sizes:
+            SimpleNode.objects.all()._raw_delete(SimpleNode.objects.db)
+            for result in run_round(shape, size, repeat, rng, client):
+                print(f"{shape:>9} {size:>8} {result['operation']:>18} {result['median_ms']:>10.2f} "
+                      f"{result['max_ms']:>10.2f} {result['queries']:>8.1f}", file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--settings", default="tests.settings")
+    parser.add_argument("--output", "-o", help="file to write the json results to. (Default: stdout)")
+    args = parser.parse_args()
+
+    setup_django(settings_module=args.settings)
+    import django
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    with test_database():
+        results = run(shapes=args.shapes, sizes=args.sizes, repeat=args.repeat, seed=args.seed)
+        database = f"{connection.display_name} {'.'.join(map(str, connection.get_database_version()))}"
+
+    document = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "database": database,
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump(document, stream, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
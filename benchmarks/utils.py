@@ -0,0 +1,51 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def setup_django(settings_module: str = "tests.settings"):
+    """configures django with the settings of the tests app"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """creates the test databases and destroys them afterwards"""
+    from django.test.utils import setup_databases, teardown_databases
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+@contextmanager
+def capture_statements():
+    """Collects every executed sql statement of the default connection with its duration and affected rows."""
+    from django.db import connection
+    statements: List[Dict] = []
+
+    def collect(execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        statements.append({
+            "sql": sql,
+            "rowcount": context["cursor"].rowcount,
+            "duration": time.perf_counter() - started,
+        })
+        return result
+
+    with connection.execute_wrapper(collect):
+        yield statements
+
+
+def build_balanced_tree(model, size: int, children_per_node: int = 10):
+    """Inserts a new balanced tree with the given count of nodes and returns the root node."""
+    nodes = [model()]
+    for index in range(1, size):
+        nodes.append(model(mptt_parent=nodes[(index - 1) // children_per_node]))
+    model.objects.bulk_insert_tree(nodes, batch_size=2000)
+    return nodes[0]
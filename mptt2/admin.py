@@ -1,7 +1,6 @@
 from django.contrib.admin.options import ModelAdmin
 from django.forms.fields import ChoiceField
 from django.forms.models import ModelChoiceField, ModelForm
-from django.http.request import HttpRequest
 from django.urls.conf import path
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext_lazy as _
@@ -119,13 +118,6 @@ class MPTTModelAdmin(ModelAdmin):
         return mark_safe(f"{level_string}&#x2022; {obj}")
    
 
-    def get_actions(self, request: HttpRequest):
-        actions = super().get_actions(request)
-        if "delete_selected" in actions:
-            # queryset.delete() is not implemented for now.
-            del actions["delete_selected"]
-        return actions
-
     def get_list_display(self, request):
         """
         Return a sequence containing the fields to be displayed on the
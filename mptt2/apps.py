@@ -5,3 +5,24 @@ class MpttConfig(AppConfig):
     name = "mptt2"
     verbose_name = "mptt2"
     default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        from django.apps import apps
+        from django.conf import settings
+        from django.db.models import ForeignKey
+
+        from mptt2.lookups import AncestorOf, DescendantOf, InSubtreeOf
+        from mptt2.models import Node
+
+        # only the foreign keys to node models get the tree lookups
+        for model in apps.get_models():
+            for field in model._meta.local_fields:
+                if isinstance(field, ForeignKey) and issubclass(field.related_model, Node):
+                    field.register_lookup(DescendantOf)
+                    field.register_lookup(AncestorOf)
+                    field.register_lookup(InSubtreeOf)
+
+        if getattr(settings, "MPTT2_SLOW_OPERATION_THRESHOLD", None) is not None:
+            from mptt2.instrumentation import log_slow_operation
+            from mptt2.signals import tree_operation
+            tree_operation.connect(log_slow_operation, dispatch_uid="mptt2_log_slow_operation")
@@ -20,3 +20,24 @@ class Position(TextChoices):
     """the node shall be the right sibling of the target"""
 
 
+class TreeEvent(TextChoices):
+    """Structural events which are yielded by :meth:`mptt2.query.TreeQuerySet.iter_tree`"""
+
+    ENTER: Tuple[str, str] = "enter", _("Enter")
+    """the subtree of the node starts; it is yielded before any of its descendants"""
+
+    LEAVE: Tuple[str, str] = "leave", _("Leave")
+    """the subtree of the node ends; it is yielded after all of its descendants"""
+
+
+class TreeOperation(TextChoices):
+    """Structural operations which are reported by the :data:`mptt2.signals.tree_operation` signal"""
+
+    INSERT: Tuple[str, str] = "insert", _("Insert")
+    """a node was inserted by :meth:`mptt2.managers.TreeManager.insert_node`"""
+
+    MOVE: Tuple[str, str] = "move", _("Move")
+    """a subtree was moved by :meth:`mptt2.managers.TreeManager.move_node`"""
+
+    DELETE: Tuple[str, str] = "delete", _("Delete")
+    """a subtree was deleted by :meth:`mptt2.models.Node.delete`"""
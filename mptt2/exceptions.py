@@ -14,4 +14,11 @@ class InvalidInsert(Exception):
 
 class MethodNotAllowed(Exception):
     """The requested method is not allowed"""
-    pass
\ No newline at end of file
+    pass
+
+
+class TreeEditInProgress(Exception):
+    """The nested set values of a tree are stale, cause a tree edit session is active.
+    For example, querying the descendants of a node inside :class:`mptt2.session.TreeEditSession`.
+    """
+    pass
@@ -0,0 +1,157 @@
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.apps import apps
+from django.db import connections
+
+
+class TreeResult:
+    """The outcome of an operation on a single tree.
+
+    ``value`` holds the result of the operation, like the count of changed nodes of a rebuild or the violations of
+    a check. ``error`` holds the message of the exception if the operation on the tree failed.
+    """
+
+    def __init__(self, tree_id: int, value=None, error: Optional[str] = None) -> None:
+        self.tree_id = tree_id
+        self.value = value
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"<TreeResult tree={self.tree_id} value={self.value!r} error={self.error!r}>"
+
+
+def _setup_process(database_names: Dict[str, str]):
+    # spawned workers start with a fresh interpreter; they use the same databases as the parent, even if those were
+    # switched at runtime like test databases
+    import django
+    django.setup()
+    for alias, name in database_names.items():
+        connections[alias].settings_dict["NAME"] = name
+
+
+def _run_partition(model_label: str, using: str, operation: str, tree_ids: List[int], batch_size: int) -> List[TreeResult]:
+    manager = apps.get_model(model_label)._default_manager.db_manager(using)
+    results = []
+    try:
+        if operation == "check":
+            try:
+                report = manager._check_queryset(manager.model._base_manager.using(using).filter(mptt_tree_id__in=tree_ids))
+            except Exception as error:
+                return [TreeResult(tree_id, error=str(error)) for tree_id in tree_ids]
+            return [TreeResult(tree_id, value=report.get(tree_id, {})) for tree_id in tree_ids]
+
+        for tree_id in tree_ids:
+            try:
+                results.append(TreeResult(tree_id, value=manager._rebuild_tree(tree_id, batch_size=batch_size)))
+            except Exception as error:
+                # the transaction of this tree is rolled back; the other trees are not affected
+                results.append(TreeResult(tree_id, error=str(error)))
+        return results
+    finally:
+        # every worker uses its own connection
+        connections[using].close()
+
+
+class ForestExecutor:
+    """Runs rebuilds or checks of many independent trees in parallel.
+
+    The tree ids are split into partitions, which are processed by a pool of worker threads or processes. Every
+    worker uses its own database connection and every tree is rebuilt in its own transaction, so a failing tree
+    doesn't affect the others.
+
+    .. code-block:: python
+
+       executor = ForestExecutor(Genre.objects, workers=8, progress=print)
+       failed = [result for result in executor.rebuild() if result.error]
+
+    :param manager: The tree manager of the node model
+    :type manager: :class:`mptt2.managers.TreeManager`
+
+    :param workers: The count of parallel workers. (Default: ``4``)
+    :type workers: int, optional
+
+    :param processes: switch to use worker processes instead of threads. The processes are spawned and set up
+                      django on their own. (Default: ``False``)
+    :type processes: bool, optional
+
+    :param partition_size: The count of trees which are handed to a worker at once. (Default: ``100``)
+    :type partition_size: int, optional
+
+    :param progress: Callable which is called with every :class:`TreeResult` as soon as its partition is done.
+    :type progress: Callable, optional
+    """
+
+    def __init__(self,
+                 manager,
+                 workers: int = 4,
+                 processes: bool = False,
+                 partition_size: int = 100,
+                 progress: Callable[[TreeResult], None] = None) -> None:
+        self.manager = manager
+        self.workers = workers
+        self.processes = processes
+        self.partition_size = partition_size
+        self.progress = progress
+
+    def _iter_partitions(self) -> Iterator[List[int]]:
+        partition: List[int] = []
+        for tree_id in self.manager._iter_rebuild_trees(chunk_size=self.partition_size):
+            partition.append(tree_id)
+            if len(partition) == self.partition_size:
+                yield partition
+                partition = []
+        if partition:
+            yield partition
+
+    def _create_pool(self):
+        if self.processes:
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_setup_process,
+                initargs=({alias: connections[alias].settings_dict["NAME"] for alias in connections},)
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mptt2")
+
+    def _run(self, operation: str, batch_size: int = 1000) -> List[TreeResult]:
+        results: List[TreeResult] = []
+        label, using = self.manager.model._meta.label, self.manager.db
+
+        def collect(futures):
+            for future in futures:
+                for result in future.result():
+                    results.append(result)
+                    if self.progress:
+                        self.progress(result)
+
+        with self._create_pool() as pool:
+            pending = set()
+            for partition in self._iter_partitions():
+                # only a few partitions are queued, so the tree ids of a huge forest are not held in memory at once
+                if len(pending) >= 2 * self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(pool.submit(_run_partition, label, using, operation, partition, batch_size))
+            collect(wait(pending).done)
+        return results
+
+    def rebuild(self, batch_size: int = 1000) -> List[TreeResult]:
+        """Rebuilds every tree in its own transaction like :meth:`mptt2.managers.TreeManager.rebuild` with
+        ``per_tree=True``. The value of each result is the count of changed nodes.
+
+        :param batch_size: The count of rows which are fetched and updated in a single query. (Default: ``1000``)
+        :type batch_size: int, optional
+
+        :rtype: List[:class:`TreeResult`]
+        """
+        return self._run("rebuild", batch_size=batch_size)
+
+    def check(self) -> List[TreeResult]:
+        """Checks the trees like :meth:`mptt2.managers.TreeManager.check_integrity`. The value of each result is the
+        mapping of the violations of the tree, which is empty for consistent trees.
+
+        :rtype: List[:class:`TreeResult`]
+        """
+        return self._run("check")
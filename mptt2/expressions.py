@@ -1,4 +1,7 @@
-from django.db.models import F
+from django.db.models import (BooleanField, Count, Expression,
+                              ExpressionWrapper, F, IntegerField, OuterRef,
+                              PositiveIntegerField, Q, Subquery)
+from django.db.models.functions import Coalesce
 
 
 class Depth(F):
@@ -20,3 +23,63 @@ class Right(F):
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(name="mptt_rgt", *args,  **kwargs)
+
+
+class TreeExpression(Expression):
+    """Base class for tree expressions which are built for the model of the query they are used in"""
+
+    def as_expression(self, model) -> Expression:
+        raise NotImplementedError
+
+    def resolve_expression(self, query=None, *args, **kwargs):
+        return self.as_expression(query.model).resolve_expression(query, *args, **kwargs)
+
+
+class SubtreeWidth(TreeExpression):
+    """Expression for the width of the left and right values which are used by the subtree of a node"""
+
+    def as_expression(self, model) -> Expression:
+        return ExpressionWrapper(Right() - Left() + 1, output_field=PositiveIntegerField())
+
+
+class IsLeaf(TreeExpression):
+    """Expression which is true for leaf nodes. Leaf nodes have ``rgt = lft + 1`` in both numbering modes."""
+
+    def as_expression(self, model) -> Expression:
+        return ExpressionWrapper(Q(mptt_rgt=Left() + 1), output_field=BooleanField())
+
+
+class DescendantCount(TreeExpression):
+    """Expression for the count of descendants of a node.
+
+    Densely numbered trees calculate it from the left and right values. In sparse numbering mode the values don't
+    tell the count, so a correlated subquery counts the descendants.
+    """
+
+    def as_expression(self, model) -> Expression:
+        if not model.mptt_gap:
+            return ExpressionWrapper((Right() - Left() - 1) / 2, output_field=IntegerField())
+        return Coalesce(
+            Subquery(
+                model._base_manager.filter(
+                    mptt_tree=OuterRef("mptt_tree"),
+                    mptt_lft__gt=OuterRef("mptt_lft"),
+                    mptt_lft__lt=OuterRef("mptt_rgt")
+                ).order_by().values("mptt_tree").annotate(count=Count("pk")).values("count")
+            ),
+            0
+        )
+
+
+class ChildCount(TreeExpression):
+    """Expression for the count of children of a node, which is counted by a correlated subquery"""
+
+    def as_expression(self, model) -> Expression:
+        return Coalesce(
+            Subquery(
+                model._base_manager.filter(
+                    mptt_parent=OuterRef("pk")
+                ).order_by().values("mptt_parent").annotate(count=Count("pk")).values("count")
+            ),
+            0
+        )
@@ -0,0 +1,104 @@
+import weakref
+from asyncio import iscoroutinefunction
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional
+
+from django.utils.decorators import sync_and_async_middleware
+
+
+_active_identity_map: ContextVar[Optional["NodeIdentityMap"]] = ContextVar("mptt2_identity_map", default=None)
+
+_MPTT_ATTNAMES = {"mptt_tree_id", "mptt_lft", "mptt_rgt", "mptt_depth"}
+
+
+def get_identity_map() -> Optional["NodeIdentityMap"]:
+    """returns the active identity map or None"""
+    return _active_identity_map.get()
+
+
+def tracked_nodes(model, tree_id: Optional[int], nodes: Iterable = ()) -> List:
+    """returns the given nodes and the registered instances of the tree, every instance only once
+
+    :param tree_id: The id of the tree. ``None`` returns the registered instances of all trees.
+    :type tree_id: int
+    """
+    instances = {id(node): node for node in nodes if node is not None}
+    identity_map = _active_identity_map.get()
+    if identity_map is not None:
+        for instance in identity_map.instances(model):
+            if tree_id is None or instance.mptt_tree_id == tree_id:
+                instances.setdefault(id(instance), instance)
+    return list(instances.values())
+
+
+def tracked_nodes_by_pk(model) -> Dict:
+    """returns the registered instances of the model grouped by there primary key"""
+    identity_map = _active_identity_map.get()
+    instances: Dict = {}
+    if identity_map is not None:
+        for instance in identity_map.instances(model):
+            instances.setdefault(instance.pk, []).append(instance)
+    return instances
+
+
+class NodeIdentityMap:
+    """Context manager which keeps the loaded node instances consistent with the structural writes.
+
+    Every node which is loaded from the database inside the context is registered with a weak reference. After
+    ``insert_node``, ``move_node``, ``Node.delete``, ``TreeQuerySet.delete``, tree edit sessions and rebuilds, the
+    same shift of the left, right and depth values is applied in python to the registered instances of the changed
+    trees. So they don't need to be refreshed from the database.
+
+    .. code-block:: python
+
+       with NodeIdentityMap():
+           rock, jazz = Genre.objects.filter(pk__in=[1, 2])
+           Genre.objects.insert_node(Genre(name="Punk"), target=rock)
+           jazz.move_to(target=rock)  # jazz has the values of after the insert
+
+    Use :func:`identity_map_middleware` to activate one identity map per request. Changes by other transactions are
+    not applied, and the values are not reset if the transaction of a write is rolled back.
+    """
+
+    def __init__(self) -> None:
+        self._instances: Dict[str, Dict[int, weakref.ref]] = {}
+
+    def __enter__(self):
+        self._token = _active_identity_map.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active_identity_map.reset(self._token)
+        self._instances.clear()
+
+    def register(self, node):
+        """registers the given node instance and returns it"""
+        instances = self._instances.setdefault(node._meta.concrete_model._meta.label, {})
+        key = id(node)
+        instances[key] = weakref.ref(node, lambda _reference: instances.pop(key, None))
+        return node
+
+    def instances(self, model) -> List:
+        """returns the living registered instances of the given model"""
+        references = self._instances.get(model._meta.concrete_model._meta.label, {})
+        return [instance for instance in (reference() for reference in list(references.values()))
+                if instance is not None]
+
+    def register_loaded(self, node, field_names: Iterable[str]):
+        """registers a node which is loaded from the database, if none of its nested set values is deferred"""
+        if _MPTT_ATTNAMES.issubset(field_names):
+            self.register(node)
+
+
+@sync_and_async_middleware
+def identity_map_middleware(get_response):
+    """Activates a :class:`NodeIdentityMap` for every request"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with NodeIdentityMap():
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with NodeIdentityMap():
+                return get_response(request)
+    return middleware
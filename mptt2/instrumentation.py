@@ -0,0 +1,87 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from mptt2.enums import Position, TreeOperation
+from mptt2.signals import tree_operation
+
+
+logger = logging.getLogger("mptt2")
+
+
+class TreeOperationRecord:
+    """Measurements of a single structural operation"""
+
+    def __init__(self,
+                 model,
+                 operation: TreeOperation,
+                 tree_id: Optional[int],
+                 position: Optional[Position] = None,
+                 subtree_width: Optional[int] = None) -> None:
+        self.model = model
+        self.operation = operation
+        self.tree_id = tree_id
+        self.position = position
+        self.subtree_width = subtree_width
+        # the count of rows of each executed UPDATE statement of the node table
+        self.rows: List[int] = []
+        self.query_count = 0
+        self.duration = 0.0
+
+    def __repr__(self) -> str:
+        return (f"<TreeOperationRecord {self.operation} {self.model._meta.label} tree={self.tree_id} "
+                f"queries={self.query_count} rows={sum(self.rows)} duration={self.duration:.4f}s>")
+
+
+@contextmanager
+def instrument(model,
+               using: str,
+               operation: TreeOperation,
+               tree_id: Optional[int],
+               position: Optional[Position] = None,
+               subtree_width: Optional[int] = None):
+    """Measures the wrapped operation and sends the :data:`mptt2.signals.tree_operation` signal after it succeeded.
+
+    If there is no receiver for the model, the operation is not measured at all and ``None`` is yielded.
+    """
+    if not tree_operation.has_listeners(sender=model):
+        yield None
+        return
+
+    record = TreeOperationRecord(
+        model=model, operation=operation, tree_id=tree_id, position=position, subtree_width=subtree_width)
+
+    # updates of other tables, like the version of the tree, are not counted as shifted rows
+    node_update = f"UPDATE {connections[using].ops.quote_name(model._meta.db_table)} "
+
+    def count_queries(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        record.query_count += 1
+        if sql.lstrip().startswith(node_update):
+            record.rows.append(context["cursor"].rowcount)
+        return result
+
+    started = time.perf_counter()
+    with connections[using].execute_wrapper(count_queries):
+        yield record
+    record.duration = time.perf_counter() - started
+    tree_operation.send(sender=model, record=record)
+
+
+def log_slow_operation(sender, record: TreeOperationRecord, **kwargs):
+    """Receiver which logs operations that took longer than ``MPTT2_SLOW_OPERATION_THRESHOLD`` seconds.
+
+    It is connected on startup if the setting is configured.
+    """
+    threshold = getattr(settings, "MPTT2_SLOW_OPERATION_THRESHOLD", None)
+    if threshold is None or record.duration < threshold:
+        return
+    logger.warning(
+        "slow %s of %s in tree %s: %.3fs, %d queries, %d rows updated (position: %s, subtree width: %s)",
+        record.operation, record.model._meta.label, record.tree_id, record.duration, record.query_count,
+        sum(record.rows), record.position, record.subtree_width
+    )
@@ -0,0 +1,76 @@
+from functools import reduce
+from operator import or_
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Lookup, Q
+from django.utils.translation import gettext as _
+
+from mptt2.exceptions import TreeEditInProgress
+from mptt2.query import descendant_ranges
+from mptt2.session import get_tree_edit_session
+
+
+class TreeLookup(Lookup):
+    """Base class for lookups on foreign keys to :class:`mptt2.models.Node` models.
+
+    The lookups are registered on the foreign keys to node models by :class:`mptt2.apps.MpttConfig`.
+
+    A lookup can't add a join to the query, django compiles it after the joins of the query. So the foreign key
+    column is compared with an uncorrelated subquery on the range of the nested set values of the related nodes:
+    ``fk IN (SELECT id FROM node WHERE mptt_tree_id = ... AND mptt_lft ...)``. How it performs compared to a join
+    depends on the query planner of the database. To filter by the columns of the joined node row instead, use the
+    nested set fields of the foreign key, like ``filter(fk__mptt_tree_id=..., fk__mptt_lft__gt=...,
+    fk__mptt_lft__lt=...)``.
+    """
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        if hasattr(self.rhs, "as_sql"):
+            # querysets are resolved to subqueries before, but the values of the nodes are needed to build the ranges
+            raise TypeError(_("The %s lookup needs node instances. Use a list of the nodes instead of a queryset.") % self.lookup_name)
+        for node in [self.rhs] if hasattr(self.rhs, "mptt_lft") else self.rhs:
+            if get_tree_edit_session(node.__class__, node.mptt_tree_id):
+                raise TreeEditInProgress(
+                    _("The nested set values of this tree are stale until the active tree edit session ends."))
+        return self.rhs
+
+    def get_node_filter(self) -> Optional[Q]:
+        raise NotImplementedError
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        node_filter = self.get_node_filter()
+        nodes = self.lhs.output_field.related_model._base_manager.using(compiler.using)
+        nodes = nodes.filter(node_filter) if node_filter is not None else nodes.none()
+        # an empty subquery raises EmptyResultSet, which lets the outer where node match nothing
+        rhs_sql, rhs_params = compiler.compile(nodes.order_by().values("pk").query.resolve_expression(compiler.query))
+        return f"{lhs_sql} IN {rhs_sql}", (*lhs_params, *rhs_params)
+
+
+class DescendantOf(TreeLookup):
+    """``fk__descendant_of=node`` matches the rows which point to a descendant of the given node"""
+    lookup_name = "descendant_of"
+
+    def get_node_filter(self) -> Q:
+        return Q(mptt_tree_id=self.rhs.mptt_tree_id, mptt_lft__gt=self.rhs.mptt_lft, mptt_lft__lt=self.rhs.mptt_rgt)
+
+
+class AncestorOf(TreeLookup):
+    """``fk__ancestor_of=node`` matches the rows which point to an ancestor of the given node"""
+    lookup_name = "ancestor_of"
+
+    def get_node_filter(self) -> Q:
+        return Q(mptt_tree_id=self.rhs.mptt_tree_id, mptt_lft__lt=self.rhs.mptt_lft, mptt_rgt__gt=self.rhs.mptt_rgt)
+
+
+class InSubtreeOf(TreeLookup):
+    """``fk__in_subtree_of=[nodes]`` matches the rows which point to one of the given nodes or there descendants"""
+    lookup_name = "in_subtree_of"
+
+    def get_node_filter(self) -> Optional[Q]:
+        nodes = [self.rhs] if hasattr(self.rhs, "mptt_lft") else self.rhs
+        bounds: Dict[int, List[Tuple[int, int]]] = {}
+        for node in sorted(nodes, key=lambda node: (node.mptt_tree_id, node.mptt_lft)):
+            bounds.setdefault(node.mptt_tree_id, []).append((node.mptt_lft, node.mptt_rgt))
+        ranges = descendant_ranges(bounds, include_self=True)
+        return reduce(or_, ranges) if ranges else None
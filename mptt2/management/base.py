@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import gettext as _
+
+from mptt2.models import Node
+
+
+class TreeModelCommand(BaseCommand):
+    """Base command for commands which work on the nodes of a concrete :class:`mptt2.models.Node` model."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", help="The node model as app_label.ModelName")
+
+    def get_model(self, label: str):
+        try:
+            model = apps.get_model(label)
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+        if not issubclass(model, Node):
+            raise CommandError(_("%s is not a mptt2 node model.") % label)
+        return model
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import CommandError
+
+from mptt2.executor import ForestExecutor
+from mptt2.management.base import TreeModelCommand
+
+
+class Command(TreeModelCommand):
+    help = "Checks the nested set values of a node model and reports the violations per tree."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--tree", type=int, help="Only check the tree with the given id")
+        parser.add_argument("--json", action="store_true",
+                            help="Write the report as json object to stdout")
+        parser.add_argument("--workers", type=int,
+                            help="Check the trees in parallel with the given count of workers")
+        parser.add_argument("--processes", action="store_true",
+                            help="Use worker processes instead of threads")
+
+    def check_parallel(self, model, options):
+        results = ForestExecutor(
+            model._default_manager, workers=options["workers"], processes=options["processes"]).check()
+        for result in results:
+            if result.error:
+                raise CommandError(f"tree {result.tree_id} could not be checked: {result.error}")
+        return {result.tree_id: result.value for result in results if result.value}
+
+    def handle(self, *args, **options):
+        model = self.get_model(options["model"])
+        if options["workers"] and options["tree"] is None:
+            report = self.check_parallel(model, options)
+        else:
+            report = model._default_manager.check_integrity(tree=options["tree"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+        else:
+            for tree_id, violations in report.items():
+                self.stdout.write(
+                    f"tree {tree_id}: " + ", ".join(f"{kind} {count}" for kind, count in violations.items() if count))
+
+        if report:
+            raise CommandError(f"{len(report)} trees of {model._meta.label} are inconsistent.")
+        if not options["json"]:
+            self.stdout.write(f"All trees of {model._meta.label} are consistent.")
@@ -0,0 +1,30 @@
+from mptt2.management.base import TreeModelCommand
+from mptt2.serialization import iter_records, write_ndjson, write_nested_json
+
+
+class Command(TreeModelCommand):
+    help = "Streams the trees of a node model as nested json or ndjson records in preorder."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--tree", type=int, nargs="+", help="Only export the trees with the given ids")
+        parser.add_argument("--format", choices=["ndjson", "json"], default="ndjson")
+        parser.add_argument("--output", "-o", help="Write the export to this file instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000,
+                            help="The count of rows which are fetched from the cursor at once")
+
+    def handle(self, *args, **options):
+        model = self.get_model(options["model"])
+        queryset = model._default_manager.all()
+        if options["tree"]:
+            queryset = queryset.filter(mptt_tree_id__in=options["tree"])
+
+        records = iter_records(queryset, chunk_size=options["chunk_size"])
+        write = write_nested_json if options["format"] == "json" else write_ndjson
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                write(records, stream)
+        else:
+            # the records are written in pieces; the wrapper shall not end each of them with a line break
+            self.stdout.ending = ""
+            write(records, self.stdout)
@@ -0,0 +1,40 @@
+import json
+import sys
+
+from django.core.management.base import CommandError
+
+from mptt2.management.base import TreeModelCommand
+from mptt2.serialization import import_records, iter_nested_json_records
+
+
+class Command(TreeModelCommand):
+    help = "Imports nested json or ndjson records in preorder as new trees of a node model."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("input", help="The file to import or - to read from stdin")
+        parser.add_argument("--format", choices=["ndjson", "json"], default="ndjson",
+                            help="ndjson is read line by line; nested json is parsed incrementally")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="The count of rows which are written with a single query")
+
+    def iter_ndjson(self, stream):
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+    def handle(self, *args, **options):
+        model = self.get_model(options["model"])
+        stream = sys.stdin if options["input"] == "-" else open(options["input"])
+        try:
+            if options["format"] == "json":
+                records = iter_nested_json_records(stream)
+            else:
+                records = self.iter_ndjson(stream)
+            count = import_records(model._default_manager, records, batch_size=options["batch_size"])
+        except (ValueError, KeyError) as error:
+            raise CommandError(error)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(f"{count} nodes of {model._meta.label} imported.")
@@ -0,0 +1,48 @@
+from django.core.management.base import CommandError
+
+from mptt2.executor import ForestExecutor
+from mptt2.management.base import TreeModelCommand
+
+
+class Command(TreeModelCommand):
+    help = "Recalculates the nested set values of a node model from the parent pointers."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--tree", type=int, help="Only rebuild the tree with the given id")
+        parser.add_argument("--per-tree", action="store_true",
+                            help="Rebuild every tree in its own transaction")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="The count of rows which are fetched and updated in a single query")
+        parser.add_argument("--workers", type=int,
+                            help="Rebuild the trees in parallel with the given count of workers. Implies --per-tree")
+        parser.add_argument("--processes", action="store_true",
+                            help="Use worker processes instead of threads")
+
+    def handle(self, *args, **options):
+        model = self.get_model(options["model"])
+        if options["workers"] and options["tree"] is None:
+            return self.rebuild_parallel(model, options)
+        try:
+            updated = model._default_manager.rebuild(
+                tree=options["tree"], per_tree=options["per_tree"], batch_size=options["batch_size"])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(f"{updated} nodes of {model._meta.label} updated.")
+
+    def rebuild_parallel(self, model, options):
+        def progress(result):
+            if result.error:
+                self.stderr.write(f"tree {result.tree_id}: {result.error}")
+            elif options["verbosity"] > 1:
+                self.stdout.write(f"tree {result.tree_id}: {result.value} nodes updated")
+
+        results = ForestExecutor(
+            model._default_manager, workers=options["workers"], processes=options["processes"], progress=progress
+        ).rebuild(batch_size=options["batch_size"])
+
+        updated = sum(result.value for result in results if not result.error)
+        self.stdout.write(f"{updated} nodes of {model._meta.label} updated.")
+        failed = [result for result in results if result.error]
+        if failed:
+            raise CommandError(f"{len(failed)} trees of {model._meta.label} could not be rebuilt.")
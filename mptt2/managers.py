@@ -1,17 +1,36 @@
-from typing import Dict, Tuple
+import hashlib
+from array import array
+from typing import Dict, Iterable, List, Tuple
 
-from django.db.models import Case, Q, When
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import Case, Count, Exists, F, Max, Min, OuterRef, Q, QuerySet, When, Window
+from django.db.models.functions import Lag
 from django.db.models.fields import PositiveIntegerField
 from django.db.models.manager import Manager
-from django.db.transaction import atomic
+from django.db.transaction import atomic, on_commit
 from django.utils.translation import gettext as _
 
-from mptt2.enums import Position
-from mptt2.exceptions import InvalidInsert, InvalidMove
-from mptt2.expressions import Depth, Left, Right
+from mptt2.enums import Position, TreeOperation
+from mptt2.exceptions import InvalidInsert, InvalidMove, TreeEditInProgress
+from mptt2.expressions import DescendantCount, Depth, Left, Right
+from mptt2.identity import get_identity_map, tracked_nodes, tracked_nodes_by_pk
+from mptt2.instrumentation import instrument
 from mptt2.query import (AncestorsQuery, DescendantsQuery,
                          RightSiblingsWithDescendants, RootQuery,
                          SameNodeQuery, TreeQuerySet)
+from mptt2.session import TreeEditSession, get_tree_edit_session, has_tree_edit_session
+from mptt2.utils import (calculate_spread_gap, iter_nested_set_values,
+                         longest_increasing_subsequence)
+
+
+_NEW_NODE = object()
+# first key of the postgres advisory locks, so the tree locks do not collide with other advisory locks
+_ADVISORY_LOCK_NAMESPACE = 0x6d707474
 
 
 class TreeManager(Manager.from_queryset(TreeQuerySet)):
@@ -23,6 +42,69 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
         return super(TreeManager, cls).from_queryset(
             queryset_class, class_name=class_name)
 
+    def _lock_trees(self, tree_ids: Iterable[int]):
+        """Serializes the structural writes per tree until the end of the current transaction and increases the
+        ``version`` of the trees.
+
+        The lock mode is configured by the ``MPTT2_TREE_LOCK`` setting:
+
+        * ``"row"``: the version of every tree is increased with its own update, which locks the row of the
+          :class:`mptt2.models.Tree` object
+        * ``"advisory"``: uses transaction level advisory locks on PostgreSQL. Other backends fall back to ``"row"``.
+        * ``"none"``: no locking at all; the versions are increased with a single update
+
+        The trees are always locked in the order of there ids to avoid deadlocks between concurrent writers.
+        """
+        mode = getattr(settings, "MPTT2_TREE_LOCK", "row")
+        if mode not in ["row", "advisory", "none"]:
+            raise ImproperlyConfigured(_("MPTT2_TREE_LOCK needs to be one of 'row', 'advisory' or 'none'."))
+        tree_ids = sorted({tree_id for tree_id in tree_ids if tree_id is not None})
+        if not tree_ids:
+            return
+
+        from mptt2.models import Tree
+        trees = Tree.objects.using(self.db)
+        connection = connections[self.db]
+        if mode == "advisory" and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for tree_id in tree_ids:
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [_ADVISORY_LOCK_NAMESPACE, tree_id])
+        elif mode != "none":
+            # the update locks the row; one row per statement keeps the lock order
+            for tree_id in tree_ids:
+                trees.filter(pk=tree_id).update(version=F("version") + 1)
+            return
+        trees.filter(pk__in=tree_ids).update(version=F("version") + 1)
+
+    def _refresh_mptt_values(self, nodes: List):
+        rows = {
+            row[0]: row[1:] for row in self.model._base_manager.using(self.db).filter(
+                pk__in={node.pk for node in nodes}
+            ).values_list("pk", "mptt_tree_id", "mptt_parent_id", "mptt_lft", "mptt_rgt", "mptt_depth")
+        }
+        for node in nodes:
+            if node.pk in rows:
+                node.mptt_tree_id, node.mptt_parent_id, node.mptt_lft, node.mptt_rgt, node.mptt_depth = rows[node.pk]
+
+    def _lock_nodes(self, *nodes):
+        """Locks the trees of the given nodes and re-reads there nested set values under the lock.
+
+        The values of the instances may be stale, if another transaction changed the tree in the meantime. If a
+        node was moved to another tree before the lock was taken, that tree is locked as well. The cached parents of
+        the nodes are re-read as well, because inserts and moves next to a node use the values of its parent.
+        """
+        nodes = [node for node in nodes if node is not None and node.pk is not None]
+        parent_field = self.model._meta.get_field("mptt_parent")
+        locked = set()
+        while True:
+            tree_ids = {node.mptt_tree_id for node in nodes} - locked
+            if not tree_ids:
+                return
+            self._lock_trees(tree_ids)
+            locked.update(tree_ids)
+            parents = [parent_field.get_cached_value(node, default=None) for node in nodes]
+            self._refresh_mptt_values(nodes + [parent for parent in parents if parent is not None])
+
     def _calculate_node_mptt_values_for_insert(self, node, target, position):
         node.mptt_tree = target.mptt_tree
         if position == Position.LAST_CHILD:
@@ -62,10 +144,11 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
             )
 
     def _calculate_conditional_update_for_insert(self, target, position) -> Dict:
-        condition = ~RootQuery(of=target)
+        # the left values of the ancestors are smaller than the gap start in every position
+        condition = ~RootQuery(of=target) & ~AncestorsQuery(of=target)
 
         if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
-            condition &= ~SameNodeQuery(of=target) & ~ AncestorsQuery(of=target)
+            condition &= ~SameNodeQuery(of=target)
 
         return {
             "mptt_lft": Case(
@@ -79,6 +162,831 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
             "mptt_rgt": Right() + 2
         }
 
+    def _calculate_gap_start(self, target, position) -> int:
+        """returns the left value a node will get if it is inserted relative to the target by the given position"""
+        if position == Position.LAST_CHILD:
+            return target.mptt_rgt
+        elif position == Position.FIRST_CHILD:
+            return target.mptt_lft + 1
+        elif position == Position.LEFT:
+            return target.mptt_lft
+        elif position == Position.RIGHT:
+            return target.mptt_rgt + 1
+
+    def _shift_nodes(self, tree_id: int, start: int, width: int, nodes: Iterable = ()):
+        """applies the shift of :meth:`_open_gap` to the given and the registered node instances of the tree"""
+        for instance in tracked_nodes(self.model, tree_id, nodes):
+            if instance.mptt_lft >= start:
+                instance.mptt_lft += width
+            if instance.mptt_rgt >= start:
+                instance.mptt_rgt += width
+
+    def _open_gap(self, tree_id: int, start: int, width: int, nodes: Iterable = ()):
+        """shifts all nested set values of the tree which are greater or equal than start by the given width
+
+        The given node instances are shifted in python as well.
+        """
+        self._shift_nodes(tree_id=tree_id, start=start, width=width, nodes=nodes)
+        return self.filter(
+            mptt_tree_id=tree_id,
+            mptt_rgt__gte=start
+        ).update(
+            mptt_lft=Case(
+                When(
+                    mptt_lft__gte=start,
+                    then=Left() + width
+                ),
+                default=Left(),
+                output_field=PositiveIntegerField()
+            ),
+            mptt_rgt=Right() + width
+        )
+
+    def _close_gap(self, tree_id: int, end: int, width: int):
+        """shifts all nested set values of the tree which are greater than end back by the given width"""
+        self._shift_nodes(tree_id=tree_id, start=end + 1, width=-width)
+        return self.filter(
+            mptt_tree_id=tree_id,
+            mptt_rgt__gt=end
+        ).update(
+            mptt_lft=Case(
+                When(
+                    mptt_lft__gt=end,
+                    then=Left() - width
+                ),
+                default=Left(),
+                output_field=PositiveIntegerField()
+            ),
+            mptt_rgt=Right() - width
+        )
+
+    def _close_gaps(self, tree_id: int, ranges: List[Tuple[int, int]]):
+        """Closes the gaps of the given disjoint and ascending sorted ``(lft, rgt)`` ranges with one update query."""
+        lft_cases = []
+        rgt_cases = []
+        removed_width = 0
+        for lft, rgt in ranges:
+            removed_width += rgt - lft + 1
+            lft_cases.insert(0, When(mptt_lft__gt=rgt, then=Left() - removed_width))
+            rgt_cases.insert(0, When(mptt_rgt__gt=rgt, then=Right() - removed_width))
+
+        def removed_before(value):
+            return sum(rgt - lft + 1 for lft, rgt in ranges if rgt < value)
+
+        for instance in tracked_nodes(self.model, tree_id):
+            instance.mptt_lft -= removed_before(instance.mptt_lft)
+            instance.mptt_rgt -= removed_before(instance.mptt_rgt)
+
+        return self.filter(
+            mptt_tree_id=tree_id,
+            mptt_rgt__gt=ranges[0][1]
+        ).update(
+            mptt_lft=Case(*lft_cases, default=Left(), output_field=PositiveIntegerField()),
+            mptt_rgt=Case(*rgt_cases, default=Right(), output_field=PositiveIntegerField())
+        )
+
+    def _create_trees(self, count: int, batch_size: int = None) -> List:
+        """creates the given count of new trees with as less queries as possible"""
+        from mptt2.models import Tree
+        if connections[self.db].features.can_return_rows_from_bulk_insert:
+            return Tree.objects.using(self.db).bulk_create([Tree() for _ in range(count)], batch_size=batch_size)
+        # the ids of bulk created rows are unknown without RETURNING support
+        return [Tree.objects.using(self.db).create() for _ in range(count)]
+
+    def _collect_bulk_insert_input(self, nodes: Iterable) -> Tuple[List, Dict]:
+        """Converts the supported input structures of the bulk insert functions.
+
+        Returns the top level nodes and a dict which maps the ``id()`` of a node to its ordered children.
+        """
+        nodes = list(nodes)
+        top_level_nodes = []
+        children = {}
+        if nodes and isinstance(nodes[0], self.model):
+            # parent pointer list
+            parent_field = self.model._meta.get_field("mptt_parent")
+            given = {id(node) for node in nodes}
+            for node in nodes:
+                parent = parent_field.get_cached_value(node, default=None)
+                if parent is None and node.mptt_parent_id is None:
+                    top_level_nodes.append(node)
+                elif parent is not None and id(parent) in given:
+                    children.setdefault(id(parent), []).append(node)
+                else:
+                    raise InvalidInsert(
+                        _("The parent of a node which shall be inserted in bulk needs to be part of the given nodes."))
+
+            # nodes whose parent pointers form a cycle are not reachable from the top level nodes
+            reachable = 0
+            stack = list(top_level_nodes)
+            while stack:
+                reachable += 1
+                stack.extend(children.get(id(stack.pop()), ()))
+            if reachable != len(given):
+                raise InvalidInsert(
+                    _("The parent pointers of %d of the given nodes form a cycle.") % (len(given) - reachable))
+        else:
+            # nested iterables of (node, children) pairs or {"node": node, "children": children} dicts
+            stack = [(None, nodes)]
+            while stack:
+                parent, items = stack.pop()
+                for item in items:
+                    if isinstance(item, dict):
+                        node, node_children = item["node"], item.get("children", ())
+                    else:
+                        node, node_children = item
+                    if parent is None:
+                        top_level_nodes.append(node)
+                    else:
+                        node.mptt_parent = parent
+                        children.setdefault(id(parent), []).append(node)
+                    stack.append((node, node_children))
+        return top_level_nodes, children
+
+    def _validate_bulk_insert(self, top_level_nodes: List, children: Dict, target, position):
+        if position not in Position:
+            raise NotImplementedError(_("given position is not supported"))
+
+        if target and position in [Position.LEFT, Position.RIGHT] and target.is_root_node:
+            raise InvalidInsert(_("You can't insert a second root node."))
+
+        pks = [node.pk for node in top_level_nodes if node.pk]
+        pks.extend(node.pk for nodes in children.values() for node in nodes if node.pk)
+        if pks and self.filter(pk__in=pks).exists():
+            raise ValueError(
+                _("Cannot insert a node which has already been saved."))
+
+    def _bulk_create_nodes(self, nodes: List, batch_size: int = None):
+        """Creates the given nodes level by level, so that the parent of each node has got a primary key before."""
+        levels: Dict[int, List] = {}
+        for node in nodes:
+            levels.setdefault(node.mptt_depth, []).append(node)
+
+        can_return_rows = connections[self.db].features.can_return_rows_from_bulk_insert
+        for depth in sorted(levels):
+            level = levels[depth]
+            self.bulk_create(level, batch_size=batch_size)
+            if not can_return_rows:
+                self._fetch_bulk_created_pks(level)
+
+    def _fetch_bulk_created_pks(self, nodes: List):
+        """Sets the primary keys of bulk created nodes by there unique tree and left value."""
+        ranges: Dict[int, List[int]] = {}
+        for node in nodes:
+            lft_range = ranges.setdefault(node.mptt_tree_id, [node.mptt_lft, node.mptt_lft])
+            lft_range[0] = min(lft_range[0], node.mptt_lft)
+            lft_range[1] = max(lft_range[1], node.mptt_lft)
+        query = Q()
+        for tree_id, (min_lft, max_lft) in ranges.items():
+            query |= Q(mptt_tree_id=tree_id, mptt_lft__range=(min_lft, max_lft))
+
+        by_position = {(node.mptt_tree_id, node.mptt_lft): node for node in nodes}
+        for tree_id, lft, pk in self.filter(query, mptt_depth__in={node.mptt_depth for node in nodes}).values_list(
+                "mptt_tree_id", "mptt_lft", "pk"):
+            node = by_position.get((tree_id, lft))
+            if node:
+                node.pk = pk
+
+    def _assign_nested_set_values(self, top_level_nodes: List, children: Dict, tree, start: int = 1, depth: int = 0) -> int:
+        """Calculates the nested set values for the given nodes in memory and returns the used width."""
+        last = start - 1
+        for node, lft, rgt, node_depth in iter_nested_set_values(
+                roots=top_level_nodes,
+                get_children=lambda node: children.get(id(node), ()),
+                start=start,
+                depth=depth,
+                gap=self.model.mptt_gap):
+            node.mptt_tree = tree
+            node.mptt_lft = lft
+            node.mptt_rgt = rgt
+            node.mptt_depth = node_depth
+            last = max(last, rgt)
+        return last - start + 1
+
+    def cached(self, tree, queryset: QuerySet, timeout=DEFAULT_TIMEOUT, cache_alias: str = DEFAULT_CACHE_ALIAS) -> List:
+        """Evaluates a query on the given tree through the cache framework of django.
+
+        The entries are keyed by the tree id, the ``version`` of the tree and the sql of the query. Every structural
+        write increases the version, so a reader only needs to look up the current version by the primary key of the
+        tree. Results are stored once the current transaction is committed, so a rolled back version is never cached.
+
+        .. code-block:: python
+
+           descendants = Genre.objects.cached(rock.mptt_tree_id, rock.get_descendants())
+
+        :param tree: The tree or tree id the query depends on
+        :type tree: :class:`mptt2.models.Tree`
+
+        :param queryset: The query which shall be evaluated, like :meth:`mptt2.models.Node.get_descendants`
+        :type queryset: QuerySet
+
+        :param timeout: The timeout of the cache entry. (Default: the timeout of the cache)
+        :type timeout: int, optional
+
+        :param cache_alias: The cache which shall be used. (Default: ``"default"``)
+        :type cache_alias: str, optional
+
+        :returns: the evaluated query
+        :rtype: List
+        """
+        from mptt2.models import Tree
+        tree_id = getattr(tree, "pk", tree)
+        version = Tree.objects.using(self.db).filter(pk=tree_id).values_list("version", flat=True).first()
+        if version is None:
+            return list(queryset)
+
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.sha256(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+        key = f"mptt2:{self.model._meta.label_lower}:{tree_id}:{version}:{digest}"
+        cache = caches[cache_alias]
+        result = cache.get(key)
+        if result is None:
+            result = list(queryset)
+            on_commit(lambda: cache.set(key, result, timeout=timeout), using=self.db)
+        return result
+
+    def tree_edit(self, *trees, batch_size: int = 1000) -> TreeEditSession:
+        """Returns a context manager which defers the nested set maintenance of the given trees until it exits.
+
+        Inside the context ``insert_node``, ``move_node`` and ``Node.delete`` only update parent pointers. On exit
+        the nested set values of each tree are recalculated once and only the changed rows are written.
+
+        :param trees: The trees or tree ids which shall be edited.
+        :type trees: :class:`mptt2.models.Tree`
+
+        :param batch_size: The count of nodes which are updated in a single query.
+        :type batch_size: int, optional
+
+        :rtype: :class:`mptt2.session.TreeEditSession`
+        """
+        return TreeEditSession(manager=self, trees=trees, batch_size=batch_size)
+
+    def _sync_children(self, session, parent_pk: int, desired: List, pks: Dict, key: str, summary: Dict):
+        """Places the desired children below the parent with as few moves as possible.
+
+        The existing children which are already below the parent and in the longest run of the desired order keep
+        there place. All other nodes are inserted or moved right of there desired left sibling.
+        """
+        current = {pk: index for index, pk in enumerate(session.children.get(parent_pk, ()))}
+        staying = [pks.get(getattr(node, key)) for node in desired]
+        staying = [pk for pk in staying if pk in current]
+        staying = {staying[index] for index in longest_increasing_subsequence([current[pk] for pk in staying])}
+
+        previous = None
+        for node in desired:
+            pk = pks.get(getattr(node, key))
+            target, position = (previous, Position.RIGHT) if previous else (
+                self.model(pk=parent_pk), Position.FIRST_CHILD)
+            if pk is None:
+                session.insert_node(node, target=target, position=position)
+                pks[getattr(node, key)] = pk = node.pk
+                summary["inserted"] += 1
+            elif pk not in staying:
+                session.move_node(self.model(pk=pk), target=target, position=position)
+                summary["moved"] += 1
+            previous = self.model(pk=pk)
+
+    def sync_tree(self, tree, desired_structure: Iterable, key: str = "pk", batch_size: int = 1000) -> Dict[str, int]:
+        """Tree function to bring an existing tree into the given structure with a minimal set of changes.
+
+        The desired nodes are matched with the nodes of the tree by the value of the ``key`` field. Unmatched
+        desired nodes, including nodes without a key value, are inserted, unmatched nodes of the tree are deleted with there remaining descendants, and
+        matched nodes are only moved if there parent changed or if they are out of order with there siblings. All
+        changes are applied inside a :meth:`tree_edit` session, so the tree is renumbered only once at the end.
+        Other field values of matched nodes are not changed.
+
+        :param tree: The tree or tree id which shall be synchronized.
+        :type tree: :class:`mptt2.models.Tree`
+
+        :param desired_structure: The desired nodes with exactly one root node, in any structure which is
+                                  supported by :meth:`bulk_insert_tree`.
+        :type desired_structure: Iterable
+
+        :param key: The name of the unique field which identifies the nodes. (Default: ``"pk"``)
+        :type key: str, optional
+
+        :param batch_size: The count of nodes which are updated in a single query.
+        :type batch_size: int, optional
+
+        :returns: the counts of ``inserted``, ``moved`` and ``deleted`` nodes
+        :rtype: Dict[str, int]
+        """
+        top_level_nodes, children = self._collect_bulk_insert_input(desired_structure)
+        if len(top_level_nodes) != 1:
+            raise ValueError(_("The desired structure of a tree needs exactly one root node."))
+        desired_nodes = top_level_nodes + list(self._iter_bulk_descendants(top_level_nodes[0], children))
+        desired_keys = [getattr(node, key) for node in desired_nodes if getattr(node, key) is not None]
+        if len(set(desired_keys)) != len(desired_keys):
+            raise ValueError(_("The keys of the desired nodes need to be unique."))
+
+        summary = {"inserted": 0, "moved": 0, "deleted": 0}
+        tree_id = getattr(tree, "pk", tree)
+        with self.tree_edit(tree_id, batch_size=batch_size) as session:
+            pks = dict(self.filter(mptt_tree_id=tree_id).values_list(key, "pk"))
+            root = top_level_nodes[0]
+            if session.roots[tree_id] != [pks.get(getattr(root, key))]:
+                raise ValueError(_("The root node of the desired structure needs to be the root node of the tree."))
+
+            stack = [root]
+            while stack:
+                parent = stack.pop()
+                desired = children.get(id(parent), [])
+                self._sync_children(session, pks[getattr(parent, key)], desired, pks, key, summary)
+                stack.extend(desired)
+
+            # every kept node is placed below its desired parent now, so the removed nodes only have removed
+            # descendants left
+            removed = set(pks.values()) - {pks[getattr(node, key)] for node in desired_nodes}
+            top_removed = [pk for pk in removed if session.parents[pk] not in removed]
+            if top_removed:
+                summary["deleted"] = len(removed)
+                QuerySet.delete(self.filter(pk__in=top_removed))
+                for pk in top_removed:
+                    session.delete_node(pk)
+        return summary
+
+    def _overlapping_siblings(self, queryset):
+        if connections[self.db].features.supports_over_clause:
+            return queryset.annotate(
+                mptt_previous_rgt=Window(
+                    expression=Lag("mptt_rgt"),
+                    partition_by=[F("mptt_tree"), F("mptt_parent")],
+                    order_by=F("mptt_lft").asc()
+                )
+            ).filter(mptt_previous_rgt__gte=Left())
+        return queryset.filter(
+            Exists(self.model._base_manager.filter(
+                mptt_tree=OuterRef("mptt_tree"),
+                mptt_parent=OuterRef("mptt_parent"),
+                mptt_lft__lt=OuterRef("mptt_lft"),
+                mptt_rgt__gte=OuterRef("mptt_lft"),
+            ))
+        )
+
+    def check_integrity(self, tree=None) -> Dict[int, Dict[str, int]]:
+        """Checks the nested set values of the trees with set based queries and returns the found violations.
+
+        The following kinds of violations are counted per tree:
+
+        * ``roots``: the difference to exactly one root node
+        * ``parent``: nodes which are not inside the interval of there parent node or whose parent is part of
+          another tree
+        * ``depth``: nodes whose depth is not the depth of there parent plus one, or root nodes with a depth other
+          than ``0``. Together with the ``parent`` check this means the depth matches the count of ancestors.
+        * ``overlapping``: nodes whose interval overlaps the interval of there previous sibling
+        * ``numbering``: the deviation from a dense numbering with the values ``1`` to ``2n``, which is the distance of
+          the smallest left value from ``1`` and of the largest right value from ``2n`` plus the count of left values
+          and of right values which are used more than once. Only checked for densely numbered trees. A value which
+          is used as left and as right value is reported as ``parent`` or ``overlapping`` violation.
+
+        :param tree: The tree or tree id which shall be checked. ``None`` checks all trees. (Default: ``None``)
+        :type tree: :class:`mptt2.models.Tree`, optional
+
+        :returns: a mapping of tree id to the count of each kind of violation. Only trees with violations are
+                  part of it.
+        :rtype: Dict[int, Dict[str, int]]
+        """
+        queryset = self.model._base_manager.using(self.db)
+        if tree is not None:
+            queryset = queryset.filter(mptt_tree_id=getattr(tree, "pk", tree))
+        return self._check_queryset(queryset)
+
+    def _check_queryset(self, queryset) -> Dict[int, Dict[str, int]]:
+        is_root = Q(mptt_parent__isnull=True)
+        inside_parent = Q(
+            mptt_parent__mptt_tree=F("mptt_tree"),
+            mptt_parent__mptt_lft__lt=Left(),
+            mptt_parent__mptt_rgt__gt=Right()
+        )
+        report = {}
+        for tree_id, count, roots, min_lft, max_rgt, lfts, rgts, parent, depth in queryset.order_by().values(
+                "mptt_tree").annotate(
+            mptt_count=Count("pk"),
+            mptt_roots=Count("pk", filter=is_root),
+            mptt_min_lft=Min("mptt_lft"),
+            mptt_max_rgt=Max("mptt_rgt"),
+            mptt_lfts=Count("mptt_lft", distinct=True),
+            mptt_rgts=Count("mptt_rgt", distinct=True),
+            mptt_parent_violations=Count("pk", filter=~is_root & ~inside_parent),
+            mptt_depth_violations=Count("pk", filter=(
+                (is_root & ~Q(mptt_depth=0)) | (~is_root & ~Q(mptt_depth=F("mptt_parent__mptt_depth") + 1))
+            )),
+        ).values_list("mptt_tree", "mptt_count", "mptt_roots", "mptt_min_lft", "mptt_max_rgt", "mptt_lfts", "mptt_rgts",
+                      "mptt_parent_violations", "mptt_depth_violations"):
+            report[tree_id] = {
+                "roots": abs(roots - 1),
+                "parent": parent,
+                "depth": depth,
+                "overlapping": 0,
+                "numbering": 0 if self.model.mptt_gap else (
+                    abs(min_lft - 1) + abs(max_rgt - 2 * count) + (count - lfts) + (count - rgts)),
+            }
+
+        for tree_id, overlapping in self.model._base_manager.using(self.db).filter(
+            pk__in=self._overlapping_siblings(queryset).values("pk")
+        ).order_by().values("mptt_tree").annotate(mptt_count=Count("pk")).values_list("mptt_tree", "mptt_count"):
+            report[tree_id]["overlapping"] = overlapping
+
+        return {tree_id: violations for tree_id, violations in report.items() if any(violations.values())}
+
+    def _iter_rebuild_trees(self, chunk_size: int):
+        last = None
+        while True:
+            queryset = self.order_by("mptt_tree_id").values_list("mptt_tree_id", flat=True).distinct()
+            if last is not None:
+                queryset = queryset.filter(mptt_tree_id__gt=last)
+            tree_ids = list(queryset[:chunk_size])
+            if not tree_ids:
+                return
+            yield from tree_ids
+            last = tree_ids[-1]
+
+    def _rebuild_rows(self, queryset, batch_size: int) -> int:
+        """Recalculates the nested set values of the given rows from there parent pointers.
+
+        The rows are streamed into compact arrays and the children of every node are stored as one flat array
+        with offsets (compressed sparse rows). Siblings keep the order of there current left values.
+        """
+        pks = []
+        parent_pks = []
+        trees, lfts, rgts, depths = array("q"), array("q"), array("q"), array("q")
+        for pk, parent_pk, tree_id, lft, rgt, depth in queryset.order_by("mptt_lft", "pk").values_list(
+                "pk", "mptt_parent_id", "mptt_tree_id", "mptt_lft", "mptt_rgt", "mptt_depth").iterator(chunk_size=batch_size):
+            pks.append(pk)
+            parent_pks.append(parent_pk)
+            trees.append(tree_id)
+            lfts.append(lft)
+            rgts.append(rgt)
+            depths.append(depth)
+
+        count = len(pks)
+        positions = {pk: index for index, pk in enumerate(pks)}
+        parents = array("q", [-1]) * count
+        offsets = array("q", [0]) * (count + 1)
+        roots = []
+        for index, parent_pk in enumerate(parent_pks):
+            if parent_pk is None:
+                roots.append(index)
+                continue
+            parent = positions.get(parent_pk)
+            if parent is None:
+                raise ValueError(
+                    _("The parent %(parent)s of node %(node)s is not part of the rebuilt rows.") % {"parent": parent_pk, "node": pks[index]})
+            parents[index] = parent
+            offsets[parent + 1] += 1
+        del parent_pks, positions
+
+        for index in range(count):
+            offsets[index + 1] += offsets[index]
+        children = array("q", [0]) * count
+        fill = offsets[:-1]
+        for index in range(count):
+            parent = parents[index]
+            if parent != -1:
+                children[fill[parent]] = index
+                fill[parent] += 1
+        del parents, fill
+
+        visited = 0
+        changed = []
+        updated = 0
+        used_trees = set()
+        instances = tracked_nodes_by_pk(self.model)
+        tracked_changes = []
+        for root in roots:
+            tree_id = trees[root]
+            if tree_id in used_trees:
+                # more than one root node was found for this tree; the root gets a tree of its own.
+                tree_id = self._create_trees(1)[0].pk
+            used_trees.add(tree_id)
+            for index, lft, rgt, depth in iter_nested_set_values(
+                    roots=[root],
+                    get_children=lambda index: children[offsets[index]:offsets[index + 1]],
+                    gap=self.model.mptt_gap):
+                visited += 1
+                if (trees[index], lfts[index], rgts[index], depths[index]) != (tree_id, lft, rgt, depth):
+                    changed.append(
+                        self.model(pk=pks[index], mptt_tree_id=tree_id, mptt_lft=lft, mptt_rgt=rgt, mptt_depth=depth))
+                    if pks[index] in instances:
+                        tracked_changes.append((pks[index], (tree_id, lft, rgt, depth)))
+                if len(changed) >= batch_size:
+                    updated += self.bulk_update(changed, fields=["mptt_tree", "mptt_lft", "mptt_rgt", "mptt_depth"])
+                    changed = []
+
+        if visited != count:
+            raise ValueError(_("The parent pointers of %d nodes form a cycle.") % (count - visited))
+
+        for pk, values in tracked_changes:
+            for instance in instances[pk]:
+                instance.mptt_tree_id, instance.mptt_lft, instance.mptt_rgt, instance.mptt_depth = values
+
+        if changed:
+            updated += self.bulk_update(changed, fields=["mptt_tree", "mptt_lft", "mptt_rgt", "mptt_depth"])
+
+        # the roots of these trees became descendants of nodes in other trees
+        orphaned_trees = set(trees) - used_trees
+        if orphaned_trees:
+            from mptt2.models import Tree
+            Tree.objects.using(self.db).filter(pk__in=orphaned_trees).delete()
+        return updated
+
+    def rebuild(self, tree=None, per_tree: bool = False, batch_size: int = 1000) -> int:
+        """Recalculates the nested set values from the ``mptt_parent`` pointers of the nodes.
+
+        Use it to repair trees whose left, right or depth values got corrupted. The order of siblings is taken from
+        there current left values. Only the rows whose values changed are written with chunked ``bulk_update``
+        calls. The rebuilt trees are locked first. Trees whose root node got a parent in another tree are deleted.
+
+        :param tree: The tree or tree id which shall be rebuilt. ``None`` rebuilds all trees. (Default: ``None``)
+        :type tree: :class:`mptt2.models.Tree`, optional
+
+        :param per_tree: Rebuild every tree in its own transaction, so a big forest can be rebuilt incrementally.
+                         In this mode the ``mptt_tree`` values are trusted and parent pointers across trees raise
+                         a ``ValueError``. (Default: ``False``)
+        :type per_tree: bool, optional
+
+        :param batch_size: The count of rows which are fetched and updated in a single query. (Default: ``1000``)
+        :type batch_size: int, optional
+
+        :returns: the count of changed nodes
+        :rtype: int
+        """
+        edited = has_tree_edit_session(self.model) if tree is None else get_tree_edit_session(self.model, getattr(tree, "pk", tree))
+        if edited:
+            raise TreeEditInProgress(_("Trees can't be rebuilt inside a tree edit session. The session renumbers them on exit."))
+
+        if tree is not None:
+            tree_ids = [getattr(tree, "pk", tree)]
+        elif per_tree:
+            tree_ids = self._iter_rebuild_trees(chunk_size=batch_size)
+        else:
+            with atomic(using=self.db):
+                self._lock_trees(self.order_by().values_list("mptt_tree_id", flat=True).distinct())
+                return self._rebuild_rows(self.all(), batch_size=batch_size)
+
+        return sum(self._rebuild_tree(tree_id, batch_size=batch_size) for tree_id in tree_ids)
+
+    def _rebuild_tree(self, tree_id: int, batch_size: int) -> int:
+        with atomic(using=self.db):
+            self._lock_trees([tree_id])
+            return self._rebuild_rows(self.filter(mptt_tree_id=tree_id), batch_size=batch_size)
+
+    @atomic
+    def bulk_insert_tree(self, nodes: Iterable, batch_size: int = None) -> List:
+        """Tree function to insert many new trees at once.
+
+        The nested set values of all nodes are calculated in memory and the nodes are written with chunked
+        ``bulk_create`` calls. Every top level node becomes the root node of a new tree.
+
+        :param nodes: The nodes to insert. Either a list of unsaved nodes, where the ``mptt_parent`` of each node
+                      points to another node of the list or is None for root nodes, or nested iterables of
+                      ``(node, children)`` pairs or ``{"node": node, "children": [...]}`` dicts.
+        :type nodes: Iterable
+
+        :param batch_size: The count of nodes which are created in a single query.
+        :type batch_size: int, optional
+
+        :returns: all inserted nodes ordered by tree and left value
+        :rtype: List[:class:`mptt2.models.Node`]
+        """
+        top_level_nodes, children = self._collect_bulk_insert_input(nodes)
+        self._validate_bulk_insert(
+            top_level_nodes=top_level_nodes, children=children, target=None, position=Position.LAST_CHILD)
+
+        inserted = []
+        for node, tree in zip(top_level_nodes, self._create_trees(len(top_level_nodes), batch_size=batch_size)):
+            node.mptt_parent = None
+            self._assign_nested_set_values([node], children, tree=tree)
+            inserted.append(node)
+            inserted.extend(self._iter_bulk_descendants(node, children))
+
+        self._bulk_create_nodes(inserted, batch_size=batch_size)
+        self._register(*(node for node in inserted if node.pk is not None))
+        return inserted
+
+    @atomic
+    def bulk_insert_roots(self, nodes: Iterable, batch_size: int = None) -> List:
+        """Tree function to insert many root nodes without descendants at once.
+
+        The trees of all nodes are created with chunked ``bulk_create`` calls and the nodes are written the same
+        way afterwards, instead of two inserts per root node like ``insert_node`` does.
+
+        :param nodes: The unsaved nodes which shall become root nodes of new trees.
+        :type nodes: Iterable
+
+        :param batch_size: The count of rows which are created in a single query.
+        :type batch_size: int, optional
+
+        :returns: the inserted nodes
+        :rtype: List[:class:`mptt2.models.Node`]
+        """
+        nodes = list(nodes)
+        for node in nodes:
+            if node.pk and self.filter(pk=node.pk).exists():
+                raise ValueError(_("Cannot insert a node which has already been saved."))
+
+        for node, tree in zip(nodes, self._create_trees(len(nodes), batch_size=batch_size)):
+            node.mptt_tree = tree
+            node.mptt_parent = None
+            node.mptt_lft = 1
+            node.mptt_rgt = 2
+            node.mptt_depth = 0
+
+        self.bulk_create(nodes, batch_size=batch_size)
+        if not connections[self.db].features.can_return_rows_from_bulk_insert:
+            chunk_size = batch_size or 1000
+            for index in range(0, len(nodes), chunk_size):
+                by_tree = {node.mptt_tree_id: node for node in nodes[index:index + chunk_size]}
+                for tree_id, pk in self.filter(
+                        mptt_tree_id__in=list(by_tree), mptt_parent__isnull=True).values_list("mptt_tree_id", "pk"):
+                    by_tree[tree_id].pk = pk
+        return nodes
+
+    @atomic
+    def bulk_insert_subtree(self,
+                            nodes: Iterable,
+                            target,
+                            position: Position = Position.LAST_CHILD,
+                            batch_size: int = None) -> List:
+        """Tree function to insert many nodes relative to the given target by the given position at once.
+
+        The gap for the new nodes is opened with a single update query. After that the nested set values of all
+        nodes are calculated in memory and the nodes are written with chunked ``bulk_create`` calls.
+
+        :param nodes: The nodes to insert. See :meth:`bulk_insert_tree` for the supported structures. All top level
+                      nodes are inserted as siblings by the given position.
+        :type nodes: Iterable
+
+        :param target: The target node where the given nodes shall be inserted relative to.
+        :type target: :class:`mptt2.models.Node`
+
+        :param position: The relative position to the target
+                         (Default: ``Position.LAST_CHILD``)
+        :type position: :class:`mptt2.enums.Position`, optional
+
+        :param batch_size: The count of nodes which are created in a single query.
+        :type batch_size: int, optional
+
+        :returns: all inserted nodes ordered by left value
+        :rtype: List[:class:`mptt2.models.Node`]
+        """
+        if get_tree_edit_session(self.model, target.mptt_tree_id):
+            raise TreeEditInProgress(
+                _("Inserting nodes in bulk is not supported inside a tree edit session. Please insert the nodes one by one."))
+
+        top_level_nodes, children = self._collect_bulk_insert_input(nodes)
+        self._lock_nodes(target)
+        self._validate_bulk_insert(
+            top_level_nodes=top_level_nodes, children=children, target=target, position=position)
+
+        if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
+            parent = target
+            depth = target.mptt_depth + 1
+        else:
+            parent = target.mptt_parent
+            depth = target.mptt_depth
+
+        start = self._calculate_gap_start(target=target, position=position)
+        gap = self.model.mptt_gap
+        width = self._assign_nested_set_values(
+            top_level_nodes, children, tree=target.mptt_tree, start=start + gap, depth=depth)
+        if not width:
+            return []
+        width += 2 * gap
+
+        self._open_gap(tree_id=target.mptt_tree_id, start=start, width=width, nodes=[target])
+
+        inserted = []
+        for node in top_level_nodes:
+            node.mptt_parent = parent
+            inserted.append(node)
+            inserted.extend(self._iter_bulk_descendants(node, children))
+
+        self._bulk_create_nodes(inserted, batch_size=batch_size)
+        self._register(*(node for node in inserted if node.pk is not None))
+        return inserted
+
+    def _iter_bulk_descendants(self, node, children: Dict):
+        """yields the descendants of the given node in preorder"""
+        stack = list(reversed(children.get(id(node), ())))
+        while stack:
+            descendant = stack.pop()
+            yield descendant
+            stack.extend(reversed(children.get(id(descendant), ())))
+
+    def _calculate_free_range(self, target, position) -> Tuple[int, int]:
+        """returns the used values next to the insert position. All values between them are unused."""
+        if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
+            children = self.filter(mptt_tree_id=target.mptt_tree_id, mptt_parent=target)
+            if position == Position.LAST_CHILD:
+                lower = children.aggregate(value=Max("mptt_rgt"))["value"]
+                return lower or target.mptt_lft, target.mptt_rgt
+            upper = children.aggregate(value=Min("mptt_lft"))["value"]
+            return target.mptt_lft, upper or target.mptt_rgt
+
+        siblings = self.filter(mptt_tree_id=target.mptt_tree_id, mptt_parent_id=target.mptt_parent_id)
+        if position == Position.LEFT:
+            lower = siblings.filter(mptt_rgt__lt=target.mptt_lft).aggregate(value=Max("mptt_rgt"))["value"]
+            return lower or target.mptt_parent.mptt_lft, target.mptt_lft
+        upper = siblings.filter(mptt_lft__gt=target.mptt_rgt).aggregate(value=Min("mptt_lft"))["value"]
+        return target.mptt_rgt, upper or target.mptt_parent.mptt_rgt
+
+    def _insert_node_sparse(self, node, target, position):
+        """Inserts the node by using a free value between the neighbours. Only if there is no free value, the
+        smallest enclosing subtree with enough free space is renumbered."""
+        lower, upper = self._calculate_free_range(target=target, position=position)
+        if upper - lower > 2:
+            node.mptt_lft = lower + (upper - lower - 1) // 2
+            node.mptt_rgt = node.mptt_lft + 1
+        else:
+            self._renumber_for_insert(node=node, target=target, position=position)
+
+    def _renumber_for_insert(self, node, target, position):
+        candidates = self.filter(
+            AncestorsQuery(of=node.mptt_parent, include_self=True)
+        ).annotate(
+            mptt_descendant_count=DescendantCount()
+        ).order_by("-mptt_depth").values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_descendant_count")
+
+        grow = False
+        for enclosing in candidates:
+            pk, lft, rgt, depth, descendant_count = enclosing
+            # keep the renumbered subtree at most half full to give the following inserts some space
+            if rgt - lft - 1 >= 4 * (descendant_count + 1):
+                break
+        else:
+            # even the root node has not enough space; the whole tree is renumbered and the root grows.
+            grow = True
+
+        rows = self.filter(
+            mptt_tree_id=target.mptt_tree_id,
+            mptt_lft__gte=lft,
+            mptt_lft__lt=rgt
+        ).order_by("mptt_lft").values_list("pk", "mptt_parent_id", "mptt_lft", "mptt_rgt")
+        children: Dict = {}
+        old_values = {}
+        for row_pk, parent_pk, row_lft, row_rgt in rows:
+            old_values[row_pk] = (row_lft, row_rgt)
+            if row_pk != pk:
+                children.setdefault(parent_pk, []).append(row_pk)
+
+        if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
+            siblings = children.setdefault(target.pk, [])
+            siblings.insert(len(siblings) if position == Position.LAST_CHILD else 0, _NEW_NODE)
+        else:
+            siblings = children[target.mptt_parent_id]
+            index = siblings.index(target.pk)
+            siblings.insert(index if position == Position.LEFT else index + 1, _NEW_NODE)
+
+        if grow:
+            new_values = iter_nested_set_values(
+                roots=[pk],
+                get_children=lambda key: children.get(key, ()),
+                start=lft,
+                depth=depth,
+                gap=self.model.mptt_gap)
+        else:
+            members = [key for key in old_values if key != pk] + [_NEW_NODE]
+            gap = calculate_spread_gap(
+                available=rgt - lft - 1,
+                nodes=len(members),
+                leafs=sum(1 for key in members if not children.get(key)))
+            new_values = iter_nested_set_values(
+                roots=children[pk],
+                get_children=lambda key: children.get(key, ()),
+                start=lft + gap + 1,
+                depth=depth + 1,
+                gap=gap)
+
+        changed = {}
+        for key, new_lft, new_rgt, _depth in new_values:
+            if key is _NEW_NODE:
+                node.mptt_lft = new_lft
+                node.mptt_rgt = new_rgt
+            elif old_values[key] != (new_lft, new_rgt):
+                changed[key] = (new_lft, new_rgt)
+
+        for instance in tracked_nodes(self.model, target.mptt_tree_id, [target, node.mptt_parent]):
+            if instance.pk in changed:
+                instance.mptt_lft, instance.mptt_rgt = changed[instance.pk]
+
+        self.bulk_update(
+            [self.model(pk=key, mptt_lft=lft, mptt_rgt=rgt) for key, (lft, rgt) in changed.items()],
+            fields=["mptt_lft", "mptt_rgt"],
+            batch_size=1000)
+
+    def _collapse_leafs(self, pks: Iterable):
+        """Resets the right value of the given nodes in sparse numbering mode, if they have no children anymore."""
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return
+        pks.difference_update(
+            self.filter(mptt_parent_id__in=pks).values_list("mptt_parent_id", flat=True).distinct())
+        if pks:
+            self.filter(pk__in=pks).update(mptt_rgt=Left() + 1)
+            for instance in tracked_nodes(self.model, tree_id=None):
+                if instance.pk in pks:
+                    instance.mptt_rgt = instance.mptt_lft + 1
+
     def _validate_insert(self, node, target, position):
         if node.pk and self.filter(pk=node.pk).exists():
             raise ValueError(
@@ -110,9 +1018,20 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
 
         self._validate_insert(node, target, position)
 
+        session = get_tree_edit_session(self.model, target.mptt_tree_id) if target is not None else None
+        if session:
+            return session.insert_node(node=node, target=target, position=position)
+
+        with instrument(self.model, using=self.db, operation=TreeOperation.INSERT,
+                        tree_id=getattr(target, "mptt_tree_id", None), position=position):
+            return self._insert_node(node=node, target=target, position=position)
+
+    def _insert_node(self, node, target, position):
+        self._lock_nodes(target)
+
         if target is None:
             from mptt2.models import Tree
-            node.mptt_tree = Tree.objects.create()
+            node.mptt_tree = Tree.objects.using(self.db).create()
             node.mptt_lft = 1
             node.mptt_rgt = 2
             node.mptt_depth = 0
@@ -120,19 +1039,40 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
         else:
             self._calculate_node_mptt_values_for_insert(
                 node=node, target=target, position=position)
-            self.select_for_update().filter(
+            if self.model.mptt_gap:
+                self._insert_node_sparse(
+                    node=node, target=target, position=position)
+                node.save()
+                self._register(node)
+                return node
+            self.filter(
                 self._calculate_filter_for_insert(
                     target=target, position=position)
             ).update(**self._calculate_conditional_update_for_insert(target=target, position=position))
+            self._shift_nodes(tree_id=target.mptt_tree_id, start=node.mptt_lft, width=2, nodes=[target])
 
         node.save()
+        self._register(node)
         return node
 
-    def _validate_move(self, node, target, position):
-        if node.mptt_tree != target.mptt_tree:
-            raise InvalidMove(
-                _("moving nodes between trees is not supported"))
+    @staticmethod
+    def _register(*nodes):
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            for node in nodes:
+                identity_map.register(node)
+
+    async def ainsert_node(self, node, target=None, position: Position = Position.LAST_CHILD):
+        """Async version of :meth:`insert_node`.
+
+        Django has no async transactions, so the whole insert runs with its transaction and tree lock in a single
+        call of ``sync_to_async``. The call is not thread sensitive: concurrent writes run in parallel threads of
+        the executor with their own database connections and only wait for each other on the lock of the same tree
+        (SQLite still allows only one writer at a time).
+        """
+        return await sync_to_async(self.insert_node, thread_sensitive=False)(node=node, target=target, position=position)
 
+    def _validate_move(self, node, target, position):
         if position not in [Position.LAST_CHILD, Position.FIRST_CHILD, Position.LEFT, Position.RIGHT]:
 
             raise ValueError(
@@ -146,11 +1086,16 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
             msg = base_msg.format(move_kind=move_kind_i18n,
                                   relatedness=relatedness)
             raise InvalidMove(msg)
-        elif node.mptt_lft < target.mptt_lft < node.mptt_rgt:
+        elif node.mptt_tree_id == target.mptt_tree_id and node.mptt_lft < target.mptt_lft < node.mptt_rgt:
             relatedness = _("its descendants.")
             msg = base_msg.format(move_kind=move_kind_i18n,
                                   relatedness=relatedness)
             raise InvalidMove(msg)
+        elif position in [Position.LEFT, Position.RIGHT] and target.is_root_node:
+            relatedness = _("a root node.")
+            msg = base_msg.format(move_kind=move_kind_i18n,
+                                  relatedness=relatedness)
+            raise InvalidMove(msg)
 
     def _calculate_move_changes(self, node, target, position) -> Tuple:
         if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
@@ -199,6 +1144,61 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
 
         return new_left, new_right, depth_change, parent, left_boundary, right_boundary, left_right_change, gap_size
 
+    def _move_node_between_trees(self, node, target, position):
+        """Moves the subtree of the node to another tree with a fixed count of range updates."""
+        if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
+            parent = target
+            depth = target.mptt_depth + 1
+        else:
+            parent = target.mptt_parent
+            depth = target.mptt_depth
+
+        gap = self.model.mptt_gap
+        source_tree_id = node.mptt_tree_id
+        old_parent_id = node.mptt_parent_id
+        width = node.subtree_width
+        start = self._calculate_gap_start(target=target, position=position)
+        left_right_change = start + gap - node.mptt_lft
+        depth_change = depth - node.mptt_depth
+
+        self._open_gap(tree_id=target.mptt_tree_id, start=start, width=width + 2 * gap, nodes=[target])
+        self.filter(
+            mptt_tree_id=source_tree_id,
+            mptt_lft__gte=node.mptt_lft,
+            mptt_lft__lte=node.mptt_rgt
+        ).update(
+            mptt_tree=target.mptt_tree_id,
+            mptt_lft=Left() + left_right_change,
+            mptt_rgt=Right() + left_right_change,
+            mptt_depth=Depth() + depth_change
+        )
+        for instance in tracked_nodes(self.model, source_tree_id):
+            if instance is not node and node.mptt_lft <= instance.mptt_lft <= node.mptt_rgt:
+                instance.mptt_tree_id = target.mptt_tree_id
+                instance.mptt_lft += left_right_change
+                instance.mptt_rgt += left_right_change
+                instance.mptt_depth += depth_change
+                if instance.pk == node.pk:
+                    instance.mptt_parent = parent
+
+        old_rgt = node.mptt_rgt
+        node.mptt_tree = target.mptt_tree
+        node.mptt_lft += left_right_change
+        node.mptt_rgt += left_right_change
+        node.mptt_depth = depth
+        node.mptt_parent = parent
+        node.save()
+
+        # the new parent has to be stored before, otherwise the old parent still counts the node as child
+        if old_parent_id is None:
+            from mptt2.models import Tree
+            Tree.objects.using(self.db).filter(pk=source_tree_id).delete()
+        elif gap:
+            self._collapse_leafs([old_parent_id])
+        else:
+            self._close_gap(tree_id=source_tree_id, end=old_rgt, width=width)
+        return node
+
     @atomic
     def move_node(self,
                   node,
@@ -217,12 +1217,29 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
         :rtype: :class:`mptt2.models.Node`
         """
 
+        session = get_tree_edit_session(self.model, node.mptt_tree_id) or get_tree_edit_session(
+            self.model, target.mptt_tree_id)
+        if session:
+            return session.move_node(node=node, target=target, position=position)
+
+        with instrument(self.model, using=self.db, operation=TreeOperation.MOVE, tree_id=node.mptt_tree_id,
+                        position=position, subtree_width=node.subtree_width):
+            return self._move_node(node=node, target=target, position=position)
+
+    def _move_node(self, node, target, position):
+        self._lock_nodes(node, target)
         self._validate_move(node, target, position)
 
+        if node.mptt_tree_id != target.mptt_tree_id:
+            return self._move_node_between_trees(node=node, target=target, position=position)
+
         new_left, new_right, depth_change, parent, left_boundary, right_boundary, left_right_change, gap_size = self._calculate_move_changes(
             node, target, position)
 
-        self.select_for_update().filter(
+        # only the nodes inside the window between the old and the new position are affected
+        self.filter(
+            Q(mptt_lft__range=(left_boundary, right_boundary)) |
+            Q(mptt_rgt__range=(left_boundary, right_boundary)),
             mptt_tree=target.mptt_tree
         ).update(
             mptt_depth=Case(
@@ -263,10 +1280,35 @@ class TreeManager(Manager.from_queryset(TreeQuerySet)):
                 output_field=PositiveIntegerField()
             )
         )
+        for instance in tracked_nodes(self.model, target.mptt_tree_id, [target]):
+            if instance is node:
+                continue
+            if node.mptt_lft <= instance.mptt_lft <= node.mptt_rgt:
+                instance.mptt_depth -= depth_change
+                instance.mptt_lft += left_right_change
+            elif left_boundary <= instance.mptt_lft <= right_boundary:
+                instance.mptt_lft += gap_size
+            if node.mptt_lft <= instance.mptt_rgt <= node.mptt_rgt:
+                instance.mptt_rgt += left_right_change
+            elif left_boundary <= instance.mptt_rgt <= right_boundary:
+                instance.mptt_rgt += gap_size
+            if instance.pk == node.pk:
+                instance.mptt_parent = parent
 
+        old_parent_id = node.mptt_parent_id
         node.mptt_lft = new_left
         node.mptt_rgt = new_right
         node.mptt_depth -= depth_change
         node.mptt_parent = parent
         node.save()
-        return node
\ No newline at end of file
+        if self.model.mptt_gap and old_parent_id != node.mptt_parent_id:
+            self._collapse_leafs([old_parent_id])
+        return node
+
+    async def amove_node(self, node, target, position=Position.LAST_CHILD):
+        """Async version of :meth:`move_node`.
+
+        Django has no async transactions, so the whole move runs with its transaction and tree lock in a single
+        call of ``sync_to_async``. Like :meth:`ainsert_node` the call is not thread sensitive.
+        """
+        return await sync_to_async(self.move_node, thread_sensitive=False)(node=node, target=target, position=position)
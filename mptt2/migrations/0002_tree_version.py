@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mptt2', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tree',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,8 +1,11 @@
+from typing import Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
 from django.db.models import Model
 from django.db.models.constraints import CheckConstraint, UniqueConstraint
 from django.db.models.deletion import CASCADE
 from django.db.models.expressions import F
-from django.db.models.fields import PositiveIntegerField
+from django.db.models.fields import PositiveBigIntegerField, PositiveIntegerField
 from django.db.models.fields.related import ForeignKey
 from django.db.models.indexes import Index
 from django.db.models.query import Q, QuerySet
@@ -10,7 +13,10 @@ from django.db.transaction import atomic
 from django.utils.translation import gettext as _
 
 from mptt2.compatibility import violation_error_message_kwargs
-from mptt2.enums import Position
+from mptt2.enums import Position, TreeOperation
+from mptt2.exceptions import TreeEditInProgress
+from mptt2.identity import get_identity_map
+from mptt2.instrumentation import instrument
 from mptt2.managers import TreeManager
 from mptt2.query import (
     AncestorsQuery,
@@ -20,11 +26,17 @@ from mptt2.query import (
     RootQuery,
     SiblingsQuery,
 )
+from mptt2.session import get_tree_edit_session
 
 
 class Tree(Model):
-    """Simple Tree model to generate simple tree id's by the database to support thread safe inserting new tree's"""
-    pass
+    """Simple Tree model to generate simple tree id's by the database to support thread safe inserting new tree's
+
+    :param version: Counter which is increased by every structural write to the tree in the same transaction. It is
+                    used to invalidate cached tree queries, see :meth:`mptt2.managers.TreeManager.cached`.
+    :type version: int
+    """
+    version = PositiveBigIntegerField(default=0, editable=False)
 
 
 class Node(Model):
@@ -45,6 +57,13 @@ class Node(Model):
     :param mptt_depth: The hierarchy level of this node inside the tree
     :type mptt_depth: int
 
+    :param mptt_gap: The count of unused values which are left between the nested set values of the nodes. With
+                     ``0`` the tree is numbered dense. Any other value enables the sparse numbering mode, where
+                     inserts only need to write the new node as long as there is free space between the
+                     neighbours. If the space runs out, only the smallest enclosing subtree is renumbered.
+                     (Default: ``0``)
+    :type mptt_gap: int
+
     """
     mptt_parent = ForeignKey(
         to="self",
@@ -81,6 +100,8 @@ class Node(Model):
         help_text=_("The hierarchy level of this node inside the tree")
     )
 
+    mptt_gap: int = 0
+
     objects: TreeManager = TreeManager()
 
     class Meta:
@@ -99,29 +120,71 @@ class Node(Model):
             # UniqueConstraint(fields=["mptt_tree_id", "mptt_lft"], name="unique_lft")
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.register_loaded(instance, field_names)
+        return instance
+
     def __str__(self) -> str:
         """returns pk | tree | lft | rgt"""
         return f"pk {self.pk} | tree {self.mptt_tree_id} | lft {self.mptt_lft} | rgt {self.mptt_rgt}"
 
+    def _check_tree_edit_session(self):
+        if get_tree_edit_session(self.__class__, self.mptt_tree_id):
+            raise TreeEditInProgress(
+                _("The nested set values of this tree are stale until the active tree edit session ends."))
+
     @atomic
     def delete(self, *args, **kwargs):
         """Custom delete function to update nested set values if a node and there descendants are deleted."""
+        pk = self.pk
+        session = get_tree_edit_session(self.__class__, self.mptt_tree_id)
+        if session:
+            del_return = super().delete(*args, **kwargs)
+            session.delete_node(pk)
+            return del_return
+
+        with instrument(self.__class__, using=kwargs.get("using") or self.__class__.objects.db,
+                        operation=TreeOperation.DELETE, tree_id=self.mptt_tree_id, subtree_width=self.subtree_width):
+            return self._delete_subtree(*args, **kwargs)
+
+    def _delete_subtree(self, *args, **kwargs):
+        self.__class__.objects._lock_nodes(self)
         del_return = super().delete(*args, **kwargs)
-        self.__class__.objects.filter(
-            mptt_tree=self.mptt_tree,
-            mptt_lft__gt=self.mptt_rgt
-        ).update(
-            mptt_lft=F("mptt_lft") - self.subtree_width
-        )
-        self.__class__.objects.filter(
-            mptt_tree=self.mptt_tree,
-            mptt_rgt__gt=self.mptt_rgt
-        ).update(
-            mptt_rgt=F("mptt_rgt") - self.subtree_width
+        if self.mptt_gap:
+            # sparse numbering; the freed values are simply left as gap
+            self.__class__.objects._collapse_leafs([self.mptt_parent_id])
+            return del_return
+
+        self.__class__.objects._close_gap(
+            tree_id=self.mptt_tree_id,
+            end=self.mptt_rgt,
+            width=self.subtree_width
         )
 
         return del_return
 
+    @staticmethod
+    def _fill_result_cache(queryset: QuerySet, nodes: Iterable):
+        queryset._result_cache = list(nodes)
+        queryset._prefetch_done = True
+
+    def _get_cached_ancestors(self) -> Optional[List]:
+        """returns the ancestors from the cached parents ordered from the root, if the chain up to the root is cached"""
+        parent_field = self._meta.get_field("mptt_parent")
+        ancestors = []
+        node = self
+        while node.mptt_parent_id is not None:
+            if not parent_field.is_cached(node):
+                return None
+            node = parent_field.get_cached_value(node)
+            ancestors.append(node)
+        ancestors.reverse()
+        return ancestors
+
     def get_children(self, asc=False) -> QuerySet:
         """returns a queryset representing the children of the current node
 
@@ -129,8 +192,14 @@ class Node(Model):
         :type asc: bool
 
         """
+        self._check_tree_edit_session()
         children = self.__class__.objects.filter(ChildrenQuery(of=self))
-        return children.order_by("-mptt_lft") if asc else children
+        children = children.order_by("-mptt_lft") if asc else children
+        cached_children = getattr(self, "_mptt_cached_children", None)
+        if cached_children is not None:
+            # linked by TreeQuerySet.as_tree()
+            self._fill_result_cache(children, reversed(cached_children) if asc else cached_children)
+        return children
 
     def get_descendants(self, include_self=False, asc=False) -> QuerySet:
         """returns a queryset representing the descendants of the current node
@@ -142,6 +211,7 @@ class Node(Model):
         :type asc: bool
 
         """
+        self._check_tree_edit_session()
         descendants = self.__class__.objects.filter(
             DescendantsQuery(of=self, include_self=include_self))
         return descendants.order_by("-mptt_lft") if asc else descendants
@@ -156,9 +226,16 @@ class Node(Model):
         :type asc: bool
 
         """
+        self._check_tree_edit_session()
         ancestors = self.__class__.objects.filter(
             AncestorsQuery(of=self, include_self=include_self))
-        return ancestors.order_by("-mptt_lft") if asc else ancestors
+        ancestors = ancestors.order_by("-mptt_lft") if asc else ancestors
+        cached_ancestors = self._get_cached_ancestors()
+        if cached_ancestors is not None:
+            if include_self:
+                cached_ancestors.append(self)
+            self._fill_result_cache(ancestors, reversed(cached_ancestors) if asc else cached_ancestors)
+        return ancestors
 
     def get_family(self, include_self=False, asc=False) -> QuerySet:
         """returns a queryset representing the family of the current node (descendants and ancestors)
@@ -170,6 +247,7 @@ class Node(Model):
         :type asc: bool
 
         """
+        self._check_tree_edit_session()
         family = self.__class__.objects.filter(FamilyQuery(
             of=self, include_self=include_self))
         return family.order_by("-mptt_lft") if asc else family
@@ -184,14 +262,21 @@ class Node(Model):
         :type asc: bool
 
         """
+        self._check_tree_edit_session()
         siblings = self.__class__.objects.filter(
             SiblingsQuery(of=self, include_self=include_self))
         return siblings.order_by("-mptt_lft") if asc else siblings
 
     def get_root(self):
         """returns the root node of the tree where this node is part of"""
+        self._check_tree_edit_session()
         return self.__class__.objects.get(RootQuery(of=self))
 
+    async def aget_root(self):
+        """Async version of :meth:`get_root`"""
+        self._check_tree_edit_session()
+        return await self.__class__.objects.aget(RootQuery(of=self))
+
     def move_to(self, target, position: Position = Position.LAST_CHILD):
         """Tree function to move a node relative to a given target by the given position
 
@@ -230,6 +315,19 @@ class Node(Model):
             position=position
         )
 
+    async def adelete(self, *args, **kwargs):
+        """Async version of :meth:`delete`, which runs the delete with its transaction in a thread of the executor
+        that is not thread sensitive, like :meth:`mptt2.managers.TreeManager.ainsert_node`."""
+        return await sync_to_async(self.delete, thread_sensitive=False)(*args, **kwargs)
+
+    async def amove_to(self, target, position: Position = Position.LAST_CHILD):
+        """Async version of :meth:`move_to`"""
+        return await self.__class__.objects.amove_node(node=self, target=target, position=position)
+
+    async def ainsert_at(self, target, position: Position = Position.LAST_CHILD):
+        """Async version of :meth:`insert_at`"""
+        return await self.__class__.objects.ainsert_node(node=self, target=target, position=position)
+
     @ property
     def is_root_node(self) -> bool:
         """returns True if this is the root of the tree"""
@@ -251,6 +349,12 @@ class Node(Model):
         if self.mptt_rgt is None:
             # node not saved yet
             return 0
+        elif "mptt_descendant_count" in self.__dict__:
+            # annotated by TreeQuerySet.with_descendant_count()
+            return self.mptt_descendant_count
+        elif self.mptt_gap:
+            # sparse numbering; the values don't tell us the count of descendants
+            return self.get_descendants().count()
         else:
             return (self.mptt_rgt - self.mptt_lft - 1) // 2
 
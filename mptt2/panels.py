@@ -0,0 +1,85 @@
+"""Panel for the `django-debug-toolbar <https://django-debug-toolbar.readthedocs.io/>`_.
+
+Add it to the panels of the toolbar to see the structural tree operations of each request::
+
+    DEBUG_TOOLBAR_PANELS = [
+        ...
+        "mptt2.panels.TreeOperationsPanel",
+    ]
+
+"""
+from asyncio import iscoroutinefunction
+from contextvars import ContextVar
+from typing import Optional
+
+from debug_toolbar.panels import Panel
+from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
+
+from mptt2.signals import tree_operation
+
+
+_active_panel: ContextVar[Optional["TreeOperationsPanel"]] = ContextVar("mptt2_tree_operations_panel", default=None)
+
+
+class TreeOperationsPanel(Panel):
+    """Lists the inserts, moves and deletes of tree nodes with there query counts, updated rows and durations"""
+
+    title = _("Tree operations")
+    template = "mptt2/debug_toolbar/tree_operations.html"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._records = []
+
+    @property
+    def nav_subtitle(self):
+        records = self.get_stats().get("operations", [])
+        return ngettext("%(count)d operation in %(duration).2fms", "%(count)d operations in %(duration).2fms",
+                        len(records)) % {"count": len(records), "duration": sum(record["duration"] for record in records)}
+
+    def _record(self, sender, record, **kwargs):
+        # the receiver is connected globally; only the operations in the context of this request belong to this
+        # panel. The context follows the request across threads of sync_to_async and async tasks.
+        if _active_panel.get() is self:
+            self._records.append(record)
+
+    def process_request(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self._aprocess_request(request)
+        token = _active_panel.set(self)
+        try:
+            return super().process_request(request)
+        finally:
+            _active_panel.reset(token)
+
+    async def _aprocess_request(self, request):
+        token = _active_panel.set(self)
+        try:
+            return await super().process_request(request)
+        finally:
+            _active_panel.reset(token)
+
+    def enable_instrumentation(self):
+        tree_operation.connect(self._record, dispatch_uid=f"mptt2_panel_{id(self)}")
+
+    def disable_instrumentation(self):
+        tree_operation.disconnect(dispatch_uid=f"mptt2_panel_{id(self)}")
+
+    def generate_stats(self, request, response):
+        self.record_stats({
+            "operations": [
+                {
+                    "model": record.model._meta.label,
+                    "operation": str(record.operation),
+                    "tree_id": record.tree_id,
+                    "position": record.position,
+                    "subtree_width": record.subtree_width,
+                    "rows": record.rows,
+                    "rows_total": sum(record.rows),
+                    "query_count": record.query_count,
+                    "duration": record.duration * 1000,
+                }
+                for record in self._records
+            ]
+        })
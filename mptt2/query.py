@@ -1,8 +1,20 @@
-from typing import Any, Dict, Tuple
+from functools import reduce
+from operator import or_
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Tuple
 
-from django.db.models.expressions import CombinedExpression, F, OuterRef
+from django.db.models.aggregates import Aggregate, Count
+from django.db.models.expressions import CombinedExpression, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.db.models.query import QuerySet
 from django.db.models.query_utils import Q
+from django.db.transaction import atomic
+from django.utils.translation import gettext as _
+
+from mptt2.enums import TreeEvent
+from mptt2.exceptions import TreeEditInProgress
+from mptt2.expressions import ChildCount, DescendantCount, IsLeaf, SubtreeWidth
+from mptt2.session import has_tree_edit_session
+from mptt2.snapshot import TreeSnapshot
 
 
 class ConvertableQuery(Q):
@@ -44,7 +56,7 @@ class RootQuery(SameTreeQuery):
             "mptt_parent": None,
         }
         if of:
-            init_kwargs.update({"mptt_tree": of.mptt_tree})
+            init_kwargs.update({"mptt_tree": of.mptt_tree_id})
         super().__init__(
             *args,
             **kwargs,
@@ -55,7 +67,7 @@ class RootQuery(SameTreeQuery):
 class SameNodeQuery(SameTreeQuery):
     def __init__(self, of, *args: Any, **kwargs: Any) -> None:
         super().__init__(
-            mptt_tree=of.mptt_tree,
+            mptt_tree=of.mptt_tree_id,
             mptt_lft=of.mptt_lft,
             mptt_rgt=of.mptt_rgt,
             *args,
@@ -71,7 +83,7 @@ class ParentQuery(SameTreeQuery):
         }
         if of:
             init_kwargs.update({
-                "mptt_tree": of.mptt_tree,
+                "mptt_tree": of.mptt_tree_id,
                 "mptt_lft": of.mptt_lft - 1,
                 "mptt_rgt": of.mptt_rgt + 1,
             })
@@ -90,7 +102,7 @@ class DescendantsQuery(SameTreeQuery):
             "mptt_rgt__lte" if include_self else "mptt_rgt__lt": of.mptt_rgt if of else F("mptt_rgt"),
         }
         if of:
-            query_kwargs.update({"mptt_tree": of.mptt_tree})
+            query_kwargs.update({"mptt_tree": of.mptt_tree_id})
         super().__init__(
             *args,
             **kwargs,
@@ -105,7 +117,7 @@ class AncestorsQuery(SameTreeQuery):
             "mptt_rgt__gte" if include_self else "mptt_rgt__gt": of.mptt_rgt if of else F("mptt_rgt"),
         }
         if of:
-            query_kwargs.update({"mptt_tree": of.mptt_tree})
+            query_kwargs.update({"mptt_tree": of.mptt_tree_id})
         super().__init__(
             *args,
             **kwargs,
@@ -121,15 +133,19 @@ class FamilyQuery(DescendantsQuery):
 
 
 class ChildrenQuery(DescendantsQuery):
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(mptt_depth=F("mptt_depth") + 1, *args, **kwargs)
+    def __init__(self, of=None, *args: Any, **kwargs: Any) -> None:
+        super().__init__(of=of, mptt_depth=of.mptt_depth + 1 if of else F("mptt_depth") + 1, *args, **kwargs)
 
 
 class SiblingsQuery(ConvertableQuery):
     def __init__(self, of=None, include_self: bool = False, *args: Any, **kwargs: Any) -> None:
-        super().__init__(parent=of.parent if of else F("parent"), *args, **kwargs)
+        query_kwargs: Dict = {"mptt_parent": of.mptt_parent_id if of else F("mptt_parent")}
+        if of:
+            # root nodes have no parent; they are only siblings of themselves
+            query_kwargs.update({"mptt_tree": of.mptt_tree_id})
+        super().__init__(*args, **kwargs, **query_kwargs)
         if not include_self:
-            self.add(data=~ConvertableQuery(pk=F("pk")), conn_type=self.AND)
+            self.add(data=~ConvertableQuery(pk=of.pk if of else F("pk")), conn_type=self.AND)
 
 
 class RightSiblingsWithDescendants(SameTreeQuery):
@@ -138,7 +154,7 @@ class RightSiblingsWithDescendants(SameTreeQuery):
             "mptt_rgt__gte" if include_self else "mptt_rgt__gt": of.mptt_rgt if of else F("mptt_rgt"),
         }
         if of:
-            init_kwargs.update({"mptt_tree": of.mptt_tree})
+            init_kwargs.update({"mptt_tree": of.mptt_tree_id})
         super().__init__(
             *args,
             **kwargs,
@@ -153,18 +169,444 @@ class LeafNodesQuery(DescendantsQuery):
 class IsDescendantOfQuery(SameTreeQuery):
     def __init__(self, of, include_self: bool = False, *args: Any, **kwargs: Any) -> None:
         query_kwargs: Dict = {
-            "mptt_tree": of.mptt_tree,
+            "mptt_tree": of.mptt_tree_id,
             "mptt_lft__gte" if include_self else "mptt_lft__gt": of.mptt_lft,
             "mptt_rgt__lte" if include_self else "mptt_rgt__lt": of.mptt_rgt
         }
         super().__init__(*args, **kwargs, **query_kwargs)
 
 
+def descendant_ranges(bounds: Dict[int, List[Tuple[int, int]]], include_self: bool = False) -> List[Q]:
+    """Merges the intervals of the given nodes to disjoint ranges per tree and returns a filter for each of them.
+
+    :param bounds: The ``(lft, rgt)`` pairs of the nodes per tree id, ordered by the left value.
+    :type bounds: Dict[int, List[Tuple[int, int]]]
+
+    :param include_self: switch to include the nodes itself (Default: ``False``)
+    :type include_self: bool, optional
+    """
+    ranges = []
+    for tree_id, tree_bounds in bounds.items():
+        merged: List[List[int]] = []
+        for lft, rgt in tree_bounds:
+            if merged and lft < merged[-1][1]:
+                # descendant of an already selected node
+                continue
+            if include_self and merged and lft == merged[-1][1] + 1:
+                # direct right neighbour; both intervals can be combined
+                merged[-1][1] = rgt
+                continue
+            merged.append([lft, rgt])
+        ranges.extend(
+            Q(mptt_tree_id=tree_id, mptt_lft__range=(lft, rgt)) if include_self else
+            Q(mptt_tree_id=tree_id, mptt_lft__gt=lft, mptt_lft__lt=rgt)
+            for lft, rgt in merged
+        )
+    return ranges
+
+
 class TreeQuerySet(QuerySet):
 
-    def delete(self):
-        # TODO: if this function is called, we need to analyze the nodes of the queryset first and update the tree(s).
-        raise NotImplementedError("Delete MPTT nodes in bulk is not supported for now. Please delete a single node. All descendants will also be deleted as well.")
+    delete_chunk_size: int = 500
+    """The count of disjoint subtrees which are deleted with a single query"""
 
-    def with_descendant_count(self):
-        self.annotate(descendant_count=F("mptt_rgt") - F("mptt_lft") // 2)
+    def delete(self):
+        """Deletes the nodes of this queryset and all of there descendants.
+
+        The selected nodes are reduced to disjoint subtrees per tree first. After deleting them, the gaps of each
+        tree are closed with a single update query. Trees which lost there root node are deleted as well.
+        """
+        self._not_support_combined_queries("delete")
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+        if self.query.distinct or self.query.distinct_fields:
+            raise TypeError("Cannot call delete() after .distinct().")
+        if self._fields is not None:
+            raise TypeError("Cannot call delete() after .values() or .values_list()")
+        if has_tree_edit_session(self.model):
+            raise TreeEditInProgress(
+                "Delete MPTT nodes in bulk is not supported inside a tree edit session. Please delete a single node.")
+
+        manager = self.model.objects
+        deleted, rows_count = 0, {}
+        with atomic(using=self.db, savepoint=False):
+            manager.db_manager(self.db)._lock_trees(self.order_by().values_list("mptt_tree_id", flat=True).distinct())
+            subtrees: Dict[int, List[Tuple[int, int, Any]]] = {}
+            for tree_id, lft, rgt, parent_id in self.order_by("mptt_tree_id", "mptt_lft").values_list(
+                    "mptt_tree_id", "mptt_lft", "mptt_rgt", "mptt_parent_id"):
+                tree_subtrees = subtrees.setdefault(tree_id, [])
+                if tree_subtrees and lft < tree_subtrees[-1][1]:
+                    # descendant of an already selected node
+                    continue
+                tree_subtrees.append((lft, rgt, parent_id))
+
+            self._result_cache = None
+            if not subtrees:
+                return 0, {}
+
+            ranges = [
+                Q(mptt_tree_id=tree_id, mptt_lft__range=(lft, rgt))
+                for tree_id, tree_subtrees in subtrees.items()
+                for lft, rgt, _ in tree_subtrees
+            ]
+            for index in range(0, len(ranges), self.delete_chunk_size):
+                chunk_deleted, chunk_rows_count = QuerySet.delete(
+                    manager.db_manager(self.db).filter(reduce(or_, ranges[index:index + self.delete_chunk_size])))
+                deleted += chunk_deleted
+                for label, count in chunk_rows_count.items():
+                    rows_count[label] = rows_count.get(label, 0) + count
+
+            deleted_trees = []
+            for tree_id, tree_subtrees in subtrees.items():
+                if tree_subtrees[0][2] is None:
+                    deleted_trees.append(tree_id)
+                elif self.model.mptt_gap:
+                    manager.db_manager(self.db)._collapse_leafs(
+                        parent_id for _, _, parent_id in tree_subtrees)
+                else:
+                    manager.db_manager(self.db)._close_gaps(
+                        tree_id=tree_id, ranges=[(lft, rgt) for lft, rgt, _ in tree_subtrees])
+
+            if deleted_trees:
+                from mptt2.models import Tree
+                Tree.objects.using(self.db).filter(pk__in=deleted_trees).delete()
+
+        return deleted, rows_count
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def _check_tree_edit_session(self):
+        # the trees of the queryset are unknown before it is evaluated, so any session of the model is rejected
+        if has_tree_edit_session(self.model):
+            raise TreeEditInProgress(
+                _("The nested set values of the edited trees are stale until the active tree edit session ends."))
+
+    def _bounds_queryset(self) -> QuerySet:
+        return self.order_by("mptt_tree_id", "mptt_lft").values_list("mptt_tree_id", "mptt_lft", "mptt_rgt")
+
+    @staticmethod
+    def _collect_bounds(rows: Iterable[Tuple[int, int, int]]) -> Dict[int, List[Tuple[int, int]]]:
+        bounds: Dict[int, List[Tuple[int, int]]] = {}
+        for tree_id, lft, rgt in rows:
+            bounds.setdefault(tree_id, []).append((lft, rgt))
+        return bounds
+
+    def _get_bounds(self) -> Dict[int, List[Tuple[int, int]]]:
+        return self._collect_bounds(self._bounds_queryset())
+
+    async def _aget_bounds(self) -> Dict[int, List[Tuple[int, int]]]:
+        return self._collect_bounds([row async for row in self._bounds_queryset()])
+
+    def _filter_by_ranges(self, ranges: List[Q]) -> QuerySet:
+        manager = self.model.objects.db_manager(self.db)
+        return manager.filter(reduce(or_, ranges)) if ranges else manager.none()
+
+    def _ancestors_of_bounds(self, bounds: Dict[int, List[Tuple[int, int]]], include_self: bool) -> QuerySet:
+        ranges = []
+        for tree_id, tree_bounds in bounds.items():
+            deepest: List[Tuple[int, int]] = []
+            for lft, rgt in tree_bounds:
+                # the ancestors of an ancestor are part of the ancestors of the current node anyway
+                while deepest and deepest[-1][1] >= rgt:
+                    deepest.pop()
+                deepest.append((lft, rgt))
+            ranges.extend(
+                Q(mptt_tree_id=tree_id, mptt_lft__lte=lft, mptt_rgt__gte=rgt) if include_self else
+                Q(mptt_tree_id=tree_id, mptt_lft__lt=lft, mptt_rgt__gt=rgt)
+                for lft, rgt in deepest
+            )
+        return self._filter_by_ranges(ranges)
+
+    def get_descendants(self, include_self: bool = False) -> QuerySet:
+        """Returns the descendants of all nodes of this queryset with a single query.
+
+        The intervals of the selected nodes are merged to disjoint intervals per tree first, so nodes which are
+        descendants of other selected nodes don't enlarge the query.
+
+        :param include_self: switch to include the nodes of this queryset (Default: ``False``)
+        :type include_self: bool, optional
+
+        :rtype: :class:`mptt2.query.TreeQuerySet`
+        """
+        self._check_tree_edit_session()
+        ranges = descendant_ranges(self._get_bounds(), include_self=include_self)
+        return self._filter_by_ranges(ranges)
+
+    def get_ancestors(self, include_self: bool = False) -> QuerySet:
+        """Returns the ancestors of all nodes of this queryset with a single query.
+
+        :param include_self: switch to include the nodes of this queryset (Default: ``False``)
+        :type include_self: bool, optional
+
+        :rtype: :class:`mptt2.query.TreeQuerySet`
+        """
+        self._check_tree_edit_session()
+        return self._ancestors_of_bounds(self._get_bounds(), include_self=include_self)
+
+    async def aget_descendants(self, include_self: bool = False) -> QuerySet:
+        """Async version of :meth:`get_descendants`, which fetches the intervals with the async ORM."""
+        self._check_tree_edit_session()
+        ranges = descendant_ranges(await self._aget_bounds(), include_self=include_self)
+        return self._filter_by_ranges(ranges)
+
+    async def aget_ancestors(self, include_self: bool = False) -> QuerySet:
+        """Async version of :meth:`get_ancestors`, which fetches the intervals with the async ORM."""
+        self._check_tree_edit_session()
+        return self._ancestors_of_bounds(await self._aget_bounds(), include_self=include_self)
+
+    def ancestors_by_node(self, include_self: bool = False) -> Dict:
+        """Returns a mapping of every node of this queryset to the list of its ancestors ordered from the root.
+
+        Only two queries are needed, one for the nodes and one for all of there ancestors. Use it to render
+        breadcrumbs for a list of nodes.
+
+        :param include_self: switch to append the node itself to its list of ancestors (Default: ``False``)
+        :type include_self: bool, optional
+
+        :rtype: Dict[:class:`mptt2.models.Node`, List[:class:`mptt2.models.Node`]]
+        """
+        self._check_tree_edit_session()
+        nodes = list(self.order_by("mptt_tree_id", "mptt_lft"))
+        ancestors = list(self._ancestors_of_nodes(nodes))
+        return self._map_ancestors(nodes, ancestors, include_self=include_self)
+
+    async def aancestors_by_node(self, include_self: bool = False) -> Dict:
+        """Async version of :meth:`ancestors_by_node`, which fetches the nodes with the async ORM."""
+        self._check_tree_edit_session()
+        nodes = [node async for node in self.order_by("mptt_tree_id", "mptt_lft")]
+        ancestors = [ancestor async for ancestor in self._ancestors_of_nodes(nodes)]
+        return self._map_ancestors(nodes, ancestors, include_self=include_self)
+
+    def _ancestors_of_nodes(self, nodes: List) -> QuerySet:
+        bounds = self._collect_bounds((node.mptt_tree_id, node.mptt_lft, node.mptt_rgt) for node in nodes)
+        return self._ancestors_of_bounds(bounds, include_self=False).order_by("mptt_tree_id", "mptt_lft")
+
+    @staticmethod
+    def _map_ancestors(nodes: List, ancestors: List, include_self: bool) -> Dict:
+        mapping = {}
+        stack: List = []
+        index = 0
+        for node in nodes:
+            while index < len(ancestors) and (ancestors[index].mptt_tree_id, ancestors[index].mptt_lft) < (node.mptt_tree_id, node.mptt_lft):
+                ancestor = ancestors[index]
+                while stack and (stack[-1].mptt_tree_id != ancestor.mptt_tree_id or stack[-1].mptt_rgt < ancestor.mptt_lft):
+                    stack.pop()
+                stack.append(ancestor)
+                index += 1
+            path = [ancestor for ancestor in stack
+                    if ancestor.mptt_tree_id == node.mptt_tree_id and ancestor.mptt_rgt > node.mptt_rgt]
+            mapping[node] = path + [node] if include_self else path
+        return mapping
+
+    def iter_tree(self,
+                  chunk_size: int = 2000,
+                  after: Tuple[int, int] = None,
+                  events: bool = False) -> Iterator:
+        """Streams the nodes of this queryset in preorder with keyset pagination over ``(mptt_tree_id, mptt_lft)``.
+
+        Every chunk is fetched with a range condition on the last seen key instead of an offset, so the query
+        costs stay the same for every chunk and only one chunk is held in memory.
+
+        :param chunk_size: The count of nodes which are fetched with a single query. (Default: ``2000``)
+        :type chunk_size: int, optional
+
+        :param after: A ``(tree_id, lft)`` checkpoint to resume a previous iteration. Only the nodes after it are
+                      yielded. Use the ``mptt_tree_id`` and ``mptt_lft`` of the last processed node as checkpoint.
+                      (Default: ``None``)
+        :type after: Tuple[int, int], optional
+
+        :param events: switch to yield ``(event, node)`` pairs with :class:`mptt2.enums.TreeEvent` values instead
+                       of the nodes. The events are derived from the depth of the nodes; ancestors of the checkpoint
+                       are not left after a resume. (Default: ``False``)
+        :type events: bool, optional
+        """
+        self._check_tree_edit_session()
+        open_nodes: List = []
+        while True:
+            chunk = list(self._tree_chunk(chunk_size, after))
+            yield from self._tree_items(chunk, open_nodes, events)
+            if len(chunk) < chunk_size:
+                break
+            after = (chunk[-1].mptt_tree_id, chunk[-1].mptt_lft)
+
+        while open_nodes:
+            yield TreeEvent.LEAVE, open_nodes.pop()
+
+    async def aiter_tree(self,
+                         chunk_size: int = 2000,
+                         after: Tuple[int, int] = None,
+                         events: bool = False) -> AsyncIterator:
+        """Async version of :meth:`iter_tree`, which fetches the chunks with the async ORM.
+
+        .. code-block:: python
+
+           async for node in Genre.objects.all().aiter_tree():
+               ...
+
+        """
+        self._check_tree_edit_session()
+        open_nodes: List = []
+        while True:
+            chunk = [node async for node in self._tree_chunk(chunk_size, after)]
+            for item in self._tree_items(chunk, open_nodes, events):
+                yield item
+            if len(chunk) < chunk_size:
+                break
+            after = (chunk[-1].mptt_tree_id, chunk[-1].mptt_lft)
+
+        while open_nodes:
+            yield TreeEvent.LEAVE, open_nodes.pop()
+
+    def _tree_chunk(self, chunk_size: int, after: Tuple[int, int] = None) -> QuerySet:
+        chunk = self.order_by("mptt_tree_id", "mptt_lft")
+        if after is not None:
+            tree_id, lft = after
+            chunk = chunk.filter(Q(mptt_tree_id__gt=tree_id) | Q(mptt_tree_id=tree_id, mptt_lft__gt=lft))
+        return chunk[:chunk_size]
+
+    @staticmethod
+    def _tree_items(chunk: List, open_nodes: List, events: bool) -> Iterator:
+        for node in chunk:
+            if events:
+                while open_nodes and (open_nodes[-1].mptt_tree_id != node.mptt_tree_id or
+                                      open_nodes[-1].mptt_depth >= node.mptt_depth):
+                    yield TreeEvent.LEAVE, open_nodes.pop()
+                open_nodes.append(node)
+                yield TreeEvent.ENTER, node
+            else:
+                yield node
+
+    def as_tree(self) -> List:
+        """Fetches the nodes of this queryset with one query and links them to a tree in memory.
+
+        The children of each fetched node and the parent of each node are cached on the instances, so
+        ``get_children``, ``mptt_parent`` and ``get_ancestors`` of them don't hit the database again. Children are
+        only cached, if all descendants of a node are part of the queryset, like it is the case for
+        ``node.get_descendants(include_self=True)``.
+
+        :returns: the top level nodes of the fetched trees, which are the nodes whose parent is not part of the
+                  queryset
+        :rtype: List[:class:`mptt2.models.Node`]
+        """
+        self._check_tree_edit_session()
+        return self._link_tree(self.order_by("mptt_tree_id", "mptt_lft"))
+
+    async def aas_tree(self) -> List:
+        """Async version of :meth:`as_tree`, which fetches the nodes with the async ORM."""
+        self._check_tree_edit_session()
+        return self._link_tree([node async for node in self.order_by("mptt_tree_id", "mptt_lft")])
+
+    def _link_tree(self, nodes: Iterable) -> List:
+        parent_field = self.model._meta.get_field("mptt_parent")
+        top_level_nodes = []
+        stack: List = []
+
+        def close(node):
+            # node is complete now; only cache the children if none of the descendants is missing
+            if node.mptt_rgt - node.mptt_lft == 1 or (
+                    not self.model.mptt_gap and node._mptt_fetched_descendants == (node.mptt_rgt - node.mptt_lft - 1) // 2):
+                node._mptt_cached_children = node._mptt_fetched_children
+            del node._mptt_fetched_children, node._mptt_fetched_descendants
+
+        for node in nodes:
+            while stack and (stack[-1].mptt_tree_id != node.mptt_tree_id or stack[-1].mptt_rgt < node.mptt_lft):
+                closed = stack.pop()
+                if stack:
+                    stack[-1]._mptt_fetched_descendants += closed._mptt_fetched_descendants + 1
+                close(closed)
+
+            node._mptt_fetched_children = []
+            node._mptt_fetched_descendants = 0
+            if stack and stack[-1].pk == node.mptt_parent_id:
+                stack[-1]._mptt_fetched_children.append(node)
+                parent_field.set_cached_value(node, stack[-1])
+            else:
+                top_level_nodes.append(node)
+            stack.append(node)
+
+        while stack:
+            closed = stack.pop()
+            if stack:
+                stack[-1]._mptt_fetched_descendants += closed._mptt_fetched_descendants + 1
+            close(closed)
+
+        return top_level_nodes
+
+    def snapshot(self) -> "TreeSnapshot":
+        """Fetches the structure of the nodes of this queryset with one query into a :class:`mptt2.snapshot.TreeSnapshot`,
+        which answers tree queries without database access.
+
+        :rtype: :class:`mptt2.snapshot.TreeSnapshot`
+        """
+        self._check_tree_edit_session()
+        return TreeSnapshot.from_queryset(self)
+
+    def add_related_aggregate(self,
+                              related_model,
+                              fk_field: str,
+                              aggregate: Aggregate,
+                              cumulative: bool = True,
+                              name: str = None) -> QuerySet:
+        """Annotates an aggregate over the related objects of each node, by default including the related objects
+        of all descendants.
+
+        The aggregate is calculated by a correlated subquery, which joins the related rows to there nodes and
+        filters them by the ``(mptt_tree_id, mptt_lft)`` range of the annotated node. So the whole result is
+        fetched with a single statement, regardless of the count of nodes.
+
+        .. code-block:: python
+
+           Category.objects.add_related_aggregate(Product, "category", Count("pk"), name="product_count")
+
+        :param related_model: The model of the related objects. Pass a queryset to aggregate only some of them.
+        :type related_model: :class:`django.db.models.Model` or :class:`django.db.models.QuerySet`
+
+        :param fk_field: The name of the foreign key field of the related model, which points to the nodes.
+        :type fk_field: str
+
+        :param aggregate: The aggregate over the fields of the related model, like ``Count("pk")`` or
+                          ``Sum("price")``. ``Count`` returns ``0`` for nodes without related objects.
+        :type aggregate: :class:`django.db.models.Aggregate`
+
+        :param cumulative: switch to include the related objects of the descendants (Default: ``True``)
+        :type cumulative: bool, optional
+
+        :param name: The name of the annotation. (Default: ``<related model name>_<aggregate alias>``)
+        :type name: str, optional
+
+        :rtype: :class:`mptt2.query.TreeQuerySet`
+        """
+        related = related_model if isinstance(related_model, QuerySet) else related_model._default_manager.all()
+        if cumulative:
+            related = related.filter(**{
+                f"{fk_field}__mptt_tree": OuterRef("mptt_tree"),
+                f"{fk_field}__mptt_lft__gte": OuterRef("mptt_lft"),
+                f"{fk_field}__mptt_lft__lte": OuterRef("mptt_rgt"),
+            })
+        else:
+            related = related.filter(**{fk_field: OuterRef("pk")})
+
+        # all related rows of the subquery belong to the same tree; so the grouping results in a single row
+        expression = Subquery(
+            related.order_by().values(f"{fk_field}__mptt_tree").annotate(mptt_aggregate=aggregate).values("mptt_aggregate"))
+        if isinstance(aggregate, Count):
+            expression = Coalesce(expression, 0)
+        name = name or f"{related.model._meta.model_name}_{aggregate.default_alias}"
+        return self.annotate(**{name: expression})
+
+    def with_descendant_count(self) -> QuerySet:
+        """annotates the count of descendants as ``mptt_descendant_count``"""
+        return self.annotate(mptt_descendant_count=DescendantCount())
+
+    def with_child_count(self) -> QuerySet:
+        """annotates the count of children as ``mptt_child_count``"""
+        return self.annotate(mptt_child_count=ChildCount())
+
+    def with_is_leaf(self) -> QuerySet:
+        """annotates if the node is a leaf node as ``mptt_is_leaf``"""
+        return self.annotate(mptt_is_leaf=IsLeaf())
+
+    def with_subtree_width(self) -> QuerySet:
+        """annotates the width of the subtree as ``mptt_subtree_width``"""
+        return self.annotate(mptt_subtree_width=SubtreeWidth())
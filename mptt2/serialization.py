@@ -0,0 +1,291 @@
+import json
+from typing import Dict, IO, Iterable, Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.transaction import atomic
+from django.utils.translation import gettext as _
+
+
+def get_serializable_fields(model) -> List:
+    """returns the concrete fields of the model without the primary key and the mptt fields"""
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and not field.name.startswith("mptt_")
+    ]
+
+
+def iter_records(queryset, chunk_size: int = 2000) -> Iterator[Dict]:
+    """Streams the nodes of the queryset in preorder as ``{"id": ..., "depth": ..., "fields": {...}}`` records.
+
+    The nodes are fetched with a server-side cursor where the database supports it.
+    """
+    fields = get_serializable_fields(queryset.model)
+    for node in queryset.order_by("mptt_tree_id", "mptt_lft").iterator(chunk_size=chunk_size):
+        yield {
+            "id": node.pk,
+            "depth": node.mptt_depth,
+            "fields": {field.attname: field.value_from_object(node) for field in fields},
+        }
+
+
+def write_ndjson(records: Iterable[Dict], stream: IO):
+    """writes one json object per line"""
+    for record in records:
+        stream.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+
+
+def write_nested_json(records: Iterable[Dict], stream: IO):
+    """Writes the preorder records as nested json list, where every node holds the list of its children.
+
+    Only the ancestors of the current record are kept open, so the memory does not grow with the tree.
+    """
+    open_depths: List[int] = []
+    stream.write("[")
+    has_sibling = False
+    for record in records:
+        while open_depths and open_depths[-1] >= record["depth"]:
+            open_depths.pop()
+            stream.write("]}")
+            has_sibling = True
+        if has_sibling:
+            stream.write(",")
+        # the object is left open to write the children into it
+        stream.write('{"id": %s, "depth": %s, "fields": %s, "children": [' % (
+            json.dumps(record["id"], cls=DjangoJSONEncoder),
+            json.dumps(record["depth"]),
+            json.dumps(record["fields"], cls=DjangoJSONEncoder)))
+        open_depths.append(record["depth"])
+        has_sibling = False
+    stream.write("]}" * len(open_depths) + "]")
+
+
+class _JsonReader:
+    """Reads the tokens of a json document from a text stream, which is buffered in chunks."""
+
+    def __init__(self, stream: IO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def _error(self, expected: str):
+        return ValueError(_("Invalid nested json: expected %(expected)s, found %(found)r.") % {
+            "expected": expected, "found": self.buffer[self.position:self.position + 20]})
+
+    def peek(self) -> str:
+        """skips the whitespace and returns the next character without consuming it, or an empty string at the end"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, characters: str) -> str:
+        """consumes and returns the next character, which needs to be one of the given characters"""
+        character = self.peek()
+        if not character or character not in characters:
+            raise self._error(" or ".join(characters))
+        self.position += 1
+        return character
+
+    def value(self):
+        """consumes and returns the next json value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise self._error(_("a value"))
+            # a number may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_nested_json_records(stream: IO, chunk_size: int = 65536) -> Iterator[Dict]:
+    """Parses a nested json document incrementally to preorder records.
+
+    Only the current record is held in memory besides a chunk of the stream. The ``children`` of a node need to be
+    its last key, like :func:`write_nested_json` writes them. Other keys than ``id``, ``fields`` and ``children``
+    are ignored; the depth is taken from the nesting.
+    """
+    reader = _JsonReader(stream, chunk_size)
+    reader.expect("[")
+    # one entry per open list of nodes; True until the first node of the list is read
+    lists = [True]
+    while lists:
+        if lists[-1] and reader.peek() != "]":
+            lists[-1] = False
+        elif reader.expect(",]") == "]":
+            lists.pop()
+            if lists:
+                # the children are the last key of the parent object
+                reader.expect("}")
+            continue
+
+        record = {"id": None, "depth": len(lists) - 1, "fields": {}}
+        has_children = False
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.expect("}")
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                if key == "children":
+                    reader.expect("[")
+                    has_children = True
+                    break
+                value = reader.value()
+                if key in ["id", "fields"]:
+                    record[key] = value
+                if reader.expect(",}") == "}":
+                    break
+        yield record
+        if has_children:
+            lists.append(True)
+
+    if reader.peek():
+        raise reader._error(_("the end of the document"))
+
+
+class TreeImporter:
+    """Imports preorder records as new trees with bounded memory.
+
+    The records are written with chunked ``bulk_create`` calls as they arrive. Every node is created with a
+    provisional right value of ``lft + 1``, which satisfies the check constraint, and with its parent, if the parent
+    was written by a previous chunk. The parents of the other nodes of a chunk and the final right values of the
+    inner nodes, which are known once there subtrees end, are written with chunked ``bulk_update`` calls. At most
+    ``batch_size`` nodes are held in memory besides the path of the current node.
+    """
+
+    def __init__(self, manager, batch_size: int = 1000) -> None:
+        self.manager = manager
+        self.model = manager.model
+        self.batch_size = batch_size
+        self.fields = {field.attname: field for field in get_serializable_fields(self.model)}
+        self.gap = self.model.mptt_gap
+        self.pending_nodes: List = []
+        self.pending_parents: List = []
+        self.pending_rgts: List = []
+        self.open_nodes: List = []
+        self.tree_id = None
+        self.count = 0
+        self.last = 0
+
+    def _build_node(self, record: Dict):
+        node = self.model()
+        for name, value in record.get("fields", {}).items():
+            if name not in self.fields:
+                raise ValueError(_("%(model)s has no field %(field)s.") % {"model": self.model._meta.label, "field": name})
+            setattr(node, name, self.fields[name].to_python(value))
+        return node
+
+    def _close(self, node):
+        if self.last == node.mptt_lft:
+            # leaf; the provisional value is already the final one
+            self.last = node.mptt_lft + 1
+            return
+        self.last += self.gap + 1
+        node.mptt_rgt = self.last
+        if node._mptt_pending:
+            return
+        self.pending_rgts.append(node)
+        if len(self.pending_rgts) >= self.batch_size:
+            self._flush_rgts()
+
+    def _flush_nodes(self):
+        if not self.pending_nodes:
+            return
+        self.manager.bulk_create(self.pending_nodes, batch_size=self.batch_size)
+        if not connections[self.manager.db].features.can_return_rows_from_bulk_insert:
+            self.manager._fetch_bulk_created_pks(self.pending_nodes)
+        for node in self.pending_nodes:
+            node._mptt_pending = False
+        self.pending_nodes = []
+
+        # the parents of these nodes are part of the same chunk and got there primary keys just now
+        for node, parent in self.pending_parents:
+            node.mptt_parent_id = parent.pk
+        self.manager.bulk_update([node for node, _parent in self.pending_parents], ["mptt_parent"], batch_size=self.batch_size)
+        self.pending_parents = []
+
+    def _flush_rgts(self):
+        self._flush_nodes()
+        self.manager.bulk_update(self.pending_rgts, ["mptt_rgt"], batch_size=self.batch_size)
+        self.pending_rgts = []
+
+    def add(self, record: Dict):
+        """adds the next record in preorder"""
+        depth = record["depth"]
+        while self.open_nodes and self.open_nodes[-1].mptt_depth >= depth:
+            self._close(self.open_nodes.pop())
+        if not self.open_nodes:
+            if depth != 0:
+                raise ValueError(_("The first node of a tree needs a depth of 0."))
+            self.tree_id = self.manager._create_trees(1)[0].pk
+            self.last = -self.gap
+        elif depth != self.open_nodes[-1].mptt_depth + 1:
+            raise ValueError(_("The depth of a node may only be one greater than the depth of the node before."))
+
+        node = self._build_node(record)
+        self.last += self.gap + 1
+        node.mptt_tree_id = self.tree_id
+        node.mptt_lft = self.last
+        node.mptt_rgt = self.last + 1
+        node.mptt_depth = depth
+        node._mptt_pending = True
+        if self.open_nodes:
+            parent = self.open_nodes[-1]
+            if parent._mptt_pending:
+                self.pending_parents.append((node, parent))
+            else:
+                node.mptt_parent_id = parent.pk
+        self.open_nodes.append(node)
+        self.pending_nodes.append(node)
+        self.count += 1
+        if len(self.pending_nodes) >= self.batch_size:
+            self._flush_nodes()
+
+    def finish(self):
+        """closes the open subtrees and writes the pending values"""
+        while self.open_nodes:
+            self._close(self.open_nodes.pop())
+        self._flush_rgts()
+
+
+def import_records(manager, records: Iterable[Dict], batch_size: int = 1000) -> int:
+    """Imports the given preorder records as new trees and returns the count of imported nodes.
+
+    :param manager: The tree manager of the node model
+    :type manager: :class:`mptt2.managers.TreeManager`
+
+    :param records: The records in preorder, like they are yielded by :func:`iter_records`
+    :type records: Iterable[Dict]
+
+    :param batch_size: The count of rows which are written with a single query. (Default: ``1000``)
+    :type batch_size: int, optional
+    """
+    with atomic(using=manager.db):
+        importer = TreeImporter(manager=manager, batch_size=batch_size)
+        for record in records:
+            importer.add(record)
+        importer.finish()
+    return importer.count
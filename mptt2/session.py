@@ -0,0 +1,218 @@
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional
+
+from django.db.transaction import atomic
+from django.utils.translation import gettext as _
+
+from mptt2.enums import Position
+from mptt2.exceptions import InvalidInsert, InvalidMove, TreeEditInProgress
+from mptt2.identity import tracked_nodes_by_pk
+from mptt2.utils import iter_nested_set_values
+
+
+_active_sessions: ContextVar[Dict] = ContextVar("mptt2_tree_edit_sessions", default={})
+
+
+def _session_key(model, tree_id):
+    return model._meta.concrete_model._meta.label, tree_id
+
+
+def get_tree_edit_session(model, tree_id) -> Optional["TreeEditSession"]:
+    """returns the active tree edit session for the given tree or None"""
+    return _active_sessions.get().get(_session_key(model, tree_id))
+
+
+def has_tree_edit_session(model) -> bool:
+    """returns True if there is any active tree edit session for the given model"""
+    label = model._meta.concrete_model._meta.label
+    return any(key[0] == label for key in _active_sessions.get())
+
+
+class TreeEditSession:
+    """Context manager which defers the nested set maintenance of the given trees.
+
+    While the session is active, ``insert_node``, ``move_node`` and ``Node.delete`` only update the parent pointers
+    of the nodes. The order of siblings is tracked in memory. On exit the nested set values of every tree of the
+    session are recalculated once and only the changed rows are written with chunked ``bulk_update`` calls.
+
+    Tree queries on nodes of the edited trees raise :class:`mptt2.exceptions.TreeEditInProgress` inside the session,
+    because the nested set values are stale until the session ends.
+
+    Use it with :meth:`mptt2.managers.TreeManager.tree_edit`:
+
+    .. code-block:: python
+
+       with Genre.objects.tree_edit(rock.mptt_tree):
+           for name in names:
+               Genre(name=name).insert_at(target=rock)
+
+    """
+
+    def __init__(self, manager, trees: Iterable, batch_size: int = 1000) -> None:
+        self.manager = manager
+        self.model = manager.model
+        self.tree_ids = [getattr(tree, "pk", tree) for tree in trees]
+        self.batch_size = batch_size
+        self.roots: Dict[int, List] = {}
+        self.children: Dict = {}
+        self.parents: Dict = {}
+        self.trees: Dict = {}
+        self.old_values: Dict = {}
+        self.instances: Dict = {}
+        self.deleted_trees: List[int] = []
+
+    def __enter__(self):
+        sessions = dict(_active_sessions.get())
+        for tree_id in self.tree_ids:
+            key = _session_key(self.model, tree_id)
+            if key in sessions:
+                raise TreeEditInProgress(_("There is already an active tree edit session for tree %s.") % tree_id)
+            sessions[key] = self
+
+        self._atomic = atomic(using=self.manager.db)
+        self._atomic.__enter__()
+        try:
+            self.manager._lock_trees(self.tree_ids)
+            for tree_id in self.tree_ids:
+                self.roots.setdefault(tree_id, [])
+            for pk, parent_pk, tree_id, lft, rgt, depth in self.manager.filter(
+                mptt_tree_id__in=self.tree_ids
+            ).order_by("mptt_tree_id", "mptt_lft").values_list(
+                    "pk", "mptt_parent_id", "mptt_tree_id", "mptt_lft", "mptt_rgt", "mptt_depth"):
+                self._add(pk, parent_pk, tree_id)
+                self.old_values[pk] = (tree_id, lft, rgt, depth)
+        except Exception as error:
+            self._atomic.__exit__(type(error), error, error.__traceback__)
+            raise
+        self._token = _active_sessions.set(sessions)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active_sessions.reset(self._token)
+        try:
+            if exc_type is None:
+                self.renumber()
+        except Exception as error:
+            self._atomic.__exit__(type(error), error, error.__traceback__)
+            raise
+        return self._atomic.__exit__(exc_type, exc_value, traceback)
+
+    def _add(self, pk, parent_pk, tree_id, index: int = None):
+        siblings = self.roots[tree_id] if parent_pk is None else self.children.setdefault(parent_pk, [])
+        siblings.insert(len(siblings) if index is None else index, pk)
+        self.parents[pk] = parent_pk
+        self.trees[pk] = tree_id
+
+    def _remove(self, pk):
+        parent_pk = self.parents.pop(pk)
+        siblings = self.roots[self.trees[pk]] if parent_pk is None else self.children[parent_pk]
+        siblings.remove(pk)
+
+    def _iter_subtree(self, pk):
+        stack = [pk]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(self.children.get(current, ()))
+
+    def _add_relative(self, pk, target, position, tree_id):
+        if position in [Position.LAST_CHILD, Position.FIRST_CHILD]:
+            self._add(pk, target.pk, tree_id, index=None if position == Position.LAST_CHILD else 0)
+        else:
+            parent_pk = self.parents[target.pk]
+            siblings = self.children[parent_pk]
+            index = siblings.index(target.pk)
+            self._add(pk, parent_pk, tree_id, index=index if position == Position.LEFT else index + 1)
+
+    def _track(self, node):
+        self.instances.setdefault(node.pk, []).append(node)
+
+    def insert_node(self, node, target, position: Position = Position.LAST_CHILD):
+        """Saves the node with its parent pointer. The nested set values are calculated on exit."""
+        if position in [Position.LEFT, Position.RIGHT] and self.parents[target.pk] is None:
+            raise InvalidInsert(_("You can't insert a second root node."))
+
+        tree_id = self.trees[target.pk]
+        node.mptt_tree_id = tree_id
+        node.mptt_parent_id = target.pk if position in [
+            Position.LAST_CHILD, Position.FIRST_CHILD] else self.parents[target.pk]
+        # placeholder values until the session ends
+        node.mptt_lft = 0
+        node.mptt_rgt = 1
+        node.mptt_depth = 0
+        node.save()
+
+        self._add_relative(node.pk, target, position, tree_id)
+        self.old_values[node.pk] = (tree_id, node.mptt_lft, node.mptt_rgt, node.mptt_depth)
+        self._track(node)
+        self.manager._register(node)
+        return node
+
+    def move_node(self, node, target, position: Position = Position.LAST_CHILD):
+        """Updates the parent pointer of the node. The nested set values are calculated on exit."""
+        if position not in Position:
+            raise ValueError(_("An invalid position was given: %s.") % position)
+        if node.pk not in self.parents or target.pk not in self.parents:
+            raise TreeEditInProgress(
+                _("Both nodes of a move inside a tree edit session need to be part of the edited trees."))
+        if position in [Position.LEFT, Position.RIGHT] and self.parents[target.pk] is None:
+            raise InvalidMove(_("A node may not be made a sibling of a root node."))
+
+        ancestor = target.pk
+        while ancestor is not None:
+            if ancestor == node.pk:
+                raise InvalidMove(_("A node may not be moved into itself or its descendants."))
+            ancestor = self.parents[ancestor]
+
+        was_root = self.parents[node.pk] is None
+        source_tree_id = self.trees[node.pk]
+        tree_id = self.trees[target.pk]
+        self._remove(node.pk)
+        self._add_relative(node.pk, target, position, tree_id)
+        if tree_id != source_tree_id:
+            for pk in self._iter_subtree(node.pk):
+                self.trees[pk] = tree_id
+            if was_root:
+                self.roots.pop(source_tree_id)
+                self.deleted_trees.append(source_tree_id)
+
+        node.mptt_parent_id = self.parents[node.pk]
+        node.save(update_fields=["mptt_parent"])
+        self._track(node)
+        return node
+
+    def delete_node(self, pk):
+        """Removes the subtree of the already deleted node from the session."""
+        subtree = list(self._iter_subtree(pk))
+        self._remove(pk)
+        for descendant in subtree:
+            self.parents.pop(descendant, None)
+            self.trees.pop(descendant, None)
+            self.children.pop(descendant, None)
+            self.old_values.pop(descendant, None)
+            self.instances.pop(descendant, None)
+
+    def renumber(self):
+        """Recalculates the nested set values of all edited trees and writes the changed rows."""
+        changed = []
+        registered = tracked_nodes_by_pk(self.model)
+        for tree_id, roots in self.roots.items():
+            for pk, lft, rgt, depth in iter_nested_set_values(
+                    roots=roots,
+                    get_children=lambda pk: self.children.get(pk, ()),
+                    gap=self.model.mptt_gap):
+                values = (tree_id, lft, rgt, depth)
+                if self.old_values.get(pk) != values:
+                    changed.append(self.model(pk=pk, mptt_tree_id=tree_id, mptt_lft=lft, mptt_rgt=rgt, mptt_depth=depth))
+                for instance in self.instances.get(pk, ()):
+                    instance.mptt_tree_id, instance.mptt_lft, instance.mptt_rgt, instance.mptt_depth = values
+                for instance in registered.get(pk, ()):
+                    instance.mptt_tree_id, instance.mptt_lft, instance.mptt_rgt, instance.mptt_depth = values
+                    instance.mptt_parent_id = self.parents[pk]
+
+        self.manager.bulk_update(
+            changed, fields=["mptt_tree", "mptt_lft", "mptt_rgt", "mptt_depth"], batch_size=self.batch_size)
+
+        if self.deleted_trees:
+            from mptt2.models import Tree
+            Tree.objects.using(self.manager.db).filter(pk__in=self.deleted_trees).delete()
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+
+tree_operation = Signal()
+"""Sent after a structural operation on a tree finished.
+
+The ``sender`` is the node model and the ``record`` argument holds the
+:class:`mptt2.instrumentation.TreeOperationRecord` of the operation. The operation is only measured while there is
+at least one receiver for the model.
+"""
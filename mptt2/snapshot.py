@@ -0,0 +1,153 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+
+class TreeSnapshot:
+    """Read only copy of the structure of one or more trees, which answers tree queries without database access.
+
+    The nested set values are stored in compact ``array`` columns ordered by tree and left value, so a node costs
+    about 48 bytes. Nodes are found by binary search over a sorted copy of the primary keys, which need to be
+    integers. Subtrees are contiguous slices of the columns. Snapshots can be pickled, for example to share them
+    with a cache.
+
+    Build it with :meth:`mptt2.query.TreeQuerySet.snapshot`:
+
+    .. code-block:: python
+
+       snapshot = Folder.objects.filter(mptt_tree=tree).snapshot()
+       if snapshot.is_descendant(document.folder_id, of=shared_folder.pk):
+           ...
+
+    The snapshot is not updated if the trees change afterwards. A snapshot of a part of the trees, like
+    ``node.get_descendants(include_self=True).snapshot()``, only knows the nodes of the queryset. :meth:`parent`
+    returns None for a node whose parent is not part of it; :meth:`ancestors` and :meth:`lowest_common_ancestor` only
+    consider the ancestors which are part of it.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, int, int, int, int]]) -> None:
+        """
+        :param rows: ``(tree_id, pk, lft, rgt, depth)`` tuples ordered by tree id and left value
+        :type rows: Iterable[Tuple]
+        """
+        self._trees = array("i")
+        self._pks = array("q")
+        self._lfts = array("q")
+        self._rgts = array("q")
+        self._depths = array("i")
+        # index of the nearest enclosing node of the snapshot or -1, which is the parent if the depth differs by one
+        self._parents = array("i")
+        stack = []
+        for tree_id, pk, lft, rgt, depth in rows:
+            while stack and (self._trees[stack[-1]] != tree_id or self._rgts[stack[-1]] < lft):
+                stack.pop()
+            self._parents.append(stack[-1] if stack else -1)
+            stack.append(len(self._pks))
+            self._trees.append(tree_id)
+            self._pks.append(pk)
+            self._lfts.append(lft)
+            self._rgts.append(rgt)
+            self._depths.append(depth)
+
+        order = sorted(range(len(self._pks)), key=self._pks.__getitem__)
+        self._sorted_pks = array("q", (self._pks[index] for index in order))
+        self._positions = array("i", order)
+
+    @classmethod
+    def from_queryset(cls, queryset) -> "TreeSnapshot":
+        """builds the snapshot of the nodes of the given queryset with a single query"""
+        return cls(queryset.order_by("mptt_tree_id", "mptt_lft").values_list(
+            "mptt_tree_id", "pk", "mptt_lft", "mptt_rgt", "mptt_depth"))
+
+    def __len__(self) -> int:
+        return len(self._pks)
+
+    def __contains__(self, pk) -> bool:
+        index = bisect_left(self._sorted_pks, pk)
+        return index < len(self._sorted_pks) and self._sorted_pks[index] == pk
+
+    def _index(self, pk: int) -> int:
+        index = bisect_left(self._sorted_pks, pk)
+        if index == len(self._sorted_pks) or self._sorted_pks[index] != pk:
+            raise KeyError(pk)
+        return self._positions[index]
+
+    def _subtree_end(self, index: int) -> int:
+        # the descendants are the following nodes of the same tree whose left value is inside the interval
+        tree_end = bisect_left(self._trees, self._trees[index] + 1, index)
+        return bisect_left(self._lfts, self._rgts[index], index + 1, tree_end)
+
+    def depth(self, pk: int) -> int:
+        """returns the depth of the node"""
+        return self._depths[self._index(pk)]
+
+    def parent(self, pk: int) -> Optional[int]:
+        """returns the primary key of the parent node or None for root nodes and nodes whose parent is not part of the
+        snapshot"""
+        index = self._index(pk)
+        parent = self._parents[index]
+        if parent == -1 or self._depths[parent] != self._depths[index] - 1:
+            return None
+        return self._pks[parent]
+
+    def is_descendant(self, pk: int, of: int, include_self: bool = False) -> bool:
+        """returns True if the node is a descendant of the node ``of``
+
+        :param include_self: switch to count a node as descendant of itself (Default: ``False``)
+        :type include_self: bool, optional
+        """
+        index, ancestor = self._index(pk), self._index(of)
+        if index == ancestor:
+            return include_self
+        return (self._trees[index] == self._trees[ancestor] and
+                self._lfts[ancestor] < self._lfts[index] and self._rgts[index] < self._rgts[ancestor])
+
+    def ancestors(self, pk: int, include_self: bool = False) -> List[int]:
+        """returns the primary keys of the ancestors ordered from the root down to the node"""
+        index = self._index(pk)
+        path = [self._pks[index]] if include_self else []
+        index = self._parents[index]
+        while index != -1:
+            path.append(self._pks[index])
+            index = self._parents[index]
+        return path[::-1]
+
+    def children(self, pk: int) -> List[int]:
+        """returns the primary keys of the children ordered by there left value"""
+        index = self._index(pk)
+        end = self._subtree_end(index)
+        children = []
+        child = index + 1
+        while child < end:
+            # in partial snapshots the parent of the first node of a subtree may be missing
+            if self._depths[child] == self._depths[index] + 1:
+                children.append(self._pks[child])
+            child = self._subtree_end(child)
+        return children
+
+    def descendants(self, pk: int, include_self: bool = False) -> List[int]:
+        """returns the primary keys of the descendants in preorder"""
+        index = self._index(pk)
+        return self._pks[index if include_self else index + 1:self._subtree_end(index)].tolist()
+
+    def descendant_count(self, pk: int) -> int:
+        """returns the count of descendants of the node"""
+        index = self._index(pk)
+        return self._subtree_end(index) - index - 1
+
+    def subtree_bounds(self, pk: int) -> Tuple[int, int, int]:
+        """returns the ``(tree_id, lft, rgt)`` values of the subtree, which can be used to filter related rows"""
+        index = self._index(pk)
+        return self._trees[index], self._lfts[index], self._rgts[index]
+
+    def lowest_common_ancestor(self, pk: int, other: int) -> Optional[int]:
+        """returns the primary key of the deepest node which is an ancestor of or equal to both nodes, or None if the
+        nodes are part of different trees or there common ancestors are not part of the snapshot"""
+        index, other_index = self._index(pk), self._index(other)
+        if self._trees[index] != self._trees[other_index]:
+            return None
+        while not (self._lfts[index] <= self._lfts[other_index] and self._rgts[other_index] <= self._rgts[index]):
+            index = self._parents[index]
+            if index == -1:
+                return None
+        return self._pks[index]
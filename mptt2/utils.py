@@ -0,0 +1,86 @@
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+
+def iter_nested_set_values(roots: Iterable,
+                           get_children: Callable[[Any], Iterable],
+                           start: int = 1,
+                           depth: int = 0,
+                           gap: int = 0) -> Iterator[Tuple[Any, int, int, int]]:
+    """Walks the given (sub)trees in preorder and calculates the nested set values for every item.
+
+    The walk is done without recursion, so even very deep trees can be numbered. Items are yielded as
+    ``(item, lft, rgt, depth)`` tuples as soon as the right value is known, which means in postorder.
+
+    :param roots: The top level items. All of them become siblings numbered from left to right.
+    :type roots: Iterable
+
+    :param get_children: Callable which returns the ordered children of the given item.
+    :type get_children: Callable
+
+    :param start: The left value of the first root item (Default: ``1``)
+    :type start: int, optional
+
+    :param depth: The depth of the root items (Default: ``0``)
+    :type depth: int, optional
+
+    :param gap: The count of unused values which are left between two values. Leaf nodes are always numbered
+                with ``rgt = lft + 1``, so they can still be detected by there values. (Default: ``0``)
+    :type gap: int, optional
+    """
+    last = start - gap - 1
+    frames = [[iter(roots), None, None, depth - 1]]
+    while frames:
+        frame = frames[-1]
+        for child in frame[0]:
+            last += gap + 1
+            frames.append([iter(get_children(child)), child, last, frame[3] + 1])
+            break
+        else:
+            frames.pop()
+            if frames:
+                last = frame[2] + 1 if last == frame[2] else last + gap + 1
+                yield frame[1], frame[2], last, frame[3]
+
+
+def calculate_spread_gap(available: int, nodes: int, leafs: int) -> int:
+    """Returns the biggest gap which can be used to spread the given count of nodes over the available values.
+
+    :param available: The count of free values
+    :type available: int
+
+    :param nodes: The count of nodes which shall be numbered
+    :type nodes: int
+
+    :param leafs: The count of leaf nodes. There right values are not separated by a gap.
+    :type leafs: int
+    """
+    tokens = 2 * nodes - leafs
+    return max(available - 2 * nodes, 0) // (tokens + 1)
+
+
+def longest_increasing_subsequence(values: List[int]) -> List[int]:
+    """Returns the positions of one longest strictly increasing subsequence of the given values.
+
+    :param values: The values to search in
+    :type values: List[int]
+    """
+    tails: List[int] = []
+    tail_values: List[int] = []
+    previous: List[int] = [-1] * len(values)
+    for position, value in enumerate(values):
+        index = bisect_left(tail_values, value)
+        if index:
+            previous[position] = tails[index - 1]
+        if index == len(tails):
+            tails.append(position)
+            tail_values.append(value)
+        else:
+            tails[index] = position
+            tail_values[index] = value
+    positions = []
+    position = tails[-1] if tails else -1
+    while position != -1:
+        positions.append(position)
+        position = previous[position]
+    return positions[::-1]
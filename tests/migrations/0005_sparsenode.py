@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mptt2', '0001_initial'),
+        ('tests', '0004_othernode_remove_simplenode_rgt_gt_lft_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SparseNode',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mptt_lft', models.PositiveIntegerField(editable=False, help_text='The left value of the node', verbose_name='left')),
+                ('mptt_rgt', models.PositiveIntegerField(editable=False, help_text='The right value of the node', verbose_name='right')),
+                ('mptt_depth', models.PositiveIntegerField(editable=False, help_text='The hierarchy level of this node inside the tree', verbose_name='depth')),
+                ('title', models.CharField(default='some node', max_length=10)),
+                ('mptt_parent', models.ForeignKey(editable=False, help_text='The parent of this node', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chilren', related_query_name='child', to='tests.sparsenode', verbose_name='parent')),
+                ('mptt_tree', models.ForeignKey(editable=False, help_text='The unique tree, where this node is part of', on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_nodes', related_query_name='%(app_label)s_%(class)s_node', to='mptt2.tree', verbose_name='tree')),
+            ],
+            options={
+                'ordering': ['mptt_tree_id', 'mptt_lft'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['mptt_tree_id', 'mptt_lft', 'mptt_rgt'], name='tests_spars_mptt_tr_f17386_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sparsenode',
+            constraint=models.CheckConstraint(check=models.Q(('mptt_rgt__gt', models.F('mptt_lft'))), name='tests_sparsenode_rgt_gt_lft', violation_error_message='The right side value rgt is allways greater than the node left side value lft.'),
+        ),
+    ]
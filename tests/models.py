@@ -1,7 +1,9 @@
 
 
-from django.db.models.fields import CharField
-from django.db.models import Manager
+from django.db.models.deletion import CASCADE
+from django.db.models.fields import CharField, PositiveIntegerField
+from django.db.models.fields.related import ForeignKey
+from django.db.models import Manager, Model
 from mptt2.models import Node
 from mptt2.managers import TreeManager
 
@@ -20,3 +22,13 @@ class SimpleNode(Node):
 
 class OtherNode(Node):
     title = CharField(max_length=10, default="some node")
+
+
+class SparseNode(Node):
+    title = CharField(max_length=10, default="some node")
+    mptt_gap = 3
+
+
+class Item(Model):
+    node = ForeignKey(to=SimpleNode, on_delete=CASCADE, related_name="items")
+    price = PositiveIntegerField(default=0)
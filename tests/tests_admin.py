@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.test import Client, TestCase
 
+from tests.models import OtherNode
+
 
 class TestMpttAdminListView(TestCase):
 
@@ -161,3 +163,24 @@ class TestMoveFormView(TestCase):
         self.assertEqual(self.response.status_code, 200)
         self.assertContains(self.response, '<li class="success">The other node “<a href="/admin/tests/othernode/3/move_to/">pk 3 | tree 1 | lft 6 | rgt 7</a>” was changed successfully.</li>')
 
+
+class TestDeleteSelectedAction(TestCase):
+    fixtures = ["auth.json", "simple_nodes.json", "other_nodes.json"]
+
+    base_url = "/admin/tests/othernode/"
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.simple_user = get_user_model().objects.get(username='simpleuser')
+        self.client.force_login(self.simple_user)
+        self.simple_user.user_permissions.add(Permission.objects.get(codename="view_othernode"))
+        self.simple_user.user_permissions.add(Permission.objects.get(codename="delete_othernode"))
+
+    def test_post_delete_selected(self):
+        self.response = self.client.post(self.base_url, data={"action": "delete_selected", "_selected_action": ["2", "4"], "post": "yes"}, follow=True)
+        self.assertEqual(self.response.status_code, 200)
+        self.assertEqual(
+            list(OtherNode.objects.filter(mptt_tree_id=1).values_list("pk", "mptt_lft", "mptt_rgt")),
+            [(1, 1, 4), (3, 2, 3)]
+        )
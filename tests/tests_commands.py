@@ -0,0 +1,160 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from mptt2.serialization import import_records, iter_nested_json_records, iter_records, write_nested_json
+from tests.models import OtherNode, SimpleNode
+
+
+class TestRebuildCommand(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_rebuild(self):
+        SimpleNode.objects.filter(mptt_tree_id=1).update(mptt_rgt=F("mptt_lft") + 1)
+        out = StringIO()
+
+        call_command("mptt_rebuild", "tests.SimpleNode", "--per-tree", stdout=out)
+
+        self.assertIn("2 nodes of tests.SimpleNode updated.", out.getvalue())
+        self.assertEqual(SimpleNode.objects.get(pk=1).mptt_rgt, 12)
+
+    def test_rebuild_unknown_model(self):
+        with self.assertRaises(CommandError):
+            call_command("mptt_rebuild", "tests.Unknown")
+
+    def test_rebuild_no_node_model(self):
+        with self.assertRaises(CommandError):
+            call_command("mptt_rebuild", "auth.User")
+
+
+class TestCheckCommand(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_check(self):
+        out = StringIO()
+
+        call_command("mptt_check", "tests.SimpleNode", stdout=out)
+
+        self.assertIn("All trees of tests.SimpleNode are consistent.", out.getvalue())
+
+    def test_check_violations(self):
+        SimpleNode.objects.filter(pk=20).update(mptt_depth=5)
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("mptt_check", "tests.SimpleNode", "--json", stdout=out)
+
+        self.assertEqual(
+            json.loads(out.getvalue()),
+            {"2": {"roots": 0, "parent": 0, "depth": 2, "overlapping": 0, "numbering": 0}}
+        )
+
+
+class TestExportImportCommands(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def export(self, *args):
+        out = StringIO()
+        call_command("mptt_export", "tests.SimpleNode", *args, stdout=out)
+        return out.getvalue()
+
+    def import_(self, content, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            file.write(content)
+            file.flush()
+            call_command("mptt_import", "tests.OtherNode", file.name, *args, stdout=StringIO())
+
+    def assertSameTrees(self):
+        self.assertEqual(OtherNode.objects.check_integrity(), {})
+        self.assertEqual(
+            [(node.mptt_lft, node.mptt_rgt, node.mptt_depth, node.mptt_parent.title if node.mptt_parent else None)
+             for node in OtherNode.objects.select_related("mptt_parent").order_by("mptt_tree_id", "mptt_lft")],
+            [(node.mptt_lft, node.mptt_rgt, node.mptt_depth, node.mptt_parent.title if node.mptt_parent else None)
+             for node in SimpleNode.objects.select_related("mptt_parent").order_by("mptt_tree_id", "mptt_lft")]
+        )
+
+    def setUp(self):
+        for node in SimpleNode.objects.all():
+            node.title = str(node.pk)
+            node.save(update_fields=["title"])
+
+    def test_export_ndjson(self):
+        lines = self.export("--tree", "1").splitlines()
+
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(json.loads(lines[3]), {"id": 4, "depth": 1, "fields": {"title": "4"}})
+
+    def test_export_json(self):
+        document = json.loads(self.export("--tree", "1", "--format", "json"))
+
+        self.assertEqual([child["id"] for child in document[0]["children"]], [2, 3, 4])
+        self.assertEqual(document[0]["children"][2]["children"][1], {"id": 6, "depth": 2, "fields": {"title": "6"}, "children": []})
+
+    def test_import_ndjson(self):
+        self.import_(self.export(), "--batch-size", "2")
+
+        self.assertSameTrees()
+
+    def test_import_json(self):
+        self.import_(self.export("--format", "json"), "--format", "json")
+
+        self.assertSameTrees()
+
+    def test_import_writes_set_based_updates(self):
+        records = list(iter_records(SimpleNode.objects.all()))
+        with CaptureQueriesContext(connection) as context:
+            import_records(OtherNode.objects, records, batch_size=5)
+
+        updates = [query["sql"] for query in context.captured_queries
+                   if query["sql"].startswith('UPDATE "tests_othernode"')]
+        # 17 nodes in chunks of 5: one update of the parents per chunk and the right values of the inner nodes in
+        # chunks of 5 as well
+        self.assertEqual(len([update for update in updates if 'SET "mptt_parent_id"' in update]), 4)
+        self.assertEqual(len([update for update in updates if 'SET "mptt_rgt"' in update]), 2)
+        self.assertTrue(all("CASE WHEN" in update for update in updates))
+        self.assertSameTrees()
+
+    @mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False)
+    def test_import_without_returning_rows(self, mocked):
+        self.import_(self.export(), "--batch-size", "3")
+
+        self.assertSameTrees()
+
+    def test_nested_json_round_trip_in_small_chunks(self):
+        records = list(iter_records(SimpleNode.objects.all()))
+        document = StringIO()
+        write_nested_json(records, document)
+        document.seek(0)
+
+        self.assertEqual(list(iter_nested_json_records(document, chunk_size=3)), records)
+
+    def test_nested_json_keys_in_any_order(self):
+        document = StringIO(
+            '[{"fields": {"title": "root"}, "id": 12345678, "children": [{"children": []}, {"id": 2}]}, {}]')
+
+        self.assertEqual(
+            list(iter_nested_json_records(document, chunk_size=4)),
+            [{"id": 12345678, "depth": 0, "fields": {"title": "root"}}, {"id": None, "depth": 1, "fields": {}},
+             {"id": 2, "depth": 1, "fields": {}}, {"id": None, "depth": 0, "fields": {}}]
+        )
+
+    def test_nested_json_invalid_documents(self):
+        for document in ['[{"children": [], "id": 1}]', '[{"id": 1}', '[{"id": 1}] []', '{"id": 1}']:
+            with self.assertRaises(ValueError, msg=document):
+                list(iter_nested_json_records(StringIO(document), chunk_size=2))
+
+    def test_import_invalid_depth(self):
+        with self.assertRaises(CommandError):
+            self.import_('{"depth": 0, "fields": {}}\n{"depth": 2, "fields": {}}\n')
+        self.assertFalse(OtherNode.objects.exists())
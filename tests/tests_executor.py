@@ -0,0 +1,56 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TransactionTestCase
+
+from mptt2.executor import ForestExecutor
+from tests.models import SimpleNode
+
+
+class TestForestExecutor(TransactionTestCase):
+    # the workers use there own connections, so the fixtures need to be committed. The in memory test database of
+    # sqlite locks whole tables, so the rebuilds are run by a single worker thread.
+
+    fixtures = ["simple_nodes.json"]
+
+    def values(self):
+        return list(SimpleNode.objects.order_by("pk").values_list("pk", "mptt_tree", "mptt_lft", "mptt_rgt", "mptt_depth"))
+
+    def test_rebuild(self):
+        expected = self.values()
+        SimpleNode.objects.update(mptt_rgt=F("mptt_lft") + 1, mptt_depth=3)
+        progress = []
+
+        results = ForestExecutor(SimpleNode.objects, workers=1, partition_size=1, progress=progress.append).rebuild()
+
+        self.assertEqual(sorted((result.tree_id, result.value, result.error) for result in results),
+                         [(1, 6, None), (2, 9, None)])
+        self.assertEqual(len(progress), 2)
+        self.assertEqual(self.values(), expected)
+
+    def test_rebuild_reports_failed_trees(self):
+        SimpleNode.objects.filter(pk=4).update(mptt_parent_id=6)
+
+        results = {result.tree_id: result for result in ForestExecutor(SimpleNode.objects, workers=1).rebuild()}
+
+        self.assertTrue(results[1].error)
+        self.assertIsNone(results[2].error)
+
+    def test_check(self):
+        SimpleNode.objects.filter(pk=13).update(mptt_depth=5)
+
+        results = ForestExecutor(SimpleNode.objects, workers=2, partition_size=1).check()
+
+        self.assertEqual({result.tree_id: result.value for result in results if result.value},
+                         {2: {"roots": 0, "parent": 0, "depth": 1, "overlapping": 0, "numbering": 0}})
+
+    def test_commands(self):
+        SimpleNode.objects.filter(mptt_tree_id=1).update(mptt_rgt=F("mptt_lft") + 1)
+        out = StringIO()
+
+        call_command("mptt_rebuild", "tests.SimpleNode", "--workers", "1", stdout=out)
+        call_command("mptt_check", "tests.SimpleNode", "--workers", "2", stdout=out)
+
+        self.assertIn("2 nodes of tests.SimpleNode updated.", out.getvalue())
+        self.assertIn("All trees of tests.SimpleNode are consistent.", out.getvalue())
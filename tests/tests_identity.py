@@ -0,0 +1,159 @@
+import gc
+import random
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from mptt2.enums import Position
+from mptt2.identity import NodeIdentityMap, get_identity_map, identity_map_middleware
+from tests.models import SimpleNode, SparseNode
+
+
+class IdentityMapMixin:
+
+    def assertInstancesMatchDatabase(self, nodes):
+        rows = {
+            row[0]: row[1:] for row in nodes[0].__class__.objects.values_list(
+                "pk", "mptt_tree_id", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_parent_id")
+        }
+        for node in nodes:
+            if node.pk in rows:
+                self.assertEqual(
+                    rows[node.pk],
+                    (node.mptt_tree_id, node.mptt_lft, node.mptt_rgt, node.mptt_depth, node.mptt_parent_id),
+                    msg=f"instance of node {node.pk} is stale")
+
+
+class TestNodeIdentityMap(IdentityMapMixin, TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_insert_node_without_queries_for_other_instances(self):
+        with NodeIdentityMap():
+            nodes = list(SimpleNode.objects.all())
+            with CaptureQueriesContext(connection) as context:
+                SimpleNode.objects.insert_node(SimpleNode(), target=nodes[3])
+
+            # only the target is re-read under the lock
+            self.assertEqual(len([query for query in context.captured_queries
+                                  if query["sql"].startswith('SELECT "tests_simplenode"')]), 1)
+
+            self.assertInstancesMatchDatabase(nodes)
+
+    def test_move_with_loaded_instances(self):
+        with NodeIdentityMap():
+            nodes = {node.pk: node for node in SimpleNode.objects.all()}
+            SimpleNode.objects.insert_node(SimpleNode(), target=nodes[2])
+            nodes[3].move_to(target=nodes[5])
+            nodes[6].move_to(target=nodes[2], position=Position.LEFT)
+
+            self.assertInstancesMatchDatabase(list(nodes.values()))
+            self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_move_between_trees(self):
+        with NodeIdentityMap():
+            nodes = {node.pk: node for node in SimpleNode.objects.all()}
+            nodes[4].move_to(target=nodes[18], position=Position.FIRST_CHILD)
+
+            self.assertInstancesMatchDatabase(list(nodes.values()))
+            self.assertEqual(nodes[5].mptt_tree_id, 2)
+
+    def test_delete(self):
+        with NodeIdentityMap():
+            nodes = {node.pk: node for node in SimpleNode.objects.all()}
+            nodes[2].delete()
+            SimpleNode.objects.filter(pk__in=[12, 18]).delete()
+
+            self.assertInstancesMatchDatabase(list(nodes.values()))
+
+    def test_tree_edit_and_rebuild(self):
+        with NodeIdentityMap():
+            nodes = {node.pk: node for node in SimpleNode.objects.all()}
+            with SimpleNode.objects.tree_edit(1):
+                SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=2))
+            self.assertInstancesMatchDatabase(list(nodes.values()))
+
+            SimpleNode.objects.filter(pk=6).update(mptt_parent_id=2)
+            nodes[6].mptt_parent_id = 2
+            SimpleNode.objects.rebuild()
+            self.assertInstancesMatchDatabase(list(nodes.values()))
+
+    def test_random_operations(self):
+        rng = random.Random(7)
+        with NodeIdentityMap():
+            nodes = list(SimpleNode.objects.all())
+            for _ in range(40):
+                node, target = rng.choice(nodes), rng.choice(nodes)
+                position = rng.choice(list(Position))
+                if target.is_root_node and position in [Position.LEFT, Position.RIGHT]:
+                    position = Position.LAST_CHILD
+                if rng.random() < 0.5:
+                    nodes.append(SimpleNode.objects.insert_node(SimpleNode(), target=target, position=position))
+                elif node != target and not (
+                        node.mptt_tree_id == target.mptt_tree_id and node.mptt_lft < target.mptt_lft < node.mptt_rgt):
+                    node.move_to(target=target, position=position)
+                self.assertInstancesMatchDatabase(nodes)
+
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_inactive(self):
+        nodes = {node.pk: node for node in SimpleNode.objects.all()}
+        SimpleNode.objects.insert_node(SimpleNode(), target=nodes[2])
+
+        self.assertIsNone(get_identity_map())
+        self.assertEqual(nodes[1].mptt_rgt, 12)
+        # the target of the insert is updated as well
+        self.assertEqual(nodes[2].mptt_rgt, 5)
+
+    def test_deferred_and_released_instances(self):
+        with NodeIdentityMap() as identity_map:
+            list(SimpleNode.objects.only("pk", "title"))
+            self.assertEqual(identity_map.instances(SimpleNode), [])
+
+            node = SimpleNode.objects.get(pk=1)
+            self.assertEqual(identity_map.instances(SimpleNode), [node])
+            del node
+            gc.collect()
+            self.assertEqual(identity_map.instances(SimpleNode), [])
+
+
+class TestSparseNodeIdentityMap(IdentityMapMixin, TestCase):
+
+    def test_renumber(self):
+        root = SparseNode(title="root")
+        SparseNode.objects.bulk_insert_tree([root])
+        with NodeIdentityMap():
+            nodes = list(SparseNode.objects.all())
+            for _ in range(6):
+                nodes.append(SparseNode.objects.insert_node(SparseNode(), target=nodes[0], position=Position.FIRST_CHILD))
+            nodes[1].delete()
+
+            self.assertInstancesMatchDatabase(nodes)
+
+
+class TestIdentityMapMiddleware(TestCase):
+
+    def test_sync(self):
+        maps = []
+
+        def view(request):
+            maps.append(get_identity_map())
+            return HttpResponse()
+
+        identity_map_middleware(view)(RequestFactory().get("/"))
+
+        self.assertIsInstance(maps[0], NodeIdentityMap)
+        self.assertIsNone(get_identity_map())
+
+    async def test_async(self):
+        maps = []
+
+        async def view(request):
+            maps.append(get_identity_map())
+            return HttpResponse()
+
+        await identity_map_middleware(view)(RequestFactory().get("/"))
+
+        self.assertIsInstance(maps[0], NodeIdentityMap)
@@ -0,0 +1,68 @@
+from django.test import TestCase, override_settings
+
+from mptt2.enums import Position, TreeOperation
+from mptt2.instrumentation import log_slow_operation
+from mptt2.signals import tree_operation
+from tests.models import SimpleNode
+
+
+class TestInstrumentation(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def setUp(self):
+        self.records = []
+        tree_operation.connect(self.receive, sender=SimpleNode)
+
+    def tearDown(self):
+        tree_operation.disconnect(self.receive, sender=SimpleNode)
+
+    def receive(self, sender, record, **kwargs):
+        self.records.append(record)
+
+    def test_insert_node(self):
+        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6), position=Position.RIGHT)
+
+        record, = self.records
+        self.assertEqual(record.operation, TreeOperation.INSERT)
+        self.assertEqual(record.tree_id, 1)
+        self.assertEqual(record.position, Position.RIGHT)
+        # one update which widens the ancestors 1 and 4
+        self.assertEqual(record.rows, [2])
+        self.assertGreater(record.query_count, 2)
+        self.assertGreater(record.duration, 0)
+
+    def test_move_node(self):
+        SimpleNode.objects.move_node(node=SimpleNode.objects.get(pk=4), target=SimpleNode.objects.get(pk=2))
+
+        record, = self.records
+        self.assertEqual(record.operation, TreeOperation.MOVE)
+        self.assertEqual(record.subtree_width, 6)
+        self.assertEqual(record.rows[0], 5)
+
+    def test_delete(self):
+        SimpleNode.objects.get(pk=4).delete()
+
+        record, = self.records
+        self.assertEqual(record.operation, TreeOperation.DELETE)
+        self.assertEqual((record.tree_id, record.subtree_width), (1, 6))
+        self.assertEqual(record.rows, [1])
+
+    def test_edit_session_is_not_measured(self):
+        with SimpleNode.objects.tree_edit(1):
+            SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+
+        self.assertEqual(self.records, [])
+
+    def test_log_slow_operation(self):
+        tree_operation.connect(log_slow_operation, sender=SimpleNode)
+        self.addCleanup(tree_operation.disconnect, log_slow_operation, sender=SimpleNode)
+
+        with override_settings(MPTT2_SLOW_OPERATION_THRESHOLD=0):
+            with self.assertLogs("mptt2", level="WARNING") as logs:
+                SimpleNode.objects.get(pk=5).delete()
+        self.assertIn("slow delete of tests.SimpleNode in tree 1", logs.output[0])
+
+        with override_settings(MPTT2_SLOW_OPERATION_THRESHOLD=60):
+            with self.assertNoLogs("mptt2", level="WARNING"):
+                SimpleNode.objects.get(pk=6).delete()
@@ -1,9 +1,19 @@
+import asyncio
+import threading
 from typing import List
+from unittest import mock, skipIf
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import F
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from mptt2.enums import Position
-from tests.models import SimpleNode
+from mptt2.exceptions import InvalidInsert, InvalidMove, TreeEditInProgress
+from mptt2.models import Tree
+from tests.models import Item, SimpleNode, SparseNode
 
 
 class TestTreeManager(TestCase):
@@ -302,6 +312,15 @@ class TestTreeManager(TestCase):
         self.assertEqual(
             recalculated_tree[11].mptt_parent, recalculated_tree[10])
 
+    def test_insert_sibling_keeps_left_value_of_ancestors(self):
+        for position in [Position.LEFT, Position.RIGHT]:
+            SimpleNode.objects.insert_node(
+                node=SimpleNode(), target=SimpleNode.objects.get(pk=19), position=position)
+
+        self.assertEqual(SimpleNode.objects.get(pk=17).mptt_lft, 12)
+        self.assertEqual(SimpleNode.objects.get(pk=18).mptt_lft, 13)
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
     def test_insert_right(self):
         SimpleNode.objects.insert_node(
             node=SimpleNode(),
@@ -918,3 +937,794 @@ class TestTreeManager(TestCase):
         self.assertEqual(recalculated_tree[10].mptt_depth, 3)
         self.assertEqual(
             recalculated_tree[10].mptt_parent, recalculated_tree[9])
+
+
+class TestBulkInsert(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_bulk_insert_tree_from_nested_pairs(self):
+        root = SimpleNode(title="root")
+        child = SimpleNode(title="child")
+        grandchild = SimpleNode(title="grandchild")
+        second_child = SimpleNode(title="second")
+
+        inserted = SimpleNode.objects.bulk_insert_tree(
+            [(root, [(child, [(grandchild, [])]), (second_child, [])])]
+        )
+
+        self.assertEqual(inserted, [root, child, grandchild, second_child])
+        tree = list(SimpleNode.objects.filter(mptt_tree=root.mptt_tree).values_list(
+            "title", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_parent"))
+        self.assertEqual(tree, [
+            ("root", 1, 8, 0, None),
+            ("child", 2, 5, 1, root.pk),
+            ("grandchild", 3, 4, 2, child.pk),
+            ("second", 6, 7, 1, root.pk),
+        ])
+
+    def test_bulk_insert_tree_from_parent_pointers(self):
+        first_root = SimpleNode(title="first")
+        second_root = SimpleNode(title="second")
+        child = SimpleNode(title="child", mptt_parent=second_root)
+
+        SimpleNode.objects.bulk_insert_tree(
+            [first_root, second_root, child], batch_size=1)
+
+        self.assertNotEqual(first_root.mptt_tree_id, second_root.mptt_tree_id)
+        self.assertEqual((first_root.mptt_lft, first_root.mptt_rgt), (1, 2))
+        self.assertEqual((second_root.mptt_lft, second_root.mptt_rgt), (1, 4))
+        fetched_child = SimpleNode.objects.get(pk=child.pk)
+        self.assertEqual(fetched_child.mptt_parent_id, second_root.pk)
+        self.assertEqual(fetched_child.mptt_tree_id, second_root.mptt_tree_id)
+        self.assertEqual((fetched_child.mptt_lft, fetched_child.mptt_rgt, fetched_child.mptt_depth), (2, 3, 1))
+
+    def test_bulk_insert_subtree_last_child(self):
+        target = SimpleNode.objects.get(pk=14)
+        child = SimpleNode(title="child")
+        grandchild = SimpleNode(title="grandchild")
+
+        SimpleNode.objects.bulk_insert_subtree(
+            [{"node": child, "children": [{"node": grandchild}]}],
+            target=target
+        )
+
+        self.assertEqual((target.mptt_lft, target.mptt_rgt), (6, 15))
+        tree = list(SimpleNode.objects.filter(mptt_tree__pk=2).values_list(
+            "pk", "mptt_lft", "mptt_rgt", "mptt_depth"))
+        self.assertEqual(tree, [
+            (11, 1, 26, 0),
+            (12, 2, 5, 1),
+            (13, 3, 4, 2),
+            (14, 6, 15, 1),
+            (15, 7, 8, 2),
+            (16, 9, 10, 2),
+            (child.pk, 11, 14, 2),
+            (grandchild.pk, 12, 13, 3),
+            (17, 16, 25, 1),
+            (18, 17, 20, 2),
+            (19, 18, 19, 3),
+            (20, 21, 24, 2),
+            (21, 22, 23, 3),
+        ])
+        self.assertEqual(SimpleNode.objects.get(pk=grandchild.pk).mptt_parent_id, child.pk)
+
+    def test_bulk_insert_subtree_left(self):
+        target = SimpleNode.objects.get(pk=14)
+        first = SimpleNode(title="first")
+        second = SimpleNode(title="second")
+
+        SimpleNode.objects.bulk_insert_subtree(
+            [(first, []), (second, [])],
+            target=target,
+            position=Position.LEFT
+        )
+
+        self.assertEqual((first.mptt_lft, first.mptt_rgt, first.mptt_depth), (6, 7, 1))
+        self.assertEqual((second.mptt_lft, second.mptt_rgt, second.mptt_depth), (8, 9, 1))
+        self.assertEqual(first.mptt_parent_id, 11)
+        self.assertEqual(
+            SimpleNode.objects.filter(pk__in=[11, 14]).values_list("mptt_lft", "mptt_rgt").order_by("pk")[::1],
+            [(1, 26), (10, 15)]
+        )
+
+    def test_bulk_insert_tree_with_parent_cycle(self):
+        root, first, second = SimpleNode(title="root"), SimpleNode(title="first"), SimpleNode(title="second")
+        first.mptt_parent = second
+        second.mptt_parent = first
+        count = SimpleNode.objects.count()
+
+        with self.assertRaises(InvalidInsert):
+            SimpleNode.objects.bulk_insert_tree([root, first, second])
+        self.assertEqual(SimpleNode.objects.count(), count)
+
+    def test_bulk_insert_subtree_next_to_root(self):
+        with self.assertRaises(InvalidInsert):
+            SimpleNode.objects.bulk_insert_subtree(
+                [(SimpleNode(), [])],
+                target=SimpleNode.objects.get(pk=11),
+                position=Position.RIGHT
+            )
+
+    def test_bulk_insert_without_returning_rows(self):
+        root = SimpleNode(title="root")
+        child = SimpleNode(title="child", mptt_parent=root)
+
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False):
+            SimpleNode.objects.bulk_insert_tree([root, child])
+
+        self.assertIsNotNone(root.pk)
+        self.assertEqual(SimpleNode.objects.get(pk=child.pk).mptt_parent_id, root.pk)
+
+    def test_bulk_insert_roots(self):
+        nodes = [SimpleNode(title=str(index)) for index in range(5)]
+
+        with CaptureQueriesContext(connection) as context:
+            SimpleNode.objects.bulk_insert_roots(nodes)
+
+        # one insert for the trees and one for the nodes
+        self.assertEqual(len([query for query in context.captured_queries if query["sql"].startswith("INSERT")]), 2)
+
+        self.assertEqual(len({node.mptt_tree_id for node in nodes}), 5)
+        self.assertEqual(
+            list(SimpleNode.objects.filter(pk__in=[node.pk for node in nodes]).values_list("title", "mptt_lft", "mptt_rgt", "mptt_depth")),
+            [(str(index), 1, 2, 0) for index in range(5)]
+        )
+
+    def test_bulk_insert_roots_without_returning_rows(self):
+        nodes = [SimpleNode(title=str(index)) for index in range(5)]
+
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False):
+            SimpleNode.objects.bulk_insert_roots(nodes, batch_size=2)
+
+        self.assertEqual(
+            [SimpleNode.objects.get(pk=node.pk).mptt_tree_id for node in nodes],
+            [node.mptt_tree_id for node in nodes]
+        )
+
+
+class TestSparseNumbering(TestCase):
+
+    def setUp(self):
+        self.root = SparseNode(title="root")
+        self.first = SparseNode(title="first", mptt_parent=self.root)
+        self.second = SparseNode(title="second", mptt_parent=self.root)
+        SparseNode.objects.bulk_insert_tree([self.root, self.first, self.second])
+
+    def assertTreeConsistent(self, tree_id):
+        nodes = list(SparseNode.objects.filter(mptt_tree_id=tree_id))
+        for node in nodes:
+            by_pointer = set()
+            stack = [node.pk]
+            while stack:
+                pk = stack.pop()
+                children = [other.pk for other in nodes if other.mptt_parent_id == pk]
+                by_pointer.update(children)
+                stack.extend(children)
+            by_values = {other.pk for other in nodes if node.mptt_lft < other.mptt_lft and other.mptt_rgt < node.mptt_rgt}
+            self.assertEqual(by_values, by_pointer, node)
+            self.assertEqual(node.is_leaf_node, not by_pointer, node)
+            self.assertEqual(node.descendant_count, len(by_pointer), node)
+            self.assertEqual(list(node.get_descendants().values_list("pk", flat=True).order_by("pk")), sorted(by_pointer))
+
+    def test_bulk_insert_leaves_gaps(self):
+        self.assertEqual((self.root.mptt_lft, self.root.mptt_rgt), (1, 15))
+        self.assertEqual((self.first.mptt_lft, self.first.mptt_rgt), (5, 6))
+        self.assertEqual((self.second.mptt_lft, self.second.mptt_rgt), (10, 11))
+
+    def test_insert_only_writes_new_node(self):
+        node = SparseNode.objects.insert_node(SparseNode(), target=self.root)
+
+        self.assertEqual((node.mptt_lft, node.mptt_rgt, node.mptt_depth), (12, 13, 1))
+        self.assertEqual(
+            list(SparseNode.objects.exclude(pk=node.pk).values_list("mptt_lft", "mptt_rgt")),
+            [(1, 15), (5, 6), (10, 11)]
+        )
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+
+    def test_insert_child_of_leaf(self):
+        node = SparseNode.objects.insert_node(SparseNode(), target=self.first)
+
+        self.assertEqual(node.mptt_parent, self.first)
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+        self.assertFalse(SparseNode.objects.get(pk=self.first.pk).is_leaf_node)
+
+    def test_insert_many_positions(self):
+        targets = [self.first, self.second]
+        for index in range(30):
+            position = list(Position)[index % 4]
+            target = SparseNode.objects.get(pk=targets[index % len(targets)].pk)
+            targets.append(SparseNode.objects.insert_node(SparseNode(), target=target, position=position))
+
+        self.assertEqual(SparseNode.objects.count(), 33)
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+
+    def test_insert_next_to_node_with_stale_cached_parent(self):
+        child = SparseNode.objects.insert_node(SparseNode(), target=self.first)
+        child = SparseNode.objects.select_related("mptt_parent").get(pk=child.pk)
+        for _ in range(12):
+            SparseNode.objects.insert_node(
+                SparseNode(), target=SparseNode.objects.get(pk=self.root.pk), position=Position.FIRST_CHILD)
+
+        # the child has no siblings, so the free range ends at the values of its parent, which moved meanwhile
+        node = SparseNode.objects.insert_node(SparseNode(), target=child, position=Position.LEFT)
+
+        first = SparseNode.objects.get(pk=self.first.pk)
+        self.assertTrue(first.mptt_lft < node.mptt_lft < node.mptt_rgt < first.mptt_rgt)
+        self.assertEqual(SparseNode.objects.check_integrity(), {})
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+
+    def test_delete_collapses_parent(self):
+        child = SparseNode.objects.insert_node(SparseNode(), target=self.first)
+        child.delete()
+
+        first = SparseNode.objects.get(pk=self.first.pk)
+        self.assertTrue(first.is_leaf_node)
+        self.assertEqual(first.mptt_rgt, first.mptt_lft + 1)
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+
+    def test_move_collapses_old_parent(self):
+        child = SparseNode.objects.insert_node(SparseNode(), target=self.first)
+        SparseNode.objects.move_node(child, target=SparseNode.objects.get(pk=self.second.pk))
+
+        self.assertTrue(SparseNode.objects.get(pk=self.first.pk).is_leaf_node)
+        self.assertEqual(SparseNode.objects.get(pk=child.pk).mptt_parent_id, self.second.pk)
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+
+    def test_move_between_trees_collapses_old_parent(self):
+        child = SparseNode.objects.insert_node(SparseNode(), target=self.first)
+        other_root = SparseNode(title="other root")
+        SparseNode.objects.bulk_insert_tree([other_root])
+        SparseNode.objects.move_node(child, target=SparseNode.objects.get(pk=other_root.pk))
+
+        first = SparseNode.objects.get(pk=self.first.pk)
+        self.assertEqual(first.mptt_rgt, first.mptt_lft + 1)
+        self.assertEqual(SparseNode.objects.get(pk=child.pk).mptt_tree_id, other_root.mptt_tree_id)
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+        self.assertTreeConsistent(other_root.mptt_tree_id)
+
+    def test_bulk_insert_subtree(self):
+        child = SparseNode(title="child")
+        SparseNode.objects.bulk_insert_subtree(
+            [(child, [(SparseNode(), []), (SparseNode(), [])])],
+            target=self.first
+        )
+
+        self.assertEqual(child.mptt_parent, self.first)
+        self.assertTreeConsistent(self.root.mptt_tree_id)
+
+
+class TestMoveWindow(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_move_only_updates_window(self):
+        updated_rows = []
+
+        def count_updated_rows(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if sql.startswith('UPDATE "tests_simplenode"'):
+                updated_rows.append(context["cursor"].rowcount)
+            return result
+
+        with connection.execute_wrapper(count_updated_rows):
+            SimpleNode.objects.move_node(
+                node=SimpleNode.objects.get(pk=16),
+                target=SimpleNode.objects.get(pk=15),
+                position=Position.LEFT
+            )
+
+        # the window update touches node 15 and 16; the second update is the save of the moved node
+        self.assertEqual(updated_rows, [2, 1])
+        self.assertEqual(
+            list(SimpleNode.objects.filter(pk__in=[14, 15, 16]).values_list("pk", "mptt_lft", "mptt_rgt")),
+            [(14, 6, 11), (16, 7, 8), (15, 9, 10)]
+        )
+
+
+class TestMoveBetweenTrees(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_move_subtree_to_other_tree(self):
+        node = SimpleNode.objects.get(pk=14)
+        target = SimpleNode.objects.get(pk=4)
+
+        SimpleNode.objects.move_node(node=node, target=target)
+
+        self.assertEqual(node.mptt_tree_id, 1)
+        self.assertEqual((target.mptt_lft, target.mptt_rgt), (6, 17))
+        self.assertEqual(
+            list(SimpleNode.objects.filter(mptt_tree_id=1).values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_parent")),
+            [(1, 1, 18, 0, None), (2, 2, 3, 1, 1), (3, 4, 5, 1, 1), (4, 6, 17, 1, 1), (5, 7, 8, 2, 4),
+             (6, 9, 10, 2, 4), (14, 11, 16, 2, 4), (15, 12, 13, 3, 14), (16, 14, 15, 3, 14)]
+        )
+        self.assertEqual(
+            list(SimpleNode.objects.filter(mptt_tree_id=2).values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth")),
+            [(11, 1, 16, 0), (12, 2, 5, 1), (13, 3, 4, 2), (17, 6, 15, 1), (18, 7, 10, 2),
+             (19, 8, 9, 3), (20, 11, 14, 2), (21, 12, 13, 3)]
+        )
+
+    def test_move_subtree_left_of_node_in_other_tree(self):
+        SimpleNode.objects.move_node(
+            node=SimpleNode.objects.get(pk=4),
+            target=SimpleNode.objects.get(pk=12),
+            position=Position.LEFT
+        )
+
+        self.assertEqual(
+            list(SimpleNode.objects.filter(mptt_tree_id=2).values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_parent"))[:5],
+            [(11, 1, 28, 0, None), (4, 2, 7, 1, 11), (5, 3, 4, 2, 4), (6, 5, 6, 2, 4), (12, 8, 11, 1, 11)]
+        )
+        self.assertEqual(
+            list(SimpleNode.objects.filter(mptt_tree_id=1).values_list("pk", "mptt_lft", "mptt_rgt")),
+            [(1, 1, 6), (2, 2, 3), (3, 4, 5)]
+        )
+
+    def test_move_root_to_other_tree(self):
+        SimpleNode.objects.move_node(
+            node=SimpleNode.objects.get(pk=1),
+            target=SimpleNode.objects.get(pk=21)
+        )
+
+        self.assertFalse(Tree.objects.filter(pk=1).exists())
+        moved = SimpleNode.objects.get(pk=1)
+        self.assertEqual((moved.mptt_tree_id, moved.mptt_lft, moved.mptt_rgt, moved.mptt_depth), (2, 19, 30, 4))
+        self.assertEqual(SimpleNode.objects.get(pk=6).mptt_depth, 6)
+        self.assertEqual(SimpleNode.objects.get(pk=11).mptt_rgt, 34)
+
+    def test_move_next_to_root(self):
+        with self.assertRaises(InvalidMove):
+            SimpleNode.objects.move_node(
+                node=SimpleNode.objects.get(pk=4),
+                target=SimpleNode.objects.get(pk=11),
+                position=Position.RIGHT
+            )
+
+
+class TestTreeEditSession(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_edit_session(self):
+        with SimpleNode.objects.tree_edit(2):
+            first = SimpleNode.objects.insert_node(SimpleNode(title="first"), target=SimpleNode.objects.get(pk=14))
+            SimpleNode.objects.move_node(
+                node=SimpleNode.objects.get(pk=13),
+                target=SimpleNode.objects.get(pk=20),
+                position=Position.FIRST_CHILD
+            )
+            second = SimpleNode.objects.insert_node(
+                SimpleNode(title="second"), target=SimpleNode.objects.get(pk=15), position=Position.RIGHT)
+            SimpleNode.objects.get(pk=18).delete()
+
+            with self.assertRaises(TreeEditInProgress):
+                SimpleNode.objects.get(pk=11).get_descendants()
+
+        self.assertEqual((first.mptt_lft, first.mptt_rgt, first.mptt_depth), (11, 12, 2))
+        self.assertEqual(
+            list(SimpleNode.objects.filter(mptt_tree_id=2).values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_parent")),
+            [(11, 1, 22, 0, None), (12, 2, 3, 1, 11), (14, 4, 13, 1, 11), (15, 5, 6, 2, 14), (second.pk, 7, 8, 2, 14),
+             (16, 9, 10, 2, 14), (first.pk, 11, 12, 2, 14), (17, 14, 21, 1, 11), (20, 15, 20, 2, 17),
+             (13, 16, 17, 3, 20), (21, 18, 19, 3, 20)]
+        )
+        # other trees are not touched
+        self.assertEqual(SimpleNode.objects.get(pk=1).mptt_rgt, 12)
+
+    def test_edit_session_rejects_queryset_tree_queries(self):
+        node = SimpleNode.objects.get(pk=4)
+        with SimpleNode.objects.tree_edit(1):
+            for query in [
+                lambda: SimpleNode.objects.all().get_descendants(),
+                lambda: SimpleNode.objects.all().get_ancestors(),
+                lambda: SimpleNode.objects.all().ancestors_by_node(),
+                lambda: SimpleNode.objects.all().as_tree(),
+                lambda: list(SimpleNode.objects.all().iter_tree()),
+                lambda: SimpleNode.objects.all().snapshot(),
+                lambda: Item.objects.filter(node__descendant_of=node),
+                lambda: Item.objects.filter(node__in_subtree_of=[SimpleNode.objects.get(pk=11), node]),
+            ]:
+                with self.assertRaises(TreeEditInProgress):
+                    query()
+
+            # lookups on nodes of other trees are still possible
+            self.assertEqual(list(Item.objects.filter(node__ancestor_of=SimpleNode.objects.get(pk=19))), [])
+
+    def test_edit_session_rejects_bulk_insert_subtree_and_rebuild(self):
+        with SimpleNode.objects.tree_edit(1):
+            SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=2))
+            with self.assertRaises(TreeEditInProgress):
+                SimpleNode.objects.bulk_insert_subtree([SimpleNode()], target=SimpleNode.objects.get(pk=3))
+            with self.assertRaises(TreeEditInProgress):
+                SimpleNode.objects.rebuild(tree=1)
+            with self.assertRaises(TreeEditInProgress):
+                SimpleNode.objects.rebuild()
+
+            # other trees are not affected
+            SimpleNode.objects.bulk_insert_subtree([SimpleNode()], target=SimpleNode.objects.get(pk=12))
+            SimpleNode.objects.rebuild(tree=2)
+
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_edit_session_writes_only_changed_rows(self):
+        target = SimpleNode.objects.get(pk=6)
+        with CaptureQueriesContext(connection) as context:
+            with SimpleNode.objects.tree_edit(1):
+                node = SimpleNode.objects.insert_node(SimpleNode(), target=target)
+
+        updates = [query["sql"] for query in context.captured_queries
+                   if query["sql"].startswith('UPDATE "tests_simplenode"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn(f'WHERE "tests_simplenode"."id" IN ({node.pk}, 6, 4, 1)', updates[0])
+
+    def test_edit_session_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with SimpleNode.objects.tree_edit(1):
+                SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+                raise ValueError()
+
+        self.assertEqual(SimpleNode.objects.filter(mptt_tree_id=1).count(), 6)
+
+
+class TestAsyncTreeManager(TransactionTestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    async def test_ainsert_node(self):
+        target = await SimpleNode.objects.aget(pk=6)
+
+        node = await SimpleNode.objects.ainsert_node(SimpleNode(), target=target, position=Position.RIGHT)
+
+        self.assertEqual((node.mptt_lft, node.mptt_rgt, node.mptt_depth), (11, 12, 2))
+        self.assertEqual((await SimpleNode.objects.aget(pk=1)).mptt_rgt, 14)
+
+    async def test_amove_to(self):
+        node = await SimpleNode.objects.aget(pk=4)
+
+        await node.amove_to(await SimpleNode.objects.aget(pk=2), position=Position.FIRST_CHILD)
+
+        self.assertEqual(
+            [row async for row in SimpleNode.objects.filter(mptt_tree_id=1).values_list("pk", "mptt_lft", "mptt_rgt")],
+            [(1, 1, 12), (2, 2, 9), (4, 3, 8), (5, 4, 5), (6, 6, 7), (3, 10, 11)]
+        )
+
+    async def test_adelete(self):
+        await (await SimpleNode.objects.aget(pk=4)).adelete()
+
+        self.assertEqual(
+            [row async for row in SimpleNode.objects.filter(mptt_tree_id=1).values_list("pk", "mptt_lft", "mptt_rgt")],
+            [(1, 1, 6), (2, 2, 3), (3, 4, 5)]
+        )
+
+    async def test_writes_leave_the_thread_sensitive_executor(self):
+        threads = []
+        insert_node = SimpleNode.objects.insert_node
+
+        def record_thread(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return insert_node(*args, **kwargs)
+
+        with mock.patch.object(SimpleNode.objects, "insert_node", side_effect=record_thread):
+            await SimpleNode.objects.ainsert_node(SimpleNode(), target=await SimpleNode.objects.aget(pk=6))
+
+        self.assertNotIn(await sync_to_async(threading.get_ident)(), threads)
+
+    @skipIf(connection.vendor == "sqlite", "SQLite allows only one writer on the whole database")
+    async def test_concurrent_writes_on_different_trees(self):
+        first, second = await SimpleNode.objects.aget(pk=6), await SimpleNode.objects.aget(pk=21)
+
+        await asyncio.gather(
+            SimpleNode.objects.ainsert_node(SimpleNode(), target=first, position=Position.RIGHT),
+            SimpleNode.objects.ainsert_node(SimpleNode(), target=second, position=Position.RIGHT),
+        )
+
+        self.assertEqual((await SimpleNode.objects.aget(pk=1)).mptt_rgt, 14)
+        self.assertEqual((await SimpleNode.objects.aget(pk=11)).mptt_rgt, 24)
+
+
+class TestSyncTree(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def values(self, tree_id):
+        return list(SimpleNode.objects.filter(mptt_tree_id=tree_id).values_list(
+            "pk", "mptt_lft", "mptt_rgt", "mptt_depth", "mptt_parent"))
+
+    def test_sync_tree(self):
+        new = SimpleNode(title="new")
+        summary = SimpleNode.objects.sync_tree(1, [
+            (SimpleNode(pk=1), [
+                (SimpleNode(pk=4), [(SimpleNode(pk=6), []), (SimpleNode(pk=2), [])]),
+                (SimpleNode(pk=3), []),
+                (new, [(SimpleNode(pk=5), [])]),
+            ])
+        ])
+
+        self.assertEqual(summary, {"inserted": 1, "moved": 3, "deleted": 0})
+        self.assertEqual(
+            self.values(1),
+            [(1, 1, 14, 0, None), (4, 2, 7, 1, 1), (6, 3, 4, 2, 4), (2, 5, 6, 2, 4), (3, 8, 9, 1, 1),
+             (new.pk, 10, 13, 1, 1), (5, 11, 12, 2, new.pk)]
+        )
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_sync_tree_deletes_removed_nodes(self):
+        summary = SimpleNode.objects.sync_tree(1, [
+            {"node": SimpleNode(pk=1), "children": [{"node": SimpleNode(pk=5)}, {"node": SimpleNode(pk=3)}]}
+        ])
+
+        self.assertEqual(summary, {"inserted": 0, "moved": 1, "deleted": 3})
+        self.assertEqual(self.values(1), [(1, 1, 6, 0, None), (5, 2, 3, 1, 1), (3, 4, 5, 1, 1)])
+
+    def test_sync_tree_without_changes(self):
+        expected = self.values(2)
+        nodes = {node.pk: SimpleNode(pk=node.pk) for node in SimpleNode.objects.filter(mptt_tree_id=2)}
+        for node in SimpleNode.objects.filter(mptt_tree_id=2, mptt_parent__isnull=False):
+            nodes[node.pk].mptt_parent = nodes[node.mptt_parent_id]
+
+        with CaptureQueriesContext(connection) as context:
+            summary = SimpleNode.objects.sync_tree(2, list(nodes.values()))
+
+        self.assertEqual(summary, {"inserted": 0, "moved": 0, "deleted": 0})
+        self.assertFalse([query for query in context.captured_queries
+                          if query["sql"].startswith(('UPDATE "tests_simplenode"', 'DELETE'))])
+        self.assertEqual(self.values(2), expected)
+
+    def test_sync_tree_invalid_structure(self):
+        with self.assertRaises(ValueError):
+            SimpleNode.objects.sync_tree(1, [(SimpleNode(pk=2), [])])
+        with self.assertRaises(ValueError):
+            SimpleNode.objects.sync_tree(1, [(SimpleNode(pk=1), []), (SimpleNode(pk=2), [])])
+        with self.assertRaises(ValueError):
+            SimpleNode.objects.sync_tree(1, [(SimpleNode(pk=1), [(SimpleNode(pk=2), []), (SimpleNode(pk=2), [])])])
+        self.assertEqual(SimpleNode.objects.filter(mptt_tree_id=1).count(), 6)
+
+
+class TestRebuild(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def values(self):
+        return list(SimpleNode.objects.order_by("pk").values_list("pk", "mptt_tree", "mptt_lft", "mptt_rgt", "mptt_depth"))
+
+    def test_rebuild_without_changes(self):
+        expected = self.values()
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(SimpleNode.objects.rebuild(), 0)
+        self.assertFalse([query for query in context.captured_queries
+                          if query["sql"].startswith('UPDATE "tests_simplenode"')])
+        self.assertEqual(self.values(), expected)
+
+    def test_rebuild_corrupted_values(self):
+        expected = self.values()
+        SimpleNode.objects.filter(mptt_tree_id=2).update(mptt_rgt=F("mptt_lft") + 50, mptt_depth=7)
+        SimpleNode.objects.filter(pk=5).update(mptt_tree_id=2, mptt_depth=5)
+
+        self.assertEqual(SimpleNode.objects.rebuild(batch_size=3), 12)
+        self.assertEqual(self.values(), expected)
+
+    def test_rebuild_from_changed_parents(self):
+        SimpleNode.objects.filter(pk=4).update(mptt_parent_id=2)
+
+        SimpleNode.objects.rebuild(tree=1)
+
+        self.assertEqual(
+            list(SimpleNode.objects.filter(mptt_tree_id=1).values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth")),
+            [(1, 1, 12, 0), (2, 2, 9, 1), (4, 3, 8, 2), (5, 4, 5, 3), (6, 6, 7, 3), (3, 10, 11, 1)]
+        )
+
+    def test_rebuild_per_tree(self):
+        expected = self.values()
+        SimpleNode.objects.update(mptt_lft=0, mptt_rgt=1)
+
+        with CaptureQueriesContext(connection) as context:
+            SimpleNode.objects.rebuild(per_tree=True)
+
+        # every tree is written with its own update query
+        self.assertEqual(len([query for query in context.captured_queries
+                              if query["sql"].startswith('UPDATE "tests_simplenode"')]), 2)
+        self.assertEqual(self.values(), expected)
+
+    def test_rebuild_deletes_orphaned_trees(self):
+        SimpleNode.objects.filter(pk=11).update(mptt_parent_id=6)
+
+        SimpleNode.objects.rebuild()
+
+        self.assertFalse(Tree.objects.filter(pk=2).exists())
+        self.assertEqual(SimpleNode.objects.filter(mptt_tree_id=1).count(), 17)
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_rebuild_locks_trees(self):
+        with CaptureQueriesContext(connection) as context:
+            SimpleNode.objects.rebuild()
+
+        sqls = [query["sql"] for query in context.captured_queries]
+        locks = [index for index, sql in enumerate(sqls) if sql.startswith('UPDATE "mptt2_tree"')]
+        reads = [index for index, sql in enumerate(sqls) if sql.startswith('SELECT "tests_simplenode"."id"')]
+        self.assertEqual(len(locks), 2)
+        self.assertLess(max(locks), min(reads))
+
+    def test_rebuild_cycle(self):
+        SimpleNode.objects.filter(pk=4).update(mptt_parent_id=6)
+
+        with self.assertRaises(ValueError):
+            SimpleNode.objects.rebuild()
+
+
+class TestCheckIntegrity(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_consistent_trees(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_consistent_sparse_tree(self):
+        SparseNode.objects.bulk_insert_tree([(SparseNode(), [(SparseNode(), [(SparseNode(), [])]), (SparseNode(), [])])])
+        self.assertEqual(SparseNode.objects.check_integrity(), {})
+
+    def test_violations(self):
+        SimpleNode.objects.filter(pk=2).update(mptt_parent_id=4)
+        SimpleNode.objects.filter(pk=3).update(mptt_rgt=7)
+        SimpleNode.objects.filter(pk=11).update(mptt_rgt=30)
+        SimpleNode.objects.filter(pk=20).update(mptt_depth=5)
+
+        self.assertEqual(
+            SimpleNode.objects.check_integrity(),
+            {
+                1: {"roots": 0, "parent": 1, "depth": 1, "overlapping": 1, "numbering": 0},
+                2: {"roots": 0, "parent": 0, "depth": 2, "overlapping": 0, "numbering": 8},
+            }
+        )
+        self.assertEqual(list(SimpleNode.objects.check_integrity(tree=2)), [2])
+
+    def test_numbering_not_starting_at_one(self):
+        SimpleNode.objects.filter(pk=1).update(mptt_lft=0)
+
+        self.assertEqual(
+            SimpleNode.objects.check_integrity(),
+            {1: {"roots": 0, "parent": 0, "depth": 0, "overlapping": 0, "numbering": 1}}
+        )
+
+    @mock.patch.object(type(connection.features), "supports_over_clause", new_callable=mock.PropertyMock, return_value=False)
+    def test_overlapping_without_window_functions(self, mocked):
+        SimpleNode.objects.filter(pk=3).update(mptt_rgt=7)
+
+        self.assertEqual(SimpleNode.objects.check_integrity()[1]["overlapping"], 1)
+
+
+class TestTreeLock(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def tree_lock_queries(self, context):
+        # the row lock is taken by increasing the version of each tree with its own update
+        return [query for query in context.captured_queries
+                if query["sql"].startswith('UPDATE "mptt2_tree"') and '"mptt2_tree"."id" = ' in query["sql"]]
+
+    def test_insert_rereads_stale_target(self):
+        target = SimpleNode.objects.get(pk=6)
+        # another writer changed the tree after the target was loaded
+        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=2))
+
+        with CaptureQueriesContext(connection) as context:
+            node = SimpleNode.objects.insert_node(SimpleNode(), target=target)
+
+        self.assertEqual(len(self.tree_lock_queries(context)), 1)
+        self.assertEqual((node.mptt_lft, node.mptt_rgt), (12, 13))
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_move_rereads_stale_nodes(self):
+        node = SimpleNode.objects.get(pk=3)
+        target = SimpleNode.objects.get(pk=6)
+        SimpleNode.objects.move_node(node=SimpleNode.objects.get(pk=2), target=SimpleNode.objects.get(pk=5))
+
+        SimpleNode.objects.move_node(node=node, target=target)
+
+        self.assertEqual((node.mptt_lft, node.mptt_rgt, node.mptt_depth), (8, 9, 3))
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    def test_delete_rereads_stale_node(self):
+        node = SimpleNode.objects.get(pk=4)
+        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=2))
+
+        node.delete()
+
+        self.assertEqual(SimpleNode.objects.get(pk=1).mptt_rgt, 8)
+        self.assertEqual(SimpleNode.objects.check_integrity(), {})
+
+    @override_settings(MPTT2_TREE_LOCK="none")
+    def test_without_lock(self):
+        with CaptureQueriesContext(connection) as context:
+            SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+
+        self.assertEqual(self.tree_lock_queries(context), [])
+
+    @override_settings(MPTT2_TREE_LOCK="advisory")
+    def test_advisory_lock_falls_back_to_row_lock(self):
+        with CaptureQueriesContext(connection) as context:
+            SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+
+        self.assertEqual(len(self.tree_lock_queries(context)), 1)
+
+    @override_settings(MPTT2_TREE_LOCK="table")
+    def test_invalid_lock_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+
+
+class TestTreeVersion(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def versions(self):
+        return dict(Tree.objects.values_list("pk", "version"))
+
+    def test_insert_node(self):
+        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+
+        self.assertEqual(self.versions(), {1: 1, 2: 0})
+
+    def test_move_node_between_trees(self):
+        SimpleNode.objects.move_node(node=SimpleNode.objects.get(pk=4), target=SimpleNode.objects.get(pk=13))
+
+        self.assertEqual(self.versions(), {1: 1, 2: 1})
+
+    def test_delete(self):
+        SimpleNode.objects.get(pk=14).delete()
+        SimpleNode.objects.filter(pk__in=[12, 17]).delete()
+
+        self.assertEqual(self.versions(), {1: 0, 2: 2})
+
+    def test_bulk_insert_subtree(self):
+        SimpleNode.objects.bulk_insert_subtree([SimpleNode(), SimpleNode()], target=SimpleNode.objects.get(pk=2))
+
+        self.assertEqual(self.versions(), {1: 1, 2: 0})
+
+    def test_tree_edit(self):
+        target = SimpleNode.objects.get(pk=13)
+        with SimpleNode.objects.tree_edit(2):
+            SimpleNode.objects.insert_node(SimpleNode(), target=target)
+
+        self.assertEqual(self.versions(), {1: 0, 2: 1})
+
+    def test_rebuild(self):
+        # the trees are locked before they are rebuilt, which increases the versions
+        SimpleNode.objects.rebuild()
+        self.assertEqual(self.versions(), {1: 1, 2: 1})
+
+        SimpleNode.objects.rebuild(tree=2)
+        self.assertEqual(self.versions(), {1: 1, 2: 2})
+
+    @override_settings(MPTT2_TREE_LOCK="none")
+    def test_without_lock(self):
+        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=6))
+
+        self.assertEqual(self.versions(), {1: 1, 2: 0})
+
+    def test_cached(self):
+        node = SimpleNode.objects.get(pk=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(2):
+                descendants = SimpleNode.objects.cached(node.mptt_tree_id, node.get_descendants())
+        self.assertEqual([5, 6], [descendant.pk for descendant in descendants])
+
+        # only the version of the tree is looked up
+        with self.assertNumQueries(1):
+            cached = SimpleNode.objects.cached(node.mptt_tree_id, node.get_descendants())
+        self.assertEqual(descendants, cached)
+
+        SimpleNode.objects.insert_node(SimpleNode(), target=node)
+        node.refresh_from_db()
+        with self.assertNumQueries(2):
+            descendants = SimpleNode.objects.cached(node.mptt_tree_id, node.get_descendants())
+        self.assertEqual(3, len(descendants))
+
+    def test_cached_is_stored_on_commit(self):
+        node = SimpleNode.objects.get(pk=4)
+        with self.captureOnCommitCallbacks() as callbacks:
+            SimpleNode.objects.cached(node.mptt_tree, node.get_ancestors())
+
+        self.assertEqual(len(callbacks), 1)
+        with self.assertNumQueries(2):
+            SimpleNode.objects.cached(node.mptt_tree, node.get_ancestors())
@@ -63,3 +63,12 @@ class TestNodeModel(TestCase):
 
         self.assertEqual(recalculated_tree[8].mptt_lft, 14)
         self.assertEqual(recalculated_tree[8].mptt_rgt, 15)
+
+    def test_get_children(self):
+        self.assertEqual(list(SimpleNode.objects.get(pk=17).get_children().values_list("pk", flat=True)), [18, 20])
+
+    def test_get_siblings(self):
+        node = SimpleNode.objects.get(pk=3)
+        self.assertEqual(list(node.get_siblings().values_list("pk", flat=True)), [2, 4])
+        self.assertEqual(list(node.get_siblings(include_self=True).values_list("pk", flat=True)), [2, 3, 4])
+        self.assertEqual(list(SimpleNode.objects.get(pk=1).get_siblings()), [])
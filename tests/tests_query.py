@@ -1,10 +1,17 @@
+from django.core.exceptions import FieldError
+from django.db import connection
+from django.db.models import ForeignKey
+from django.db.models.aggregates import Count, Sum
 from django.db.models.expressions import F, OuterRef
 from django.db.models.query_utils import Q
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 
+from mptt2.models import Tree
 from mptt2.query import (AncestorsQuery, ChildrenQuery, DescendantsQuery,
                          FamilyQuery, LeafNodesQuery, ParentQuery,
                          SiblingsQuery)
+from tests.models import Item, SimpleNode, SparseNode
 
 
 class QTestMixin(object):
@@ -207,13 +214,13 @@ class TestSiblingsQuery(QTestMixin, SimpleTestCase):
 
     def test_default_query(self):
         query = SiblingsQuery()
-        expected = Q(parent=F("parent")) & ~Q(pk=F("pk"))
+        expected = Q(mptt_parent=F("mptt_parent")) & ~Q(pk=F("pk"))
         self.assertQEqual(expected, query)
 
     def test_subquery(self):
         query = SiblingsQuery()
         query.to_subquery()
-        expected = Q(parent=OuterRef("parent")) & ~Q(pk=OuterRef("pk"))
+        expected = Q(mptt_parent=OuterRef("mptt_parent")) & ~Q(pk=OuterRef("pk"))
         self.assertQEqual(expected, query)
 
 
@@ -256,3 +263,271 @@ class TestLeafNodesQuery(QTestMixin, SimpleTestCase):
             mptt_tree=OuterRef("mptt_tree"),
             mptt_lft=OuterRef("mptt_rgt") - 1)
         self.assertQEqual(expected, query)
+
+
+class TestTreeQuerySet(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_delete(self):
+        deleted, rows_count = SimpleNode.objects.filter(pk__in=[2, 4, 5, 12, 13, 18, 21]).delete()
+
+        self.assertEqual(deleted, 9)
+        self.assertEqual(rows_count, {"tests.SimpleNode": 9})
+        self.assertEqual(
+            list(SimpleNode.objects.values_list("pk", "mptt_lft", "mptt_rgt", "mptt_depth")),
+            [(1, 1, 4, 0), (3, 2, 3, 1),
+             (11, 1, 12, 0), (14, 2, 7, 1), (15, 3, 4, 2), (16, 5, 6, 2), (17, 8, 11, 1), (20, 9, 10, 2)]
+        )
+
+    def test_delete_root(self):
+        SimpleNode.objects.filter(pk__in=[1, 5]).delete()
+
+        self.assertFalse(SimpleNode.objects.filter(mptt_tree_id=1).exists())
+        self.assertFalse(Tree.objects.filter(pk=1).exists())
+        self.assertEqual(SimpleNode.objects.get(pk=11).mptt_rgt, 22)
+
+    def test_delete_sparse(self):
+        root = SparseNode()
+        first = SparseNode(mptt_parent=root)
+        child = SparseNode(mptt_parent=first)
+        second = SparseNode(mptt_parent=root)
+        SparseNode.objects.bulk_insert_tree([root, first, child, second])
+
+        SparseNode.objects.filter(pk__in=[child.pk, second.pk]).delete()
+
+        first.refresh_from_db()
+        self.assertTrue(first.is_leaf_node)
+        self.assertEqual(SparseNode.objects.count(), 2)
+
+    def test_as_tree(self):
+        queryset = SimpleNode.objects.get(pk=11).get_descendants(include_self=True)
+
+        with self.assertNumQueries(1):
+            roots = queryset.as_tree()
+
+        with self.assertNumQueries(0):
+            self.assertEqual([root.pk for root in roots], [11])
+            children = roots[0].get_children()
+            self.assertEqual([child.pk for child in children], [12, 14, 17])
+            self.assertEqual([child.pk for child in roots[0].get_children(asc=True)], [17, 14, 12])
+            grandchild = children[2].get_children()[1].get_children()[0]
+            self.assertEqual(grandchild.pk, 21)
+            self.assertEqual(grandchild.mptt_parent.mptt_parent.pk, 17)
+            self.assertEqual([ancestor.pk for ancestor in grandchild.get_ancestors()], [11, 17, 20])
+            self.assertEqual([ancestor.pk for ancestor in grandchild.get_ancestors(include_self=True, asc=True)], [21, 20, 17, 11])
+            self.assertEqual(list(grandchild.get_children()), [])
+
+    def test_as_tree_keeps_tree_instances_unloaded(self):
+        SimpleNode.objects.insert_node(SimpleNode(), target=SimpleNode.objects.get(pk=12))
+        roots = SimpleNode.objects.filter(mptt_tree_id=2).as_tree()
+
+        self.assertEqual(roots[0].mptt_tree.version, Tree.objects.get(pk=2).version)
+        self.assertNotEqual(roots[0].mptt_tree.version, 0)
+
+    def test_as_tree_with_incomplete_subtrees(self):
+        roots = SimpleNode.objects.filter(mptt_tree_id=2, mptt_depth__gte=1, mptt_depth__lte=2).as_tree()
+
+        self.assertEqual([root.pk for root in roots], [12, 14, 17])
+        with self.assertNumQueries(0):
+            self.assertEqual([child.pk for child in roots[1].get_children()], [15, 16])
+        with self.assertNumQueries(1):
+            # the grandchildren of node 17 are not part of the queryset
+            self.assertEqual([child.pk for child in roots[2].get_children()], [18, 20])
+        with self.assertNumQueries(1):
+            # the chain up to the root is not cached
+            self.assertEqual([ancestor.pk for ancestor in roots[1].get_children()[0].get_ancestors()], [11, 14])
+
+    def test_get_descendants(self):
+        queryset = SimpleNode.objects.filter(pk__in=[4, 5, 12, 14, 18])
+
+        with CaptureQueriesContext(connection) as context:
+            descendants = list(queryset.get_descendants().values_list("pk", flat=True))
+
+        self.assertEqual(descendants, [5, 6, 13, 15, 16, 19])
+        # node 5 is part of the subtree of node 4; only four intervals are left
+        self.assertEqual(context.captured_queries[-1]["sql"].count('"mptt_lft" >'), 4)
+
+    def test_get_descendants_include_self(self):
+        queryset = SimpleNode.objects.filter(pk__in=[12, 14, 6])
+
+        with CaptureQueriesContext(connection) as context:
+            descendants = list(queryset.get_descendants(include_self=True).values_list("pk", flat=True))
+
+        self.assertEqual(descendants, [6, 12, 13, 14, 15, 16])
+        # the neighbours 12 and 14 are merged to one interval
+        self.assertEqual(context.captured_queries[-1]["sql"].count("BETWEEN"), 2)
+
+    def test_get_ancestors(self):
+        queryset = SimpleNode.objects.filter(pk__in=[5, 19, 21, 17])
+
+        self.assertEqual(list(queryset.get_ancestors().values_list("pk", flat=True)), [1, 4, 11, 17, 18, 20])
+        self.assertEqual(
+            list(queryset.get_ancestors(include_self=True).values_list("pk", flat=True)), [1, 4, 5, 11, 17, 18, 19, 20, 21])
+        self.assertFalse(SimpleNode.objects.none().get_ancestors().exists())
+
+    def test_ancestors_by_node(self):
+        with self.assertNumQueries(2):
+            mapping = SimpleNode.objects.filter(pk__in=[5, 3, 19, 21, 17, 11]).ancestors_by_node()
+
+        self.assertEqual(
+            {node.pk: [ancestor.pk for ancestor in ancestors] for node, ancestors in mapping.items()},
+            {3: [1], 5: [1, 4], 11: [], 17: [11], 19: [11, 17, 18], 21: [11, 17, 20]}
+        )
+        mapping = SimpleNode.objects.filter(pk__in=[6]).ancestors_by_node(include_self=True)
+        self.assertEqual([ancestor.pk for ancestor in mapping[SimpleNode(pk=6)]], [1, 4, 6])
+
+    def test_annotations(self):
+        with self.assertNumQueries(1):
+            rows = list(
+                SimpleNode.objects.filter(mptt_tree_id=1).with_descendant_count().with_child_count().with_is_leaf().with_subtree_width().values_list(
+                    "pk", "mptt_descendant_count", "mptt_child_count", "mptt_is_leaf", "mptt_subtree_width")
+            )
+
+        self.assertEqual(
+            rows,
+            [(1, 5, 3, False, 12), (2, 0, 0, True, 2), (3, 0, 0, True, 2), (4, 2, 2, False, 6), (5, 0, 0, True, 2), (6, 0, 0, True, 2)]
+        )
+
+    def test_annotations_sparse(self):
+        root = SparseNode()
+        child = SparseNode(mptt_parent=root)
+        SparseNode.objects.bulk_insert_tree([root, child, SparseNode(mptt_parent=child), SparseNode(mptt_parent=root)])
+
+        annotated = SparseNode.objects.with_descendant_count().with_child_count().with_is_leaf().get(pk=root.pk)
+
+        self.assertEqual((annotated.mptt_descendant_count, annotated.mptt_child_count, annotated.mptt_is_leaf), (3, 2, False))
+        with self.assertNumQueries(0):
+            self.assertEqual(annotated.descendant_count, 3)
+
+    def test_add_related_aggregate(self):
+        Item.objects.bulk_create([
+            Item(node_id=1, price=1), Item(node_id=4, price=2), Item(node_id=5, price=3), Item(node_id=5, price=4),
+            Item(node_id=12, price=5)
+        ])
+
+        with self.assertNumQueries(1):
+            rows = list(
+                SimpleNode.objects.filter(mptt_tree_id=1).add_related_aggregate(
+                    Item, "node", Count("pk"), name="item_count"
+                ).add_related_aggregate(
+                    Item.objects.filter(price__gt=1), "node", Sum("price"), name="price"
+                ).add_related_aggregate(
+                    Item, "node", Count("pk"), cumulative=False
+                ).values_list("pk", "item_count", "price", "item_pk__count")
+            )
+
+        self.assertEqual(
+            rows,
+            [(1, 4, 9, 1), (2, 0, None, 0), (3, 0, None, 0), (4, 3, 9, 1), (5, 2, 7, 2), (6, 0, None, 0)]
+        )
+
+
+class TestTreeLookups(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def setUp(self):
+        Item.objects.bulk_create([Item(node_id=pk) for pk in [1, 4, 5, 6, 11, 12, 14, 19]])
+
+    def nodes_of_items(self, **kwargs):
+        return list(Item.objects.filter(**kwargs).order_by("node_id").values_list("node_id", flat=True))
+
+    def test_descendant_of(self):
+        node = SimpleNode.objects.get(pk=4)
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.nodes_of_items(node__descendant_of=node), [5, 6])
+
+        self.assertIn('"tests_item"."node_id" IN (SELECT', context.captured_queries[0]["sql"])
+
+    def test_ancestor_of(self):
+        self.assertEqual(self.nodes_of_items(node__ancestor_of=SimpleNode.objects.get(pk=19)), [11])
+
+    def test_in_subtree_of(self):
+        nodes = SimpleNode.objects.filter(pk__in=[4, 5, 12, 14])
+
+        self.assertEqual(self.nodes_of_items(node__in_subtree_of=list(nodes)), [4, 5, 6, 12, 14])
+        with self.assertRaises(TypeError):
+            self.nodes_of_items(node__in_subtree_of=nodes)
+        self.assertEqual(self.nodes_of_items(node__in_subtree_of=SimpleNode.objects.get(pk=11)), [11, 12, 14, 19])
+        self.assertEqual(self.nodes_of_items(node__in_subtree_of=[]), [])
+
+    def test_lookup_on_other_foreign_keys(self):
+        with self.assertRaises(FieldError):
+            list(SimpleNode.objects.filter(mptt_tree__descendant_of=Tree.objects.first()))
+        self.assertNotIn("descendant_of", ForeignKey.get_class_lookups())
+
+
+class TestIterTree(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def test_iter_tree(self):
+        with CaptureQueriesContext(connection) as context:
+            pks = [node.pk for node in SimpleNode.objects.iter_tree(chunk_size=5)]
+
+        self.assertEqual(pks, [1, 2, 3, 4, 5, 6, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21])
+        self.assertEqual(len(context.captured_queries), 4)
+        self.assertNotIn("OFFSET", context.captured_queries[-1]["sql"])
+
+    def test_iter_tree_after_checkpoint(self):
+        self.assertEqual(
+            [node.pk for node in SimpleNode.objects.filter(mptt_depth__lte=1).iter_tree(chunk_size=2, after=(1, 6))],
+            [11, 12, 14, 17]
+        )
+
+    def test_iter_tree_events(self):
+        events = [(event.value, node.pk) for event, node in SimpleNode.objects.filter(mptt_tree_id=1).iter_tree(events=True)]
+
+        self.assertEqual(
+            events,
+            [("enter", 1), ("enter", 2), ("leave", 2), ("enter", 3), ("leave", 3), ("enter", 4), ("enter", 5),
+             ("leave", 5), ("enter", 6), ("leave", 6), ("leave", 4), ("leave", 1)]
+        )
+
+
+class TestAsyncTreeQuerySet(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    async def test_aget_descendants_and_ancestors(self):
+        queryset = SimpleNode.objects.filter(pk__in=[4, 18])
+
+        descendants = await queryset.aget_descendants()
+        self.assertEqual([node.pk async for node in descendants], [5, 6, 19])
+        ancestors = await queryset.aget_ancestors(include_self=True)
+        self.assertEqual([node.pk async for node in ancestors], [1, 4, 11, 17, 18])
+
+    async def test_aancestors_by_node(self):
+        mapping = await SimpleNode.objects.filter(pk__in=[5, 21]).aancestors_by_node()
+
+        self.assertEqual(
+            {node.pk: [ancestor.pk for ancestor in ancestors] for node, ancestors in mapping.items()},
+            {5: [1, 4], 21: [11, 17, 20]}
+        )
+
+    async def test_aas_tree(self):
+        node = await SimpleNode.objects.aget(pk=17)
+        roots = await node.get_descendants(include_self=True).aas_tree()
+
+        self.assertEqual([child.pk for child in roots[0].get_children()], [18, 20])
+
+    async def test_aiter_tree(self):
+        pks = [node.pk async for node in SimpleNode.objects.aiter_tree(chunk_size=5)]
+        self.assertEqual(pks, [1, 2, 3, 4, 5, 6, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21])
+
+        events = [(event.value, node.pk) async for event, node in SimpleNode.objects.filter(
+            mptt_tree_id=1, mptt_depth__lte=1).aiter_tree(events=True, chunk_size=2)]
+        self.assertEqual(
+            events,
+            [("enter", 1), ("enter", 2), ("leave", 2), ("enter", 3), ("leave", 3), ("enter", 4), ("leave", 4),
+             ("leave", 1)]
+        )
+
+    async def test_node_helpers(self):
+        node = await SimpleNode.objects.aget(pk=19)
+
+        self.assertEqual((await node.aget_root()).pk, 11)
+        self.assertEqual([ancestor.pk async for ancestor in node.get_ancestors()], [11, 17, 18])
+        self.assertEqual([sibling.pk async for sibling in (await node.aget_root()).get_children()], [12, 14, 17])
@@ -0,0 +1,117 @@
+import pickle
+
+from django.test import TestCase
+
+from tests.models import SimpleNode, SparseNode
+
+
+class TestTreeSnapshot(TestCase):
+
+    fixtures = ["simple_nodes.json"]
+
+    def setUp(self):
+        with self.assertNumQueries(1):
+            self.snapshot = SimpleNode.objects.all().snapshot()
+
+    def test_len_and_contains(self):
+        self.assertEqual(SimpleNode.objects.count(), len(self.snapshot))
+        self.assertIn(5, self.snapshot)
+        self.assertNotIn(999, self.snapshot)
+
+    def test_lookups_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual([1, 4], self.snapshot.ancestors(5))
+            self.assertEqual([1, 4, 5], self.snapshot.ancestors(5, include_self=True))
+            self.assertEqual([], self.snapshot.ancestors(11))
+            self.assertEqual([2, 3, 4], self.snapshot.children(1))
+            self.assertEqual([18, 20], self.snapshot.children(17))
+            self.assertEqual([], self.snapshot.children(19))
+            self.assertEqual([5, 6], self.snapshot.descendants(4))
+            self.assertEqual([17, 18, 19, 20, 21], self.snapshot.descendants(17, include_self=True))
+            self.assertEqual(10, self.snapshot.descendant_count(11))
+            self.assertEqual(4, self.snapshot.parent(5))
+            self.assertIsNone(self.snapshot.parent(1))
+            self.assertEqual(3, self.snapshot.depth(19))
+
+    def test_matches_database(self):
+        for node in SimpleNode.objects.all():
+            self.assertEqual(
+                list(node.get_descendants().values_list("pk", flat=True)), self.snapshot.descendants(node.pk))
+            self.assertEqual(
+                list(node.get_ancestors().values_list("pk", flat=True)), self.snapshot.ancestors(node.pk))
+            self.assertEqual(
+                (node.mptt_tree_id, node.mptt_lft, node.mptt_rgt), self.snapshot.subtree_bounds(node.pk))
+
+    def test_is_descendant(self):
+        self.assertTrue(self.snapshot.is_descendant(6, of=1))
+        self.assertTrue(self.snapshot.is_descendant(6, of=4))
+        self.assertFalse(self.snapshot.is_descendant(4, of=6))
+        self.assertFalse(self.snapshot.is_descendant(3, of=4))
+        self.assertFalse(self.snapshot.is_descendant(4, of=4))
+        self.assertTrue(self.snapshot.is_descendant(4, of=4, include_self=True))
+        self.assertFalse(self.snapshot.is_descendant(13, of=1))
+
+    def test_lowest_common_ancestor(self):
+        self.assertEqual(4, self.snapshot.lowest_common_ancestor(5, 6))
+        self.assertEqual(1, self.snapshot.lowest_common_ancestor(2, 6))
+        self.assertEqual(4, self.snapshot.lowest_common_ancestor(4, 6))
+        self.assertEqual(17, self.snapshot.lowest_common_ancestor(19, 21))
+        self.assertIsNone(self.snapshot.lowest_common_ancestor(5, 13))
+
+    def test_unknown_node(self):
+        with self.assertRaises(KeyError):
+            self.snapshot.ancestors(999)
+
+    def test_pickle(self):
+        restored = pickle.loads(pickle.dumps(self.snapshot))
+        self.assertEqual(self.snapshot.descendants(11), restored.descendants(11))
+        self.assertEqual(self.snapshot.ancestors(21), restored.ancestors(21))
+
+    def test_filtered_queryset(self):
+        snapshot = SimpleNode.objects.filter(mptt_tree_id=2).snapshot()
+        self.assertEqual(11, len(snapshot))
+        self.assertNotIn(1, snapshot)
+        self.assertEqual([12, 14, 17], snapshot.children(11))
+
+    def test_subtree_queryset(self):
+        snapshot = SimpleNode.objects.get(pk=17).get_descendants(include_self=True).snapshot()
+
+        self.assertEqual(5, len(snapshot))
+        self.assertIsNone(snapshot.parent(17))
+        self.assertEqual(17, snapshot.parent(18))
+        self.assertEqual([17, 20], snapshot.ancestors(21))
+        self.assertEqual([18, 20], snapshot.children(17))
+        self.assertEqual(17, snapshot.lowest_common_ancestor(19, 21))
+
+    def test_queryset_with_missing_levels(self):
+        snapshot = SimpleNode.objects.filter(pk__in=[11, 14, 19, 21]).snapshot()
+
+        self.assertIsNone(snapshot.parent(19))
+        self.assertEqual([11], snapshot.ancestors(21))
+        self.assertEqual([11, 21], snapshot.ancestors(21, include_self=True))
+        self.assertEqual([14], snapshot.children(11))
+        self.assertEqual([14, 19, 21], snapshot.descendants(11))
+        self.assertEqual(11, snapshot.lowest_common_ancestor(19, 21))
+        self.assertEqual(11, snapshot.lowest_common_ancestor(21, 14))
+
+    def test_queryset_without_common_ancestor(self):
+        snapshot = SimpleNode.objects.filter(pk__in=[13, 19, 21]).snapshot()
+
+        self.assertEqual([], snapshot.ancestors(21))
+        self.assertIsNone(snapshot.lowest_common_ancestor(19, 21))
+        self.assertIsNone(snapshot.lowest_common_ancestor(13, 21))
+
+
+class TestSparseTreeSnapshot(TestCase):
+
+    def test_sparse_values(self):
+        root = SparseNode(title="root")
+        first = SparseNode(title="first", mptt_parent=root)
+        child = SparseNode(title="child", mptt_parent=first)
+        second = SparseNode(title="second", mptt_parent=root)
+        SparseNode.objects.bulk_insert_tree([root, first, child, second])
+
+        snapshot = SparseNode.objects.all().snapshot()
+        self.assertEqual([first.pk, second.pk], snapshot.children(root.pk))
+        self.assertEqual([child.pk], snapshot.descendants(first.pk))
+        self.assertEqual(root.pk, snapshot.lowest_common_ancestor(child.pk, second.pk))